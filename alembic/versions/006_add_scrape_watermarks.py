@@ -0,0 +1,50 @@
+"""Add scrape_watermarks table for incremental scraping
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scrape_watermarks",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("subreddit", sa.String(100), nullable=False),
+        sa.Column("last_created_utc", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_reddit_id", sa.String(20), nullable=True),
+        sa.Column("pipeline_run_id", sa.Integer(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.ForeignKeyConstraint(["pipeline_run_id"], ["pipeline_runs.id"]),
+    )
+    op.create_index("ix_scrape_watermarks_subreddit", "scrape_watermarks", ["subreddit"], unique=True)
+
+    # Seed from posts already scraped so the first incremental run is incremental
+    op.execute(
+        """
+        INSERT INTO scrape_watermarks (subreddit, last_created_utc, last_reddit_id, updated_at)
+        SELECT p.subreddit, p.created_utc, MIN(p.reddit_id), CURRENT_TIMESTAMP
+        FROM raw_posts p
+        JOIN (
+            SELECT subreddit, MAX(created_utc) AS latest
+            FROM raw_posts
+            WHERE created_utc IS NOT NULL
+            GROUP BY subreddit
+        ) w ON p.subreddit = w.subreddit AND p.created_utc = w.latest
+        GROUP BY p.subreddit, p.created_utc
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("scrape_watermarks")
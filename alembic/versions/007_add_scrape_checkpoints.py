@@ -0,0 +1,46 @@
+"""Add scrape_checkpoints table for resumable scrapes
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scrape_checkpoints",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("scrape_id", sa.String(32), nullable=False),
+        sa.Column("pipeline_run_id", sa.Integer(), nullable=True),
+        sa.Column("source", sa.String(20), nullable=False),
+        sa.Column("subreddit", sa.String(100), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False, server_default="pending"),
+        sa.Column("apify_run_id", sa.String(50), nullable=True),
+        sa.Column("dataset_id", sa.String(50), nullable=True),
+        sa.Column("cursor", sa.String(50), nullable=True),
+        sa.Column("carry_ids", sa.JSON(), nullable=True),
+        sa.Column("posts_inserted", sa.Integer(), server_default="0"),
+        sa.Column("posts_skipped", sa.Integer(), server_default="0"),
+        sa.Column("comments_collected", sa.Integer(), server_default="0"),
+        sa.Column("newest_created_utc", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("newest_reddit_id", sa.String(20), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.ForeignKeyConstraint(["pipeline_run_id"], ["pipeline_runs.id"]),
+        sa.UniqueConstraint("scrape_id", "subreddit", name="uq_scrape_subreddit"),
+    )
+    op.create_index("ix_scrape_checkpoints_scrape_id", "scrape_checkpoints", ["scrape_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("scrape_checkpoints")
@@ -0,0 +1,27 @@
+"""Add content_hash to raw_posts for cross-post deduplication
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows stay NULL (never treated as duplicates) until
+    # `python -m pipeline.backfill content-hash` fills them in.
+    op.add_column("raw_posts", sa.Column("content_hash", sa.String(40), nullable=True))
+    op.create_index("ix_raw_posts_content_hash", "raw_posts", ["content_hash"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_raw_posts_content_hash", table_name="raw_posts")
+    op.drop_column("raw_posts", "content_hash")
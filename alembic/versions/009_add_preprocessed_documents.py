@@ -0,0 +1,37 @@
+"""Add preprocessed_documents cache table
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "preprocessed_documents",
+        sa.Column("post_id", sa.Integer(), nullable=False),
+        sa.Column("input_hash", sa.String(40), nullable=False),
+        sa.Column("rules_version", sa.String(20), nullable=False),
+        sa.Column("document", sa.Text(), nullable=False),
+        sa.Column("word_count", sa.Integer(), nullable=False),
+        sa.Column("pain_score", sa.Float(), nullable=False),
+        sa.Column("bl_include", sa.Boolean(), nullable=False),
+        sa.Column("bl_exclude", sa.Boolean(), nullable=False),
+        sa.Column("matched_categories", sa.JSON(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("post_id"),
+        sa.ForeignKeyConstraint(["post_id"], ["raw_posts.id"], ondelete="CASCADE"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("preprocessed_documents")
@@ -0,0 +1,27 @@
+"""Add pain_score to raw_posts for the API pain sort
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows stay NULL (sorted last) until
+    # `python -m pipeline.backfill pain-score` fills them in.
+    op.add_column("raw_posts", sa.Column("pain_score", sa.Float(), nullable=True))
+    op.create_index("ix_raw_posts_pain_score", "raw_posts", ["pain_score"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_raw_posts_pain_score", table_name="raw_posts")
+    op.drop_column("raw_posts", "pain_score")
@@ -0,0 +1,23 @@
+"""Add posts_skipped_duplicate to scrape_checkpoints
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "011"
+down_revision: Union[str, None] = "010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("scrape_checkpoints", sa.Column("posts_skipped_duplicate", sa.Integer(), server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column("scrape_checkpoints", "posts_skipped_duplicate")
@@ -2,6 +2,7 @@ from datetime import datetime, timezone
 
 from sqlalchemy import (
     JSON,
+    Boolean,
     Column,
     DateTime,
     Float,
@@ -32,6 +33,8 @@ class RawPost(Base):
     author = Column(String(100), nullable=True)
     created_utc = Column(DateTime(timezone=True), nullable=True)
     scraped_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    content_hash = Column(String(40), nullable=True, index=True)
+    pain_score = Column(Float, nullable=True, index=True)
 
     post_topics = relationship("PostTopic", back_populates="post")
     post_labels = relationship("PostLabel", back_populates="post")
@@ -142,3 +145,58 @@ class PostLabel(Base):
 
     post = relationship("RawPost", back_populates="post_labels")
     label = relationship("ParentLabel", back_populates="post_labels")
+
+
+class ScrapeWatermark(Base):
+    __tablename__ = "scrape_watermarks"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    subreddit = Column(String(100), nullable=False, unique=True, index=True)
+    last_created_utc = Column(DateTime(timezone=True), nullable=True)
+    last_reddit_id = Column(String(20), nullable=True)
+    pipeline_run_id = Column(Integer, ForeignKey("pipeline_runs.id"), nullable=True)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class ScrapeCheckpoint(Base):
+    __tablename__ = "scrape_checkpoints"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    scrape_id = Column(String(32), nullable=False, index=True)  # one scrape attempt, kept across resumes
+    pipeline_run_id = Column(Integer, ForeignKey("pipeline_runs.id"), nullable=True)
+    source = Column(String(20), nullable=False)  # apify | direct
+    subreddit = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, done, failed
+    apify_run_id = Column(String(50), nullable=True)
+    dataset_id = Column(String(50), nullable=True)
+    cursor = Column(String(50), nullable=True)  # listing `after` (direct) or dataset offset (apify)
+    carry_ids = Column(JSON, nullable=True)  # posts past the cursor that are already committed
+    posts_inserted = Column(Integer, default=0)
+    posts_skipped = Column(Integer, default=0)
+    posts_skipped_duplicate = Column(Integer, default=0)  # same content as another stored post
+    comments_collected = Column(Integer, default=0)
+    newest_created_utc = Column(DateTime(timezone=True), nullable=True)
+    newest_reddit_id = Column(String(20), nullable=True)
+    error_message = Column(Text, nullable=True)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        UniqueConstraint("scrape_id", "subreddit", name="uq_scrape_subreddit"),
+    )
+
+
+class PreprocessedDocument(Base):
+    """Cached preprocessing output per post, reused while its inputs and the rules are unchanged."""
+
+    __tablename__ = "preprocessed_documents"
+
+    post_id = Column(Integer, ForeignKey("raw_posts.id", ondelete="CASCADE"), primary_key=True)
+    input_hash = Column(String(40), nullable=False)  # title, body and the 3 comments the document uses
+    rules_version = Column(String(20), nullable=False)
+    document = Column(Text, nullable=False)
+    word_count = Column(Integer, nullable=False)
+    pain_score = Column(Float, nullable=False)
+    bl_include = Column(Boolean, nullable=False)
+    bl_exclude = Column(Boolean, nullable=False)
+    matched_categories = Column(JSON, nullable=True)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import case, func
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from backend.database import get_db
@@ -218,22 +218,6 @@ def get_label(label_id: int, db: Session = Depends(get_db)):
     )
 
 
-_PAIN_KEYWORDS_SQL = [
-    "nothing works", "at my wits end", "desperate", "don't know what to do",
-    "struggling", "exhausted", "tried everything", "what am i doing wrong",
-    "breaking point", "can't handle", "out of control", "feel like a failure",
-    "breaks my heart", "kills me to see", "it's getting worse",
-]
-
-
-def _pain_sort_expr():
-    return sum(
-        case((RawPost.title.ilike(f"%{kw}%"), 1), else_=0)
-        + case((RawPost.body.ilike(f"%{kw}%"), 1), else_=0)
-        for kw in _PAIN_KEYWORDS_SQL
-    )
-
-
 @router.get("/api/labels/{label_id}/posts", response_model=PostListResponse)
 def get_label_posts(
     label_id: int,
@@ -253,7 +237,7 @@ def get_label_posts(
     )
 
     if sort == "pain":
-        query = query.order_by(_pain_sort_expr().desc(), RawPost.upvotes.desc())
+        query = query.order_by(RawPost.pain_score.desc().nulls_last(), RawPost.upvotes.desc())
     else:
         query = query.order_by(RawPost.upvotes.desc())
 
@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 
-from backend.models import PipelineRun, Topic
+from backend.models import PipelineRun, PostTopic, RawPost, Topic
 
 
 def test_health_check(client):
@@ -95,3 +95,24 @@ def test_get_stats_empty(client):
 def test_get_methodology_not_found(client):
     response = client.get("/api/methodology")
     assert response.status_code == 404
+
+
+def test_get_topic_posts_sorted_by_pain(client, db_session):
+    run = PipelineRun(status="completed", completed_at=datetime.now(timezone.utc))
+    db_session.add(run)
+    db_session.flush()
+    topic = Topic(pipeline_run_id=run.id, topic_index=0, rank=1, keywords=[], representative_docs=[])
+    posts = [
+        RawPost(reddit_id="calm", subreddit="Parenting", title="Calm", upvotes=500, pain_score=0.0),
+        RawPost(reddit_id="unscored", subreddit="Parenting", title="Old", upvotes=900, pain_score=None),
+        RawPost(reddit_id="rough", subreddit="Parenting", title="Rough", upvotes=5, pain_score=1.0),
+        RawPost(reddit_id="tired", subreddit="Parenting", title="Tired", upvotes=50, pain_score=1 / 3),
+    ]
+    db_session.add_all([topic, *posts])
+    db_session.flush()
+    db_session.add_all([PostTopic(raw_post_id=p.id, topic_id=topic.id, pipeline_run_id=run.id, probability=0.5) for p in posts])
+    db_session.commit()
+
+    response = client.get(f"/api/topics/{topic.id}/posts?sort=pain")
+    assert response.status_code == 200
+    assert [p["reddit_id"] for p in response.json()["posts"]] == ["rough", "tired", "calm", "unscored"]
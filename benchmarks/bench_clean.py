@@ -0,0 +1,106 @@
+"""Benchmark document building: per-string clean_text loop vs column-wise clean_texts.
+
+Usage:
+    python -m benchmarks.bench_clean                 # corpus sized like results_npoints_v1.json
+    python -m benchmarks.bench_clean --posts 20000
+
+The synthetic corpus matches the saved run's post count and words per post
+and mixes in the markdown, links, quotes and repeated comments that real
+posts carry. Both builders must produce identical documents.
+"""
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+
+from pipeline.preprocessor import build_documents
+from pipeline.text_utils import clean_text
+
+RESULTS_FILE = Path(__file__).resolve().parent.parent / "results_npoints_v1.json"
+
+WORDS = (
+    "my toddler has meltdowns every night and we have tried everything including "
+    "routines charts timers and gentle parenting but nothing seems to help at all"
+).split()
+DECORATIONS = [
+    "**{}**", "*{}*", "_{}_", "[{}](https://example.com/article)", "https://www.reddit.com/r/Parenting/{}",
+    "\n\n> {}", "\n\n## {}", "{}\n", "{}",
+]
+COMMON_COMMENTS = ["[deleted]", "[removed]", "This.", "Hang in there!", "Following"]
+
+
+def _text(rng: random.Random, words: int) -> str:
+    out = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        out.append(rng.choice(DECORATIONS).format(word) if rng.random() < 0.08 else word)
+    return " ".join(out)
+
+
+def make_posts(n: int, words_per_post: int, seed: int = 0) -> list[SimpleNamespace]:
+    rng = random.Random(seed)
+    posts = []
+    for i in range(n):
+        comments = [
+            rng.choice(COMMON_COMMENTS) if rng.random() < 0.2 else _text(rng, words_per_post // 8)
+            for _ in range(5)
+        ]
+        posts.append(SimpleNamespace(
+            id=i,
+            title=_text(rng, 12),
+            body=_text(rng, words_per_post // 2) if rng.random() < 0.9 else "",
+            top_comments=comments,
+            subreddit="Parenting",
+            upvotes=i % 500,
+        ))
+    return posts
+
+
+def build_documents_per_string(posts) -> pd.DataFrame:
+    """The original row-by-row builder, kept here as the baseline."""
+    records = []
+    for post in posts:
+        title = clean_text(post.title or "")
+        body = clean_text(post.body or "")
+        comment_text = " ".join(clean_text(c) for c in (post.top_comments or [])[:3])
+        records.append({
+            "post_id": post.id,
+            "document": f"{title} {body} {comment_text}".strip(),
+            "subreddit": post.subreddit,
+            "upvotes": post.upvotes or 0,
+        })
+    return pd.DataFrame(records)
+
+
+def main():
+    saved = json.loads(RESULTS_FILE.read_text())["pipeline_run"]["methodology"]["preprocessing"]
+    parser = argparse.ArgumentParser(description="Document cleaning benchmark")
+    parser.add_argument("--posts", type=int, default=saved["total_documents_before_cleaning"])
+    parser.add_argument("--words-per-post", type=int, default=saved["avg_words_per_document"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    posts = make_posts(args.posts, args.words_per_post)
+    print(f"{args.posts} posts, ~{args.words_per_post} words each")
+
+    results = {}
+    for name, build in [("per-string loop", build_documents_per_string), ("clean_texts", build_documents)]:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results[name] = build(posts)
+            best = min(best, time.perf_counter() - start)
+        words = results[name]["document"].str.split().str.len().sum()
+        print(f"  {name:16s} {best:8.2f}s  {words / best:12,.0f} words/s")
+
+    baseline, vectorized = results.values()
+    assert baseline["document"].tolist() == vectorized["document"].tolist(), "documents differ"
+    print("  documents identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark the memory held by the preprocessed corpus DataFrame.
+
+Usage:
+    python -m benchmarks.bench_corpus_memory                    # 100k and 1M posts on SQLite
+    python -m benchmarks.bench_corpus_memory --sizes 100000
+
+Runs the run_pipeline data flow up to the model fit in a fresh subprocess
+per size: load_and_preprocess with the Build Legends filter, the topic
+columns run_topic_modeling adds, and one label slice as _subcluster_label
+takes it. Reports the frame's deep memory_usage, per-column bytes and the
+peak RSS of the process. Uses the synthetic posts from bench_loader.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_loader import _max_rss_mb, clear, seed
+from pipeline.db import get_session
+from pipeline.preprocessor import load_and_preprocess
+
+
+def run_worker(database_url: str):
+    session = get_session(database_url)
+    baseline = _max_rss_mb()
+    start = time.perf_counter()
+    df, _ = load_and_preprocess(session, filter_mode="build_legends", cache=False)
+    elapsed = time.perf_counter() - start
+
+    # What run_topic_modeling and _subcluster_label do to the frame
+    topics = np.arange(len(df)) % 40
+    df = df.assign(topic=topics, probability=np.ones(len(df)))
+    label_df = df[df["topic"] == 0]
+    label_df = label_df.assign(sub_cluster=np.zeros(len(label_df), dtype=int))
+
+    columns = {name: int(size) for name, size in df.memory_usage(deep=True, index=False).items()}
+    print(json.dumps({
+        "rows": len(df), "seconds": elapsed, "baseline_mb": baseline, "peak_mb": _max_rss_mb(),
+        "frame_mb": sum(columns.values()) / 2**20, "columns": columns,
+        "dtypes": {name: str(dtype) for name, dtype in df.dtypes.items()},
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corpus DataFrame memory benchmark")
+    parser.add_argument("--database-url", help="Defaults to a throwaway SQLite file")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.database_url)
+        return
+
+    tmp_dir = None
+    database_url = args.database_url
+    if not database_url:
+        tmp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(tmp_dir.name, 'bench_corpus_memory.db')}"
+
+    try:
+        for size in sorted(args.sizes):
+            seed(database_url, size)
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_corpus_memory", "--database-url", database_url, "--worker"],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(
+                f"  {size:>9,} posts -> {r['rows']:,} documents  {r['seconds']:7.2f}s  "
+                f"frame {r['frame_mb']:7.1f} MB  peak {r['peak_mb']:7.0f} MB "
+                f"(+{r['peak_mb'] - r['baseline_mb']:.0f} MB over baseline)"
+            )
+            for name, size_bytes in r["columns"].items():
+                print(f"      {name:15s} {r['dtypes'][name]:22s} {size_bytes / 2**20:8.1f} MB")
+    finally:
+        clear(database_url)
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark how embedding throughput scales with EmbeddingPool workers.
+
+Usage:
+    python -m benchmarks.bench_embedding_pool                          # 1, 2, 4, 8, 16 workers
+    python -m benchmarks.bench_embedding_pool --workers 1 4 16 --docs 8000 --backend onnx-int8
+
+Encodes the same synthetic posts (see bench_embeddings) in-process with the
+backend's default threading, then with a pool of N single-threaded workers
+per run. Worker start-up (process spawn and model load) is timed
+separately from encoding. Speedup is against one pool worker (extrapolated
+from the smallest N run otherwise); efficiency is speedup / N. Worker
+counts above the host's CPU count are skipped.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from benchmarks.bench_embeddings import make_documents
+from pipeline.config import PipelineConfig
+from pipeline.embedding_pool import EmbeddingPool
+from pipeline.onnx_embedder import cosine_agreement
+from pipeline.topic_modeler import load_embedding_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding pool scaling benchmark")
+    parser.add_argument("--docs", type=int, default=4000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--model", default=PipelineConfig.EMBEDDING_MODEL)
+    parser.add_argument("--backend", default="torch", choices=["torch", "onnx-int8"])
+    args = parser.parse_args()
+
+    config = PipelineConfig(EMBEDDING_MODEL=args.model, EMBEDDING_BACKEND=args.backend)
+    documents = make_documents(args.docs)
+    cpus = os.cpu_count()
+    print(f"  {args.docs:,} documents, {args.model} ({args.backend}), {cpus} CPUs")
+
+    model = load_embedding_model(config)  # also makes the int8 export once, before any worker starts
+    start = time.perf_counter()
+    reference = np.asarray(model.encode(documents, show_progress_bar=False))
+    seconds = time.perf_counter() - start
+    print(f"    {'in-process':12s} {seconds:8.2f}s  {args.docs / seconds:8.1f} docs/s")
+
+    baseline = None
+    for workers in sorted(args.workers):
+        if workers > cpus:
+            print(f"    {workers:3d} workers   skipped (more than {cpus} CPUs)")
+            continue
+        with EmbeddingPool(config, workers) as pool:
+            start = time.perf_counter()
+            pool.encode(documents[:1])
+            startup = time.perf_counter() - start
+            start = time.perf_counter()
+            embeddings = pool.encode(documents)
+            seconds = time.perf_counter() - start
+        baseline = baseline or seconds * workers
+        speedup = baseline / seconds
+        agreement = cosine_agreement(reference, embeddings)["min"]
+        print(
+            f"    {workers:3d} workers  {seconds:8.2f}s  {args.docs / seconds:8.1f} docs/s  "
+            f"speedup {speedup:5.2f}x  efficiency {speedup / workers:4.0%}  "
+            f"(start-up {startup:.1f}s, min cosine to in-process {agreement})"
+        )
+
+
+if __name__ == "__main__":
+    main()
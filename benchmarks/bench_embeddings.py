@@ -0,0 +1,82 @@
+"""Benchmark embedding backends: PyTorch fp32 vs int8 ONNX Runtime.
+
+Usage:
+    python -m benchmarks.bench_embeddings                          # 2,000 documents, config.EMBEDDING_MODEL
+    python -m benchmarks.bench_embeddings --docs 10000 --model all-MiniLM-L6-v2
+
+Documents are synthetic posts whose lengths follow a long-tailed
+distribution (a few words up to a few thousand), like the corpus. Each
+backend encodes the same documents; "unbucketed" runs the ONNX model on
+fixed batches in input order, padding each to its longest member, to show
+what length bucketing saves. Agreement is the cosine similarity of each
+document's int8 embedding to its fp32 one.
+"""
+import argparse
+import random
+import tempfile
+import time
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from pipeline.config import PipelineConfig
+from pipeline.onnx_embedder import OnnxInt8Embedder, cosine_agreement
+
+WORDS = (
+    "my son daughter has meltdowns every night and we tried therapy school anxiety screen time "
+    "bedtime routine nothing works she is so frustrated advice please toddler tantrum friends "
+    "teacher called again doctor said wait sleep eating picky reading behind worried"
+).split()
+
+
+def make_documents(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choices(WORDS, k=min(4448, max(3, int(rng.lognormvariate(4.2, 1.0))))))
+        for _ in range(count)
+    ]
+
+
+def _timed(name: str, encode, documents: list[str]) -> np.ndarray:
+    start = time.perf_counter()
+    embeddings = np.asarray(encode(documents))
+    seconds = time.perf_counter() - start
+    print(f"    {name:24s} {seconds:8.2f}s  {len(documents) / seconds:8.1f} docs/s")
+    return embeddings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend benchmark")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--model", default=PipelineConfig.EMBEDDING_MODEL)
+    parser.add_argument("--export-dir", help="Reuse int8 exports from here (default: a temporary directory)")
+    args = parser.parse_args()
+
+    documents = make_documents(args.docs)
+    lengths = [len(doc.split()) for doc in documents]
+    print(f"  {args.docs:,} documents, {np.median(lengths):.0f} median / {max(lengths):,} max words, {args.model}")
+
+    tmp_dir = None if args.export_dir else tempfile.TemporaryDirectory()
+    try:
+        onnx_model = OnnxInt8Embedder.load(args.model, args.export_dir or tmp_dir.name)
+        torch_model = SentenceTransformer(args.model, device="cpu")
+
+        reference = _timed("torch fp32", lambda docs: torch_model.encode(docs, show_progress_bar=False), documents)
+        quantized = _timed("onnx int8 (bucketed)", onnx_model.encode, documents)
+
+        def unbucketed(docs, batch_size=32):
+            encodings = onnx_model.tokenizer.encode_batch(docs)
+            return np.concatenate([
+                onnx_model._run(encodings[lo:lo + batch_size]) for lo in range(0, len(encodings), batch_size)
+            ])
+        _timed("onnx int8 (unbucketed)", unbucketed, documents)
+
+        agreement = cosine_agreement(reference, quantized)
+        print(f"    cosine agreement int8 vs fp32: mean {agreement['mean']}, p01 {agreement['p01']}, min {agreement['min']}")
+    finally:
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
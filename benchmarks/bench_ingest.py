@@ -0,0 +1,92 @@
+"""Benchmark raw_posts ingestion: per-post upsert vs bulk ON CONFLICT insert.
+
+Usage:
+    python -m benchmarks.bench_ingest                                  # SQLite in-memory
+    python -m benchmarks.bench_ingest --database-url postgresql://...  # Postgres
+    python -m benchmarks.bench_ingest --rows 20000 --page-size 100
+
+Each strategy ingests the same synthetic pages twice: once into an empty table
+("fresh") and once more with every post already present ("re-scrape").
+Synthetic rows use a ``bench_`` reddit_id prefix and are deleted afterwards.
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.models import Base, RawPost
+from pipeline.db import bulk_insert_raw_posts, upsert_raw_post
+
+
+def make_pages(rows: int, page_size: int) -> list[list[dict]]:
+    now = datetime.now(timezone.utc)
+    posts = [
+        {
+            "reddit_id": f"bench_{i}",
+            "subreddit": "Parenting",
+            "title": f"My kid won't sleep, attempt {i}",
+            "body": "We've tried everything and I'm exhausted. " * 20,
+            "top_comments": ["Try white noise", "Consistency is key", "Hang in there"],
+            "upvotes": i % 1000,
+            "url": f"https://reddit.com/r/Parenting/comments/bench_{i}",
+            "author": "bench_user",
+            "created_utc": now,
+        }
+        for i in range(rows)
+    ]
+    return [posts[i:i + page_size] for i in range(0, rows, page_size)]
+
+
+def ingest_per_post(session, pages):
+    for page in pages:
+        for post in page:
+            upsert_raw_post(session, post)
+        session.commit()
+
+
+def ingest_bulk(session, pages):
+    for page in pages:
+        bulk_insert_raw_posts(session, page)
+        session.commit()
+
+
+def _clear(session):
+    session.execute(delete(RawPost).where(RawPost.reddit_id.like("bench_%")))
+    session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="raw_posts ingestion benchmark")
+    parser.add_argument("--database-url", default="sqlite:///:memory:")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=100, help="Posts per page (top.json returns 100)")
+    args = parser.parse_args()
+
+    if args.database_url.startswith("sqlite"):
+        engine = create_engine(args.database_url, poolclass=StaticPool)
+    else:
+        engine = create_engine(args.database_url)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    pages = make_pages(args.rows, args.page_size)
+    print(f"{engine.dialect.name}: {args.rows} rows in pages of {args.page_size}")
+
+    try:
+        for name, ingest in [("per-post upsert", ingest_per_post), ("bulk insert", ingest_bulk)]:
+            _clear(session)
+            for phase in ("fresh", "re-scrape"):
+                start = time.perf_counter()
+                ingest(session, pages)
+                elapsed = time.perf_counter() - start
+                print(f"  {name:16s} {phase:10s} {elapsed:8.2f}s  {args.rows / elapsed:12,.0f} rows/s")
+    finally:
+        _clear(session)
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
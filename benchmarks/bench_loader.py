@@ -0,0 +1,134 @@
+"""Benchmark corpus loading: ORM objects vs column-projected streamed rows.
+
+Usage:
+    python -m benchmarks.bench_loader                                  # 6k, 100k and 1M posts on SQLite
+    python -m benchmarks.bench_loader --sizes 6000 100000
+    python -m benchmarks.bench_loader --database-url postgresql://...  # Postgres (server-side cursor)
+
+For each corpus size the table is filled with synthetic posts, then every
+loader runs in a fresh subprocess so its peak RSS is measured in isolation.
+"Baseline" is the RSS right before loading (interpreter, pandas, SQLAlchemy);
+"peak" is the high-water mark after building the documents DataFrame.
+Synthetic rows use a ``bench_`` reddit_id prefix and are deleted afterwards.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, delete, func, select
+
+from backend.models import Base, RawPost
+from pipeline.db import bulk_insert_raw_posts, get_session
+from pipeline.preprocessor import build_documents, load_documents
+
+SEED_BATCH = 10000
+
+
+def _synthetic_post(i: int, now: datetime) -> dict:
+    return {
+        "reddit_id": f"bench_{i}",
+        "subreddit": "Parenting",
+        "title": f"My {i % 12 + 2} year old has meltdowns every night, post {i}",
+        "body": f"Post {i}. " + "We've tried everything and I'm exhausted, nothing seems to help. " * 12,
+        "top_comments": [f"Comment {j} on post {i}: consistency really is key here." for j in range(5)],
+        "upvotes": i % 1000,
+        "url": f"https://reddit.com/r/Parenting/comments/bench_{i}",
+        "author": "bench_user",
+        "created_utc": now,
+    }
+
+
+def seed(database_url: str, rows: int):
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    session = get_session(database_url)
+    try:
+        have = session.scalar(select(func.count(RawPost.id)).where(RawPost.reddit_id.like("bench_%")))
+        now = datetime.now(timezone.utc)
+        for start in range(have, rows, SEED_BATCH):
+            bulk_insert_raw_posts(
+                session, [_synthetic_post(i, now) for i in range(start, min(rows, start + SEED_BATCH))]
+            )
+            session.commit()
+    finally:
+        session.close()
+
+
+def clear(database_url: str):
+    session = get_session(database_url)
+    session.execute(delete(RawPost).where(RawPost.reddit_id.like("bench_%")))
+    session.commit()
+    session.close()
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def load_orm(session):
+    return build_documents(session.query(RawPost).all())
+
+
+def load_streamed(session):
+    return load_documents(session)
+
+
+LOADERS = {"orm objects": load_orm, "streamed columns": load_streamed}
+
+
+def run_worker(database_url: str, loader: str):
+    session = get_session(database_url)
+    baseline = _max_rss_mb()
+    start = time.perf_counter()
+    df = LOADERS[loader](session)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"rows": len(df), "seconds": elapsed, "baseline_mb": baseline, "peak_mb": _max_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corpus loader benchmark")
+    parser.add_argument("--database-url", help="Defaults to a throwaway SQLite file")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[6000, 100000, 1000000])
+    parser.add_argument("--worker", choices=list(LOADERS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.database_url, args.worker)
+        return
+
+    tmp_dir = None
+    database_url = args.database_url
+    if not database_url:
+        tmp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(tmp_dir.name, 'bench_loader.db')}"
+
+    print(f"{create_engine(database_url).dialect.name}: corpus load, one subprocess per loader")
+    try:
+        for size in sorted(args.sizes):
+            seed(database_url, size)
+            for loader in LOADERS:
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_loader", "--database-url", database_url, "--worker", loader],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                print(
+                    f"  {size:>9,} posts  {loader:17s} {r['seconds']:8.2f}s  "
+                    f"peak {r['peak_mb']:8.0f} MB  (+{r['peak_mb'] - r['baseline_mb']:.0f} MB over baseline)"
+                )
+    finally:
+        clear(database_url)
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
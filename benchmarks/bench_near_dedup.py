@@ -0,0 +1,86 @@
+"""Benchmark duplicate removal: exact document match vs MinHash/LSH near-duplicates.
+
+Usage:
+    python -m benchmarks.bench_near_dedup                      # 10k, 100k and 1M documents
+    python -m benchmarks.bench_near_dedup --sizes 10000 --threshold 0.7
+
+A fifth of each synthetic corpus is copies of other documents: half verbatim,
+half lightly edited (a few words changed, a sign-off appended, a sentence
+dropped). Recall is the share of copies each method removes; "false
+removals" counts originals it removed.
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from pipeline.config import PipelineConfig
+from pipeline.near_dedup import find_near_duplicates
+
+VOCAB = [f"w{i}" for i in range(20000)]
+VOCAB_WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCAB))]  # Zipf-like word frequencies
+SIGN_OFFS = ["Thanks in advance!", "Any advice appreciated.", "Edit: typo", "Update: still no luck."]
+
+
+def _light_edit(rng: random.Random, text: str) -> str:
+    words = text.split()
+    kind = rng.randrange(3)
+    if kind == 0:
+        for _ in range(rng.randint(1, 3)):
+            words[rng.randrange(len(words))] = rng.choice(VOCAB)
+    elif kind == 1:
+        words += rng.choice(SIGN_OFFS).split()
+    else:
+        start = rng.randrange(len(words))
+        del words[start:start + max(1, len(words) // 20)]
+    return " ".join(words)
+
+
+def make_corpus(size: int, seed: int = 0) -> tuple[list[str], np.ndarray]:
+    """Documents and, for each, whether it was injected as a copy."""
+    rng = random.Random(seed)
+    originals = size - size // 5
+    docs = [" ".join(rng.choices(VOCAB, VOCAB_WEIGHTS, k=rng.randint(50, 300))) for _ in range(originals)]
+    for i in range(size - originals):
+        source = docs[rng.randrange(originals)]
+        docs.append(source if i % 2 == 0 else _light_edit(rng, source))
+    # Copies come after every original, as their later post ids would put them
+    is_copy = np.zeros(size, dtype=bool)
+    is_copy[originals:] = True
+    return docs, is_copy
+
+
+def _report(name: str, removed: np.ndarray, is_copy: np.ndarray, seconds: float):
+    recall = (removed & is_copy).sum() / is_copy.sum()
+    print(
+        f"    {name:22s} {seconds:7.2f}s  recall {recall:6.1%}  "
+        f"false removals {(removed & ~is_copy).sum():,}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate detection benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--threshold", type=float, default=PipelineConfig.NEAR_DUP_THRESHOLD)
+    parser.add_argument("--num-perm", type=int, default=PipelineConfig.NEAR_DUP_NUM_PERM)
+    parser.add_argument("--shingle-size", type=int, default=PipelineConfig.NEAR_DUP_SHINGLE_SIZE)
+    args = parser.parse_args()
+
+    for size in sorted(args.sizes):
+        docs, is_copy = make_corpus(size)
+        print(f"  {size:,} documents ({is_copy.sum():,} copies)")
+
+        start = time.perf_counter()
+        exact_removed = pd.Series(docs).duplicated().to_numpy()
+        _report("exact (drop_duplicates)", exact_removed, is_copy, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        representatives = find_near_duplicates(docs, args.threshold, args.num_perm, args.shingle_size)
+        near_removed = representatives != np.arange(size)
+        _report(f"minhash/lsh @ {args.threshold}", near_removed, is_copy, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
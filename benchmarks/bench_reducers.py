@@ -0,0 +1,130 @@
+"""Benchmark dimensionality reducers: runtime and topic-assignment stability vs UMAP.
+
+Usage:
+    python -m benchmarks.bench_reducers                                # 10k, 100k and 500k documents
+    python -m benchmarks.bench_reducers --sizes 10000 --reducers umap pca svd --mode default
+
+Embeddings are synthetic: unit vectors of all-MiniLM-L6-v2's 384 dimensions
+around 40 topic centres of Zipf-like sizes, with a tenth of the documents
+off-topic. As with real sentence embeddings, the centres share a common
+direction and differ along a few others; two posts of a topic have a
+cosine similarity of about 0.5, two random posts about 0.15. Each reducer runs with the topic stage's
+settings, followed by the mode's cluster model (KMeans with
+BL_NUM_TOPICS for build_legends, HDBSCAN for default). Stability is the
+adjusted Rand index of the resulting topic assignment against the UMAP
+run's; "planted" is the ARI against the topics the embeddings were
+generated from.
+
+The label stage section times sub-clustering 50 labels of 20–300 posts,
+one reducer fit per label as in _subcluster_label.
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+from hdbscan import HDBSCAN
+from sklearn.cluster import KMeans
+from sklearn.metrics import adjusted_rand_score
+
+from pipeline.config import PipelineConfig
+from pipeline.reducers import REDUCERS, make_reducer
+
+DIM = 384
+TOPICS = 40
+TOPIC_RANK = 16  # dimensions the topic centres vary along
+SPREAD = 0.5  # of topic centres around the common direction
+NOISE = 0.11  # per dimension, around a document's topic centre
+
+
+def make_embeddings(count: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """(embeddings, planted topic per row; -1 for off-topic rows)."""
+    rng = np.random.default_rng(seed)
+    # Sentence embeddings share a common direction, and topics differ along a few others
+    common = rng.standard_normal(DIM)
+    basis = np.linalg.qr(rng.standard_normal((DIM, TOPIC_RANK)))[0].T
+    centres = common / np.linalg.norm(common) + rng.standard_normal((TOPICS, TOPIC_RANK)) @ basis * SPREAD
+    weights = 1 / np.arange(1, TOPICS + 1) ** 0.8
+    topics = rng.choice(TOPICS, size=count, p=weights / weights.sum())
+    topics[rng.random(count) < 0.1] = -1
+
+    embeddings = centres[np.maximum(topics, 0)]
+    off_topic = topics < 0
+    embeddings[off_topic] = centres.mean(axis=0) + rng.standard_normal((off_topic.sum(), TOPIC_RANK)) @ basis * SPREAD
+    embeddings = embeddings.astype(np.float32) + rng.standard_normal((count, DIM), dtype=np.float32) * NOISE
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings, topics
+
+
+def cluster_model(mode: str, config: PipelineConfig):
+    if mode == "build_legends":
+        return KMeans(n_clusters=config.BL_NUM_TOPICS, random_state=42, n_init=10)
+    return HDBSCAN(min_cluster_size=config.MIN_CLUSTER_SIZE, min_samples=config.MIN_SAMPLES, metric="euclidean")
+
+
+def bench_topic_stage(sizes: list[int], reducers: list[str], mode: str, config: PipelineConfig):
+    print(f"  Topic stage ({mode} mode)")
+    for size in sizes:
+        embeddings, planted = make_embeddings(size)
+        print(f"    {size:,} documents")
+        baseline = None
+        for method in ["umap"] + [r for r in reducers if r != "umap"]:
+            reducer, params = make_reducer(
+                method, size,
+                linear_components=config.REDUCER_LINEAR_COMPONENTS, sample_size=config.REDUCER_SAMPLE_SIZE,
+            )
+            start = time.perf_counter()
+            reduced = reducer.fit_transform(embeddings)
+            reduce_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            topics = cluster_model(mode, config).fit_predict(reduced)
+            cluster_seconds = time.perf_counter() - start
+            if baseline is None:
+                baseline = topics
+            print(
+                f"      {method:18s} reduce {reduce_seconds:8.2f}s  cluster {cluster_seconds:8.2f}s  "
+                f"ARI vs umap {adjusted_rand_score(baseline, topics):5.3f}  "
+                f"planted {adjusted_rand_score(planted, topics):5.3f}  ({params['n_components']} components)"
+            )
+
+
+def bench_label_stage(reducers: list[str], config: PipelineConfig):
+    rng = np.random.default_rng(1)
+    sizes = rng.integers(20, 301, size=50)
+    embeddings, planted = make_embeddings(int(sizes.sum()), seed=1)
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    print(f"  Label stage: {len(sizes)} labels, {sizes.sum():,} posts")
+    for method in ["umap"] + [r for r in reducers if r != "umap"]:
+        start = time.perf_counter()
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            n = int(hi - lo)
+            reducer, _ = make_reducer(
+                method, n, n_neighbors=max(2, min(15, n // 2)),
+                linear_components=config.REDUCER_LINEAR_COMPONENTS, sample_size=config.REDUCER_SAMPLE_SIZE,
+            )
+            reduced = reducer.fit_transform(embeddings[lo:hi])
+            KMeans(n_clusters=min(config.LABEL_MAX_STORIES, max(2, n // 30)), random_state=42, n_init=10).fit(reduced)
+        seconds = time.perf_counter() - start
+        print(f"      {method:18s} {seconds:8.2f}s  ({seconds / len(sizes) * 1000:6.1f} ms per label)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dimensionality reducer benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--reducers", nargs="+", choices=REDUCERS, default=list(REDUCERS))
+    parser.add_argument("--mode", choices=["build_legends", "default"], default="default")
+    parser.add_argument("--linear-components", type=int, default=PipelineConfig.REDUCER_LINEAR_COMPONENTS)
+    args = parser.parse_args()
+
+    config = PipelineConfig(REDUCER_LINEAR_COMPONENTS=args.linear_components)
+    warnings.filterwarnings("ignore", message="n_jobs value", category=UserWarning)  # UMAP, on every seeded fit
+    # Compile UMAP's numba kernels first, for both its exact (small inputs) and approximate
+    # nearest-neighbour paths, so the first timed fits don't pay for it
+    for n in (200, 5000):
+        make_reducer("umap", n)[0].fit_transform(make_embeddings(n)[0])
+    bench_label_stage(args.reducers, config)
+    bench_topic_stage(sorted(args.sizes), args.reducers, args.mode, config)
+
+
+if __name__ == "__main__":
+    main()
@@ -148,6 +148,14 @@ function MethodologyPage() {
               label="Removed (duplicates)"
               value={preprocessing.documents_removed_duplicates as number}
             />
+            <MetricRow
+              label="Removed (near-duplicates)"
+              value={preprocessing.documents_removed_near_duplicates as number}
+            />
+            <MetricRow
+              label="Near-duplicate clusters"
+              value={preprocessing.near_duplicate_clusters as number}
+            />
             <MetricRow
               label="Documents after cleaning"
               value={preprocessing.total_documents_after_cleaning as number}
@@ -0,0 +1,75 @@
+"""Raw scrape archive — zstd-compressed JSONL of everything the scrapers fetched.
+
+Layout: ``{base_dir}/{source}/{subreddit}/{YYYY-MM-DD}/{scrape_id}.jsonl.zst``
+
+- ``apify`` files hold one dataset item per line
+- ``direct`` files hold one old.reddit.com listing page per line
+- ``direct_comments`` files hold one ``/comments/{id}.json`` response per
+  line, for the posts of the ``direct`` file with the same scrape id
+
+Each write appends a separate zstd frame, so a crash loses at most the page
+being written and resumed scrapes can keep appending to the same file.
+"""
+import io
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import zstandard
+
+
+class RawArchive:
+    """Appends raw scrape payloads for one scrape attempt."""
+
+    def __init__(self, base_dir: str, scrape_id: str, level: int = 3):
+        self.base_dir = Path(base_dir)
+        self.scrape_id = scrape_id
+        self._compressor = zstandard.ZstdCompressor(level=level)
+
+    def path_for(self, source: str, subreddit: str) -> Path:
+        day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        return self.base_dir / source / subreddit / day / f"{self.scrape_id}.jsonl.zst"
+
+    def write(self, source: str, subreddit: str, records: list[dict]):
+        if not records:
+            return
+        path = self.path_for(source, subreddit)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = "".join(json.dumps(r, default=str) + "\n" for r in records).encode()
+        with open(path, "ab") as f:
+            f.write(self._compressor.compress(payload))
+
+    def tee(self, source: str, subreddit: str, pages):
+        """Pass ``pages`` through unchanged, archiving each one on the way."""
+        for page in pages:
+            self.write(source, subreddit, page)
+            yield page
+
+
+def iter_archive_files(
+    base_dir: str,
+    source: str | None = None,
+    subreddit: str | None = None,
+    since: str | None = None,
+):
+    """Yield (source, subreddit, day, path) for archive files, oldest day first."""
+    base = Path(base_dir)
+    for path in sorted(base.glob("*/*/*/*.jsonl.zst"), key=lambda p: (p.parent.name, str(p))):
+        day_dir = path.parent
+        file_source, file_subreddit, day = day_dir.parent.parent.name, day_dir.parent.name, day_dir.name
+        if source and file_source != source:
+            continue
+        if subreddit and file_subreddit != subreddit:
+            continue
+        if since and day < since:
+            continue
+        yield file_source, file_subreddit, day, path
+
+
+def read_archive_file(path: Path):
+    """Yield the JSON records of one archive file."""
+    with open(path, "rb") as f:
+        reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+        for line in io.TextIOWrapper(reader, encoding="utf-8"):
+            if line.strip():
+                yield json.loads(line)
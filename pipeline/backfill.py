@@ -0,0 +1,110 @@
+"""Fill derived raw_posts columns for rows stored before the column existed.
+
+Usage:
+    python -m pipeline.backfill content-hash    # raw_posts.content_hash (migration 008)
+    python -m pipeline.backfill pain-score      # raw_posts.pain_score (migration 010)
+
+Only rows where the column is NULL are touched, so re-running is cheap.
+"""
+import argparse
+import logging
+import time
+
+from sqlalchemy import bindparam, select, update
+
+from backend.models import RawPost
+from pipeline.config import PipelineConfig
+from pipeline.db import get_session
+from pipeline.text_utils import compute_content_hash, compute_post_pain_score
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_content_hashes(session, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Hash every post that has no content_hash yet. Returns rows hashed.
+
+    Existing duplicates are kept (the loader already skips all but the first
+    copy of each hash); only new ingests are dropped at insert time.
+    """
+    stmt = (
+        update(RawPost.__table__)
+        .where(RawPost.id == bindparam("b_id"))
+        .values(content_hash=bindparam("b_hash"))
+    )
+    hashed = 0
+    last_id = 0
+    while True:
+        batch = session.execute(
+            select(RawPost.id, RawPost.title, RawPost.body)
+            .where(RawPost.content_hash.is_(None), RawPost.id > last_id)
+            .order_by(RawPost.id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            return hashed
+        last_id = batch[-1].id
+        params = [
+            {"b_id": post_id, "b_hash": content_hash}
+            for post_id, title, body in batch
+            if (content_hash := compute_content_hash(title, body))
+        ]
+        if params:
+            session.connection().execute(stmt, params)
+        session.commit()
+        hashed += len(params)
+
+
+def backfill_pain_scores(session, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Score every post that has no pain_score yet. Returns rows scored."""
+    stmt = (
+        update(RawPost.__table__)
+        .where(RawPost.id == bindparam("b_id"))
+        .values(pain_score=bindparam("b_score"))
+    )
+    scored = 0
+    last_id = 0
+    while True:
+        batch = session.execute(
+            select(RawPost.id, RawPost.title, RawPost.body)
+            .where(RawPost.pain_score.is_(None), RawPost.id > last_id)
+            .order_by(RawPost.id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            return scored
+        last_id = batch[-1].id
+        params = [
+            {"b_id": post_id, "b_score": compute_post_pain_score(title, body)}
+            for post_id, title, body in batch
+        ]
+        session.connection().execute(stmt, params)
+        session.commit()
+        scored += len(params)
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    parser = argparse.ArgumentParser(description="Backfill derived raw_posts columns")
+    parser.add_argument("column", choices=["content-hash", "pain-score"])
+    args = parser.parse_args()
+
+    config = PipelineConfig()
+    session = get_session(config.DATABASE_URL)
+    start_time = time.time()
+    try:
+        if args.column == "content-hash":
+            count = backfill_content_hashes(session)
+        elif args.column == "pain-score":
+            count = backfill_pain_scores(session)
+    finally:
+        session.close()
+    logger.info(f"Backfilled {args.column} for {count} posts ({time.time() - start_time:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
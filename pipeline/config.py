@@ -11,6 +11,8 @@ class PipelineConfig:
     # Apify
     APIFY_API_TOKEN: str = os.getenv("APIFY_API_TOKEN", "")
     APIFY_ACTOR: str = "trudax/reddit-scraper"
+    APIFY_MAX_CONCURRENT_RUNS: int = 4  # actor runs in flight at once (1 = sequential)
+    APIFY_DATASET_PAGE_SIZE: int = 1000  # dataset items fetched per request
 
     # BrightData proxy (optional fallback)
     BRIGHTDATA_PROXY_HOST: str = os.getenv("BRIGHTDATA_PROXY_HOST", "")
@@ -46,11 +48,44 @@ class PipelineConfig:
     TIME_FILTER: str = "year"
     SORT_BY: str = "top"
 
+    # Direct (old.reddit.com JSON) scraping
+    REDDIT_BASE_URL: str = "https://old.reddit.com"
+    DIRECT_REQUESTS_PER_SECOND: float = 1.0  # shared across all subreddits
+    DIRECT_MAX_CONCURRENT_SUBREDDITS: int = 4
+    DIRECT_COMMENT_WORKERS: int = 8  # concurrent /comments/ fetches for new posts (0 = skip comments)
+
+    # Raw scrape archive (zstd JSONL of every fetched payload; empty disables)
+    RAW_ARCHIVE_DIR: str = os.getenv("RAW_ARCHIVE_DIR", "data/raw_archive")
+
+    # Preprocessing
+    PREPROCESS_WORKERS: int = int(os.getenv("PREPROCESS_WORKERS", "1"))  # processes for build/filter/score (1 = in-process)
+    NEAR_DUP_THRESHOLD: float = 0.8  # estimated Jaccard similarity that marks a near-duplicate (0 = exact dedup only)
+    NEAR_DUP_NUM_PERM: int = 64  # MinHash values per document
+    NEAR_DUP_SHINGLE_SIZE: int = 5  # words per shingle
+
+    # Parquet snapshot of each run's preprocessed corpus, for --from-snapshot (empty disables)
+    CORPUS_SNAPSHOT_DIR: str = os.getenv("CORPUS_SNAPSHOT_DIR", "data/corpus_snapshots")
+
     # Topic modeling
     NUM_TOPICS: int = 20
     MIN_CLUSTER_SIZE: int = 15
     MIN_SAMPLES: int = 5
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "torch")  # "torch" (fp32) or "onnx-int8" (ONNX Runtime, CPU)
+    EMBEDDING_ONNX_DIR: str = os.getenv("EMBEDDING_ONNX_DIR", "data/onnx_models")  # int8 exports, made on first use
+    EMBEDDING_WORKERS: int = int(os.getenv("EMBEDDING_WORKERS", "1"))  # encoding processes (1 = in-process)
+    EMBEDDING_THREADS_PER_WORKER: int = 1  # torch / ONNX Runtime threads in each of EMBEDDING_WORKERS > 1
+    # Embeddings cached on disk per model and document hash (empty disables)
+    EMBEDDING_CACHE_DIR: str = os.getenv("EMBEDDING_CACHE_DIR", "data/embedding_cache")
+    EMBEDDING_CACHE_MAX_IDLE_RUNS: int = 5  # drop cached embeddings no run has used in this many runs (0 = never)
+    # Reducer before clustering: "umap", "umap_sample" (fit on REDUCER_SAMPLE_SIZE documents, transform the rest),
+    # "pca", "svd" or "random_projection"; see pipeline.reducers
+    TOPIC_REDUCER: str = os.getenv("TOPIC_REDUCER", "umap")
+    REDUCER_LINEAR_COMPONENTS: int = 10  # components kept by pca / svd / random_projection
+    REDUCER_SAMPLE_SIZE: int = 20000
+
+    # Fitted topic model of each run, for --assign-only (empty disables)
+    TOPIC_MODEL_DIR: str = os.getenv("TOPIC_MODEL_DIR", "data/topic_models")
 
     # Build Legends mode overrides
     BL_NUM_TOPICS: int = 10
@@ -60,6 +95,7 @@ class PipelineConfig:
     # Labels Analysis
     LABEL_MIN_POSTS: int = 20
     LABEL_MAX_STORIES: int = 5
+    LABEL_REDUCER: str = os.getenv("LABEL_REDUCER", "umap")  # per-label sub-clustering; same choices as TOPIC_REDUCER
     LABEL_GPT_DISCOVERY_SAMPLE: int = 200
 
     # Summarization
@@ -1,9 +1,24 @@
 from datetime import datetime, timezone
+from uuid import uuid4
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import JSON, Integer, String, bindparam, column, create_engine, select, text, update, values
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session, sessionmaker
 
-from backend.models import Base, LabelStory, ParentLabel, PipelineRun, PostLabel, PostTopic, RawPost, Topic
+from backend.models import (
+    Base,
+    LabelStory,
+    ParentLabel,
+    PipelineRun,
+    PostLabel,
+    PostTopic,
+    PreprocessedDocument,
+    RawPost,
+    ScrapeCheckpoint,
+    ScrapeWatermark,
+    Topic,
+)
+from pipeline.text_utils import compute_content_hash, compute_post_pain_score
 
 
 def get_engine(database_url: str):
@@ -33,6 +48,271 @@ def upsert_raw_post(session: Session, post_data: dict) -> int | None:
     return post.id
 
 
+# Rows per INSERT statement. 12 bound params per row keeps us well under the
+# Postgres (65535) and SQLite (32766) parameter limits.
+BULK_INSERT_BATCH_SIZE = 1000
+
+
+def _insert_for(session: Session):
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise ValueError(f"Bulk insert not supported for dialect '{dialect}'")
+
+
+def bulk_insert_raw_posts(
+    session: Session,
+    posts: list[dict],
+    batch_size: int = BULK_INSERT_BATCH_SIZE,
+    skip_duplicate_content: bool = True,
+) -> tuple[int, int, int]:
+    """Insert many posts with multi-row INSERT ... ON CONFLICT (reddit_id) DO NOTHING.
+
+    Each row gets a ``content_hash`` and ``pain_score`` (see
+    ``compute_content_hash`` and ``compute_post_pain_score``). With
+    ``skip_duplicate_content``, posts whose hash is already held by another
+    post, stored or earlier in ``posts`` (cross-posts, reposts), are not
+    inserted either.
+
+    Returns (inserted, skipped_existing, skipped_duplicate_content).
+    ``skipped_existing`` counts posts whose reddit_id already exists or
+    repeats within ``posts``.
+    """
+    if not posts:
+        return 0, 0, 0
+
+    stmt = (
+        _insert_for(session)(RawPost)
+        .on_conflict_do_nothing(index_elements=["reddit_id"])
+        .returning(RawPost.id)
+    )
+    now = datetime.now(timezone.utc)
+    inserted = duplicates = 0
+    hash_owners: dict[str, set[str]] = {}  # content_hash -> reddit_ids holding it
+    for i in range(0, len(posts), batch_size):
+        rows = [
+            {
+                "scraped_at": now,
+                "content_hash": compute_content_hash(p.get("title"), p.get("body")),
+                "pain_score": compute_post_pain_score(p.get("title"), p.get("body")),
+                **p,
+            }
+            for p in posts[i:i + batch_size]
+        ]
+        if skip_duplicate_content:
+            hashes = {r["content_hash"] for r in rows if r["content_hash"]} - hash_owners.keys()
+            stored = session.execute(
+                select(RawPost.content_hash, RawPost.reddit_id).where(RawPost.content_hash.in_(hashes))
+            )
+            for content_hash, reddit_id in stored:
+                hash_owners.setdefault(content_hash, set()).add(reddit_id)
+            unique = []
+            for row in rows:
+                owners = hash_owners.setdefault(row["content_hash"], set()) if row["content_hash"] else None
+                # A post whose own row holds the hash is a re-scrape, left to ON CONFLICT
+                if owners and row["reddit_id"] not in owners:
+                    duplicates += 1
+                    continue
+                if owners is not None:
+                    owners.add(row["reddit_id"])
+                unique.append(row)
+            rows = unique
+            if not rows:
+                continue
+        # executemany + RETURNING is rendered by SQLAlchemy as a single
+        # multi-row VALUES statement per batch ("insertmanyvalues").
+        result = session.execute(stmt, rows, execution_options={"insertmanyvalues_page_size": batch_size})
+        inserted += len(result.all())
+
+    return inserted, len(posts) - inserted - duplicates, duplicates
+
+
+def upsert_preprocessed_documents(
+    session: Session, records: list[dict], batch_size: int = BULK_INSERT_BATCH_SIZE
+) -> int:
+    """Insert or replace preprocessed_documents rows (keyed by post_id). Returns rows written."""
+    if not records:
+        return 0
+    insert = _insert_for(session)(PreprocessedDocument)
+    stmt = insert.on_conflict_do_update(
+        index_elements=["post_id"],
+        set_={
+            col: insert.excluded[col]
+            for col in (
+                "input_hash", "rules_version", "document", "word_count", "pain_score",
+                "bl_include", "bl_exclude", "matched_categories", "updated_at",
+            )
+        },
+    )
+    now = datetime.now(timezone.utc)
+    for i in range(0, len(records), batch_size):
+        session.execute(stmt, [{"updated_at": now, **r} for r in records[i:i + batch_size]])
+    return len(records)
+
+
+def existing_reddit_ids(session: Session, reddit_ids: list[str]) -> set[str]:
+    """The subset of ``reddit_ids`` already stored in raw_posts."""
+    if not reddit_ids:
+        return set()
+    return set(session.scalars(select(RawPost.reddit_id).where(RawPost.reddit_id.in_(reddit_ids))))
+
+
+def bulk_update_post_scores(
+    session: Session, posts: list[dict], batch_size: int = BULK_INSERT_BATCH_SIZE
+) -> int:
+    """Write fresh ``upvotes`` (and ``top_comments``, when given) for existing posts.
+
+    Current values are read first and only rows that actually changed are
+    written: on Postgres as one ``UPDATE ... FROM (VALUES ...)`` per batch, on
+    SQLite (no column aliases on VALUES) as an executemany UPDATE. Unknown
+    reddit_ids are ignored. Returns the number of rows updated.
+    """
+    updated = 0
+    dialect = session.get_bind().dialect.name
+    for i in range(0, len(posts), batch_size):
+        fresh = {p["reddit_id"]: p for p in posts[i:i + batch_size]}
+        current = session.execute(
+            select(RawPost.reddit_id, RawPost.upvotes, RawPost.top_comments)
+            .where(RawPost.reddit_id.in_(list(fresh)))
+        ).all()
+
+        changed = []
+        for reddit_id, upvotes, top_comments in current:
+            post = fresh[reddit_id]
+            new_comments = post.get("top_comments")
+            if new_comments is None:
+                new_comments = top_comments
+            if post.get("upvotes", upvotes) != upvotes or new_comments != top_comments:
+                changed.append((reddit_id, post.get("upvotes", upvotes), new_comments))
+        if not changed:
+            continue
+
+        if dialect == "postgresql":
+            v = values(
+                column("reddit_id", String),
+                column("upvotes", Integer),
+                column("top_comments", JSON),
+                name="v",
+            ).data(changed)
+            session.execute(
+                update(RawPost)
+                .where(RawPost.reddit_id == v.c.reddit_id)
+                .values(upvotes=v.c.upvotes, top_comments=v.c.top_comments),
+                execution_options={"synchronize_session": False},
+            )
+        else:
+            session.connection().execute(
+                update(RawPost.__table__)
+                .where(RawPost.reddit_id == bindparam("b_reddit_id"))
+                .values(upvotes=bindparam("b_upvotes"), top_comments=bindparam("b_top_comments")),
+                [
+                    {"b_reddit_id": r, "b_upvotes": u, "b_top_comments": c}
+                    for r, u, c in changed
+                ],
+            )
+        updated += len(changed)
+
+    return updated
+
+
+def _as_utc(dt: datetime | None) -> datetime | None:
+    # SQLite hands back naive datetimes even for timezone-aware columns
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def get_watermarks(session: Session) -> dict[str, tuple[datetime, str]]:
+    """Return {subreddit: (last_created_utc, last_reddit_id)} for every scraped subreddit."""
+    return {
+        wm.subreddit: (_as_utc(wm.last_created_utc), wm.last_reddit_id)
+        for wm in session.query(ScrapeWatermark).all()
+        if wm.last_created_utc is not None
+    }
+
+
+def update_watermark(
+    session: Session,
+    subreddit: str,
+    created_utc: datetime,
+    reddit_id: str,
+    pipeline_run_id: int | None = None,
+):
+    """Advance a subreddit's watermark to (created_utc, reddit_id) if it is newer."""
+    wm = session.query(ScrapeWatermark).filter_by(subreddit=subreddit).first()
+    if wm is None:
+        wm = ScrapeWatermark(subreddit=subreddit)
+        session.add(wm)
+    elif wm.last_created_utc is not None and _as_utc(wm.last_created_utc) >= created_utc:
+        return
+    wm.last_created_utc = created_utc
+    wm.last_reddit_id = reddit_id
+    wm.pipeline_run_id = pipeline_run_id
+    wm.updated_at = datetime.now(timezone.utc)
+
+
+def open_scrape_journal(
+    session: Session,
+    source: str,
+    subreddits: list[str],
+    pipeline_run_id: int | None = None,
+    resume: bool = False,
+) -> tuple[str, dict[str, ScrapeCheckpoint]]:
+    """Start a scrape journal, or with ``resume`` continue the latest unfinished one.
+
+    Returns (scrape_id, {subreddit: checkpoint}) with a checkpoint for every
+    requested subreddit.
+    """
+    scrape_id = None
+    if resume:
+        latest = (
+            session.query(ScrapeCheckpoint)
+            .filter_by(source=source)
+            .order_by(ScrapeCheckpoint.id.desc())
+            .first()
+        )
+        if latest and (
+            session.query(ScrapeCheckpoint)
+            .filter(ScrapeCheckpoint.scrape_id == latest.scrape_id, ScrapeCheckpoint.status != "done")
+            .count()
+        ):
+            scrape_id = latest.scrape_id
+    if scrape_id is None:
+        scrape_id = uuid4().hex
+
+    checkpoints = {
+        cp.subreddit: cp
+        for cp in session.query(ScrapeCheckpoint).filter_by(scrape_id=scrape_id).all()
+    }
+    for subreddit in subreddits:
+        if subreddit not in checkpoints:
+            cp = ScrapeCheckpoint(
+                scrape_id=scrape_id,
+                pipeline_run_id=pipeline_run_id,
+                source=source,
+                subreddit=subreddit,
+                status="pending",
+                posts_inserted=0,
+                posts_skipped=0,
+                posts_skipped_duplicate=0,
+                comments_collected=0,
+            )
+            session.add(cp)
+            checkpoints[subreddit] = cp
+    session.commit()
+    return scrape_id, {sub: checkpoints[sub] for sub in subreddits}
+
+
+def save_checkpoint(session: Session, scrape_id: str, subreddit: str, **fields):
+    """Update a subreddit's checkpoint. Commit together with the rows it describes."""
+    cp = session.query(ScrapeCheckpoint).filter_by(scrape_id=scrape_id, subreddit=subreddit).one()
+    for key, value in fields.items():
+        setattr(cp, key, value)
+    cp.updated_at = datetime.now(timezone.utc)
+
+
 def create_pipeline_run(session: Session, config_dict: dict | None = None) -> PipelineRun:
     run = PipelineRun(
         status="running",
@@ -43,6 +323,10 @@ def create_pipeline_run(session: Session, config_dict: dict | None = None) -> Pi
     return run
 
 
+def get_pipeline_run(session: Session, run_id: int) -> PipelineRun | None:
+    return session.get(PipelineRun, run_id)
+
+
 def update_pipeline_run(
     session: Session,
     run_id: int,
@@ -74,6 +358,53 @@ def store_post_topic(session: Session, post_topic_data: dict):
     session.add(pt)
 
 
+def latest_completed_run(session: Session, build_legends: bool) -> PipelineRun | None:
+    """The most recently completed run of the given mode (``config["build_legends_mode"]``)."""
+    runs = session.scalars(
+        select(PipelineRun).where(PipelineRun.status == "completed").order_by(PipelineRun.completed_at.desc())
+    )
+    return next((r for r in runs if bool((r.config or {}).get("build_legends_mode")) == build_legends), None)
+
+
+def assigned_post_ids(session: Session, pipeline_run_id: int) -> set[int]:
+    """Posts with a post_topics row for ``pipeline_run_id``."""
+    return set(session.scalars(select(PostTopic.raw_post_id).where(PostTopic.pipeline_run_id == pipeline_run_id)))
+
+
+def add_topic_assignments(session: Session, pipeline_run_id: int, assignments: list[dict]) -> int:
+    """Assign more posts to the stored topics of a run.
+
+    ``assignments`` holds ``post_id``, ``topic`` (topic index), ``probability``
+    and ``upvotes`` per post. Posts in topics the run didn't store (outliers,
+    topics ranked below the cut) are skipped. Each topic's ``post_count`` and
+    ``avg_upvotes`` are updated from their current values and the new posts.
+    Returns the number of post_topics rows added. Doesn't commit.
+    """
+    topics = {t.topic_index: t for t in session.query(Topic).filter_by(pipeline_run_id=pipeline_run_id)}
+    added = 0
+    by_topic: dict[int, list[dict]] = {}
+    for a in assignments:
+        if a["topic"] in topics:
+            by_topic.setdefault(a["topic"], []).append(a)
+
+    for topic_index, posts in by_topic.items():
+        topic = topics[topic_index]
+        session.add_all([
+            PostTopic(
+                raw_post_id=a["post_id"], topic_id=topic.id, pipeline_run_id=pipeline_run_id,
+                probability=a["probability"],
+            )
+            for a in posts
+        ])
+        count = topic.post_count or 0
+        total_upvotes = (topic.avg_upvotes or 0.0) * count + sum(a["upvotes"] for a in posts)
+        topic.post_count = count + len(posts)
+        topic.avg_upvotes = round(total_upvotes / topic.post_count, 1)
+        added += len(posts)
+    session.flush()
+    return added
+
+
 def get_all_posts(session: Session) -> list[RawPost]:
     return session.query(RawPost).all()
 
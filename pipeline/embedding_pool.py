@@ -0,0 +1,122 @@
+"""Multi-process document embedding for CPU-only hosts.
+
+One process encoding with PyTorch stops scaling after a few intra-op
+threads, so ``EmbeddingPool`` shards documents across worker processes
+instead. Each worker loads the embedding model once, runs it on
+``threads`` threads (default 1) and writes its rows straight into a
+shared-memory output matrix: only the documents and their row numbers are
+pickled, never the embeddings.
+
+Documents are handed out in tasks of ``TASK_DOCS``, longest first, so the
+expensive tasks start early and short ones fill the gaps at the end. The
+workers start on the first ``encode`` call, so a run whose documents all
+come from the embedding cache never loads the model in them.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from pipeline.config import PipelineConfig
+
+logger = logging.getLogger(__name__)
+
+TASK_DOCS = 64  # documents per worker task
+
+_model = None  # the embedding model, in a worker process
+
+
+def _init_worker(config: PipelineConfig, threads: int):
+    global _model
+    from pipeline.topic_modeler import load_embedding_model
+
+    if config.EMBEDDING_BACKEND == "torch":
+        import torch
+
+        torch.set_num_threads(threads)
+    _model = load_embedding_model(config, threads=threads)
+
+
+def _dimension() -> int:
+    return _model.get_sentence_embedding_dimension()
+
+
+def _encode_task(task: tuple) -> int:
+    """Encode one task's documents into its rows of the shared output matrix."""
+    shm_name, shape, rows, documents = task
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        out[rows] = _model.encode(documents, show_progress_bar=False)
+        del out  # release the buffer before closing
+    finally:
+        shm.close()
+    return len(rows)
+
+
+class EmbeddingPool:
+    """``workers`` processes encoding with ``load_embedding_model(config)``.
+
+    Use as a context manager, or call ``close``. Load the model once in the
+    parent first when the backend exports on first use (``onnx-int8``), so
+    the workers don't all export it at once.
+    """
+
+    def __init__(self, config: PipelineConfig, workers: int, threads: int = 1):
+        self.config = config
+        self.workers = workers
+        self.threads = threads
+        self.dim = None
+        self._pool = None
+
+    def _start(self):
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            # spawn, not fork: torch and ONNX Runtime thread pools don't survive a fork
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.config, self.threads),
+        )
+        self.dim = self._pool.submit(_dimension).result()
+        logger.info(
+            f"Started {self.workers} embedding workers x {self.threads} threads "
+            f"({self.config.EMBEDDING_MODEL}, {self.config.EMBEDDING_BACKEND})"
+        )
+
+    def encode(self, documents: list[str], **kwargs) -> np.ndarray:
+        """(len(documents), dim) float32 embeddings, in input order."""
+        if self._pool is None:
+            self._start()
+        shape = (len(documents), self.dim)
+        if not documents:
+            return np.empty(shape, dtype=np.float32)
+
+        order = np.argsort([-len(doc) for doc in documents], kind="stable")
+        shm = shared_memory.SharedMemory(create=True, size=shape[0] * shape[1] * 4)
+        try:
+            futures = [
+                self._pool.submit(_encode_task, (shm.name, shape, rows, [documents[i] for i in rows]))
+                for rows in (order[lo:lo + TASK_DOCS] for lo in range(0, len(order), TASK_DOCS))
+            ]
+            for future in futures:
+                future.result()
+            out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+            embeddings = out.copy()
+            del out
+        finally:
+            shm.close()
+            shm.unlink()
+        return embeddings
+
+    def close(self, cancel: bool = False):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=cancel)
+            self._pool = None
+
+    def __enter__(self) -> "EmbeddingPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(cancel=exc_type is not None)
@@ -0,0 +1,169 @@
+"""On-disk cache of document embeddings, keyed by embedding model and document hash.
+
+Layout: ``{base_dir}/{model}/``
+
+- ``vectors-{n}.f32`` — float32 rows of ``dim`` values, memory-mapped
+- ``index-{n}.npz`` — per row, the SHA-1 digest of the document text and the
+  store generation (one per full-corpus ``embed`` call) that last read it;
+  ``n`` counts commits, so every commit writes a new file
+- ``meta.json`` — model name, dimensions, row count, current generation,
+  commit count and which vectors/index files are live
+
+``meta.json`` is replaced last, so it is the commit point: new rows are
+appended to the vectors file and a new index file is written first, and a
+crash before the commit leaves rows past ``rows`` that the next append
+overwrites. Rows not read for ``max_idle_runs`` generations (documents that
+were deleted, filtered out or edited) are dropped by copying the live rows
+to a new vectors file. One writer at a time: pipeline runs are expected not
+to overlap.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ENCODE_BATCH_DOCS = 10000  # documents encoded (and appended) at once
+COPY_BLOCK_ROWS = 65536  # rows copied at once when compacting
+
+
+def document_hashes(documents: list[str]) -> np.ndarray:
+    """SHA-1 digest of each document's UTF-8 text, as an ``S20`` array."""
+    return np.array([hashlib.sha1(doc.encode("utf-8")).digest() for doc in documents], dtype="S20")
+
+
+class EmbeddingStore:
+    """Embeddings of one model, cached across pipeline runs."""
+
+    def __init__(self, base_dir: str, model_name: str, max_idle_runs: int = 0):
+        self.model_name = model_name
+        self.max_idle_runs = max_idle_runs
+        self.dir = Path(base_dir) / re.sub(r"[^\w.-]+", "_", model_name)
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+        meta_path = self.dir / "meta.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            if meta["model"] != model_name:
+                raise ValueError(f"{self.dir} holds embeddings of {meta['model']!r}, not {model_name!r}")
+            self.dim, self.rows, self.generation = meta["dim"], meta["rows"], meta["generation"]
+            # Stores written before the commit count named index files by generation
+            self.commits = meta.get("commits", meta["generation"])
+            self._vectors_path, self._index_path = self.dir / meta["vectors"], self.dir / meta["index"]
+            with np.load(self._index_path) as index:
+                self.hashes, self.last_used = index["hashes"], index["last_used"]
+        else:
+            self.dim, self.rows, self.generation, self.commits = None, 0, 0, 0
+            self._vectors_path, self._index_path = self.dir / "vectors-0.f32", None
+            self.hashes = np.empty(0, dtype="S20")
+            self.last_used = np.empty(0, dtype=np.int64)
+
+    def _vectors(self) -> np.ndarray:
+        return np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+
+    def _append(self, embeddings: np.ndarray) -> np.ndarray:
+        """Append rows to the vectors file; returns their row numbers."""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+        elif embeddings.shape[1] != self.dim:
+            raise ValueError(f"Embeddings have {embeddings.shape[1]} dimensions, the store has {self.dim}")
+        with open(self._vectors_path, "r+b" if self._vectors_path.exists() else "wb") as f:
+            f.seek(self.rows * self.dim * 4)  # past any rows an interrupted run left uncommitted
+            f.write(embeddings.tobytes())
+        start = self.rows
+        self.rows += len(embeddings)
+        return np.arange(start, self.rows)
+
+    def _commit(self, vectors_path: Path):
+        """Write the index and point ``meta.json`` at it and ``vectors_path``, then remove the old files."""
+        self.commits += 1
+        index_path = self.dir / f"index-{self.commits}.npz"  # never the live index
+        with open(index_path, "wb") as f:
+            np.savez(f, hashes=self.hashes, last_used=self.last_used)
+        meta = {
+            "model": self.model_name, "dim": self.dim, "rows": self.rows, "generation": self.generation,
+            "commits": self.commits, "vectors": vectors_path.name, "index": index_path.name,
+        }
+        tmp_path = self.dir / "meta.json.tmp"
+        tmp_path.write_text(json.dumps(meta))
+        os.replace(tmp_path, self.dir / "meta.json")
+
+        for old_path in (self._index_path, self._vectors_path):
+            if old_path not in (None, index_path, vectors_path) and old_path.exists():
+                old_path.unlink()
+        self._vectors_path, self._index_path = vectors_path, index_path
+
+    def _evict(self) -> tuple[Path, int]:
+        """Copy the rows read within ``max_idle_runs`` generations to a new vectors file.
+
+        Returns (vectors file to commit, rows evicted).
+        """
+        if not self.max_idle_runs:
+            return self._vectors_path, 0
+        keep = np.flatnonzero(self.generation - self.last_used <= self.max_idle_runs)
+        if len(keep) == self.rows:
+            return self._vectors_path, 0
+        vectors_path = self.dir / f"vectors-{self.generation}.f32"
+        with open(vectors_path, "wb") as f:
+            if len(keep):
+                old = self._vectors()
+                for lo in range(0, len(keep), COPY_BLOCK_ROWS):
+                    f.write(np.ascontiguousarray(old[keep[lo:lo + COPY_BLOCK_ROWS]]).tobytes())
+                del old
+        evicted = self.rows - len(keep)
+        self.hashes, self.last_used, self.rows = self.hashes[keep], self.last_used[keep], len(keep)
+        return vectors_path, evicted
+
+    def embed(self, documents: list[str], encode, new_generation: bool = True) -> tuple[np.ndarray, dict]:
+        """Embeddings for ``documents``, encoding only those not in the store.
+
+        ``encode`` takes a list of documents and returns their embeddings
+        (e.g. ``SentenceTransformer.encode``). Each call is one generation:
+        rows it reads are marked used, then idle rows are evicted. With
+        ``new_generation=False`` (a call on a few documents rather than the
+        corpus) rows are marked used by the current generation and nothing
+        is evicted, so the call doesn't age the rows it didn't read.
+        Returns (embeddings, stats).
+        """
+        if new_generation:
+            self.generation += 1
+        hashes = document_hashes(documents)
+        rows = pd.Index(self.hashes).get_indexer(hashes) if self.rows else np.full(len(hashes), -1)
+
+        missing = np.flatnonzero(rows < 0)
+        # Duplicate documents are encoded once, in order of first appearance
+        new_hashes, first, inverse = np.unique(hashes[missing], return_index=True, return_inverse=True)
+        order = np.argsort(first)
+        new_hashes, first, inverse = new_hashes[order], first[order], np.argsort(order)[inverse]
+        new_rows = np.empty(len(new_hashes), dtype=np.int64)
+        for lo in range(0, len(new_hashes), ENCODE_BATCH_DOCS):
+            batch = missing[first[lo:lo + ENCODE_BATCH_DOCS]]
+            new_rows[lo:lo + len(batch)] = self._append(np.asarray(encode([documents[i] for i in batch])))
+            logger.info(f"Encoded {lo + len(batch)}/{len(new_hashes)} new documents")
+        rows[missing] = new_rows[inverse]
+        self.hashes = np.concatenate([self.hashes, new_hashes])
+        self.last_used = np.concatenate([self.last_used, np.full(len(new_hashes), self.generation)])
+        self.last_used[rows] = self.generation
+
+        embeddings = np.array(self._vectors()[rows]) if len(rows) else np.empty((0, self.dim or 0), np.float32)
+        vectors_path, evicted = self._evict() if new_generation else (self._vectors_path, 0)
+        self._commit(vectors_path)
+
+        stats = {
+            "embedding_cache_hits": int(len(documents) - len(missing)),
+            "embedding_cache_misses": int(len(missing)),
+            "embedding_cache_evicted": evicted,
+            "embedding_cache_rows": self.rows,
+        }
+        logger.info(
+            f"Embedding cache: {stats['embedding_cache_hits']} reused, {len(new_hashes)} encoded, "
+            f"{evicted} evicted, {self.rows} stored"
+        )
+        return embeddings, stats
@@ -14,13 +14,13 @@ import time
 import numpy as np
 import pandas as pd
 from openai import OpenAI
-from sentence_transformers import SentenceTransformer
 from sklearn.cluster import KMeans
 from sklearn.feature_extraction.text import CountVectorizer
-from umap import UMAP
 
 from pipeline.config import PipelineConfig
 from pipeline.db import store_label, store_label_story, store_post_label
+from pipeline.reducers import make_reducer
+from pipeline.topic_modeler import CorpusEmbeddings, embed_corpus
 
 logger = logging.getLogger(__name__)
 
@@ -364,13 +364,13 @@ def _subcluster_label(
     df: pd.DataFrame,
     post_ids: list[int],
     config: PipelineConfig,
-    embedding_model: SentenceTransformer,
+    embeddings: CorpusEmbeddings,
 ) -> list[dict]:
     """Sub-cluster posts within a label to find story patterns.
 
     Returns list of sub-cluster dicts with post_ids, keywords, representative docs.
     """
-    label_df = df[df["post_id"].isin(post_ids)].copy()
+    label_df = df[df["post_id"].isin(post_ids)]
     has_pain = "pain_score" in label_df.columns
     if len(label_df) < 10:
         # Too few for sub-clustering — return as single story
@@ -391,24 +391,20 @@ def _subcluster_label(
     documents = label_df["document"].tolist()
     n_stories = min(config.LABEL_MAX_STORIES, max(2, len(label_df) // 30))
 
-    # Embed
-    embeddings = embedding_model.encode(documents, show_progress_bar=False)
-
-    # UMAP reduce
-    n_neighbors = min(15, len(documents) // 2)
-    umap_model = UMAP(
-        n_neighbors=max(2, n_neighbors),
-        n_components=min(5, len(documents) - 1),
-        min_dist=0.0,
-        metric="cosine",
-        random_state=42,
+    # Reduce the label's rows of the run's embedding matrix
+    reducer, _ = make_reducer(
+        config.LABEL_REDUCER,
+        len(documents),
+        n_neighbors=max(2, min(15, len(documents) // 2)),
+        linear_components=config.REDUCER_LINEAR_COMPONENTS,
+        sample_size=config.REDUCER_SAMPLE_SIZE,
     )
-    reduced = umap_model.fit_transform(embeddings)
+    reduced = reducer.fit_transform(embeddings.take(label_df["post_id"]))
 
     # KMeans
     kmeans = KMeans(n_clusters=n_stories, random_state=42, n_init=10)
     cluster_labels = kmeans.fit_predict(reduced)
-    label_df["sub_cluster"] = cluster_labels
+    label_df = label_df.assign(sub_cluster=cluster_labels)
 
     # Extract keywords per sub-cluster
     vectorizer = CountVectorizer(ngram_range=(1, 2), min_df=1, max_features=100, stop_words="english")
@@ -567,8 +563,13 @@ def run_label_analysis(
     df: pd.DataFrame,
     pipeline_run_id: int,
     config: PipelineConfig,
+    embeddings: CorpusEmbeddings | None = None,
 ) -> dict:
-    """Run the full label analysis pipeline. Returns metrics dict."""
+    """Run the full label analysis pipeline. Returns metrics dict.
+
+    ``embeddings`` are the run's document embeddings from topic modeling;
+    without them the documents are embedded here.
+    """
     start_time = time.time()
     metrics = {}
 
@@ -641,7 +642,8 @@ def run_label_analysis(
 
     # ── Phase 3 & 4: Sub-cluster and extract stories ──
     logger.info("Phase 3-4: Sub-clustering and GPT story extraction...")
-    embedding_model = SentenceTransformer(config.EMBEDDING_MODEL)
+    if embeddings is None and all_labels:
+        embeddings = embed_corpus(df, config)
     client = OpenAI(api_key=config.OPENAI_API_KEY)
 
     total_input_tokens = 0
@@ -656,7 +658,7 @@ def run_label_analysis(
         logger.info(f"  Processing label '{label_name}' ({post_count} posts)...")
 
         # Sub-cluster
-        sub_clusters = _subcluster_label(df, post_ids, config, embedding_model)
+        sub_clusters = _subcluster_label(df, post_ids, config, embeddings)
 
         # GPT story extraction for each sub-cluster
         stories = []
@@ -0,0 +1,98 @@
+"""Fitted topic models saved per pipeline run, for assigning new posts later.
+
+Layout: ``{base_dir}/{mode}/run-{pipeline_run_id:06d}/`` where ``mode`` is
+the preprocessing filter mode (``all`` or ``build_legends``):
+
+- BERTopic's safetensors files (``topic_embeddings.safetensors``,
+  ``ctfidf.safetensors``, ``config.json``, ...) — topic embeddings, c-TF-IDF
+  and topic metadata; no UMAP, clustering or embedding model, and no
+  document embeddings
+- ``post_ids.npy`` — the posts the model was fitted on
+- ``run.json`` — pipeline run, mode and the embedding model and backend that
+  the topic embeddings came from
+
+A loaded model assigns documents to the topic whose embedding is most
+similar (cosine), so only documents embedded with the same model and
+backend can be assigned. The directory is written under a temporary name
+and renamed, so a crash never leaves a partial model.
+"""
+import json
+import logging
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from bertopic import BERTopic
+
+from pipeline.config import PipelineConfig
+
+logger = logging.getLogger(__name__)
+
+
+def _mode_dir(base_dir: str, filter_mode: str | None) -> Path:
+    return Path(base_dir) / (filter_mode or "all")
+
+
+def save_topic_model(
+    topic_model: BERTopic,
+    post_ids,
+    base_dir: str,
+    filter_mode: str | None,
+    pipeline_run_id: int,
+    config: PipelineConfig,
+) -> Path:
+    """Save a fitted model and the ``post_ids`` it was fitted on; returns its directory."""
+    path = _mode_dir(base_dir, filter_mode) / f"run-{pipeline_run_id:06d}"
+    tmp_path = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+
+    topic_model.save(
+        tmp_path, serialization="safetensors", save_ctfidf=True, save_embedding_model=config.EMBEDDING_MODEL
+    )
+    np.save(tmp_path / "post_ids.npy", np.asarray(post_ids, dtype=np.int64))
+    (tmp_path / "run.json").write_text(json.dumps({
+        "pipeline_run_id": pipeline_run_id,
+        "filter_mode": filter_mode,
+        "embedding_model": config.EMBEDDING_MODEL,
+        "embedding_backend": config.EMBEDDING_BACKEND,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }, indent=2))
+    shutil.rmtree(path, ignore_errors=True)
+    tmp_path.rename(path)
+    logger.info(f"Saved topic model of run #{pipeline_run_id} to {path}")
+    return path
+
+
+def latest_topic_model(base_dir: str, filter_mode: str | None, run_ids: set[int] | None = None) -> Path | None:
+    """The model of the most recent pipeline run for ``filter_mode`` (among ``run_ids``, if given)."""
+    for path in sorted(_mode_dir(base_dir, filter_mode).glob("run-*[0-9]"), reverse=True):
+        if run_ids is None or int(path.name.removeprefix("run-")) in run_ids:
+            return path
+    return None
+
+
+def read_model_info(path: str | Path) -> dict:
+    return json.loads((Path(path) / "run.json").read_text())
+
+
+def fitted_post_ids(path: str | Path) -> pd.Index:
+    """The posts a saved model was fitted on."""
+    return pd.Index(np.load(Path(path) / "post_ids.npy"))
+
+
+def load_topic_model(path: str | Path, embedding_model, config: PipelineConfig) -> BERTopic:
+    """Load a saved model to assign documents embedded by ``embedding_model``.
+
+    Raises ValueError if ``config`` embeds with a different model or backend
+    than the one the model was fitted on.
+    """
+    info = read_model_info(path)
+    saved = (info["embedding_model"], info["embedding_backend"])
+    if saved != (config.EMBEDDING_MODEL, config.EMBEDDING_BACKEND):
+        raise ValueError(
+            f"{path} was fitted on {saved[0]} ({saved[1]}) embeddings, "
+            f"not {config.EMBEDDING_MODEL} ({config.EMBEDDING_BACKEND})"
+        )
+    return BERTopic.load(str(path), embedding_model=embedding_model)
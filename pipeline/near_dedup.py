@@ -0,0 +1,150 @@
+"""Near-duplicate detection with MinHash signatures and LSH banding.
+
+Documents are reduced to sets of word shingles, each set to ``num_perm``
+MinHash values, and documents sharing every value in at least one band of
+the signature become candidates. Candidates whose signatures agree on at
+least ``threshold`` of their values (the estimated Jaccard similarity) are
+linked, and linked documents form a cluster represented by its first member.
+
+Every step is a numpy pass over the corpus or over the candidate pairs, so
+the cost grows with the number of documents and shingles rather than pairs.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from pipeline.config import PipelineConfig
+
+SIGNATURE_CHUNK_DOCS = 10000  # documents tokenized at once
+MINHASH_BLOCK_SHINGLES = 1 << 16  # shingles hashed at once (block x num_perm uint64s)
+
+_TOKEN = re.compile(r"\w+")
+_EMPTY = np.iinfo(np.uint32).max
+
+
+def _hash_params(count: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    multipliers = rng.integers(0, 2**64, size=count, dtype=np.uint64) | np.uint64(1)
+    offsets = rng.integers(0, 2**64, size=count, dtype=np.uint64)
+    return multipliers, offsets
+
+
+def _shingle_hashes(documents: list[str], shingle_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """64-bit hashes of each document's word shingles and the document index of each.
+
+    Documents shorter than ``shingle_size`` words are one shingle; empty ones have none.
+    """
+    tokens = [_TOKEN.findall(doc.lower()) for doc in documents]
+    lengths = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=len(tokens))
+    flat = np.empty(int(lengths.sum()), dtype=object)
+    flat[:] = [token for doc_tokens in tokens for token in doc_tokens]
+    token_hashes = pd.util.hash_array(flat) if len(flat) else np.empty(0, dtype=np.uint64)
+
+    doc_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]) if len(lengths) else lengths
+    doc_ends = doc_starts + lengths
+    counts = np.where(lengths > 0, np.maximum(lengths - shingle_size + 1, 1), 0)
+    shingle_docs = np.repeat(np.arange(len(documents)), counts)
+    # Position of each shingle's first token in ``flat``
+    firsts = np.repeat(doc_starts - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts) + np.arange(counts.sum())
+
+    weights, _ = _hash_params(shingle_size, seed=0)
+    hashes = np.zeros(len(firsts), dtype=np.uint64)
+    for j in range(shingle_size):
+        positions = firsts + j
+        inside = positions < doc_ends[shingle_docs]
+        hashes[inside] += token_hashes[positions[inside]] * weights[j]
+    return hashes, shingle_docs
+
+
+def minhash_signatures(
+    documents: list[str],
+    num_perm: int = PipelineConfig.NEAR_DUP_NUM_PERM,
+    shingle_size: int = PipelineConfig.NEAR_DUP_SHINGLE_SIZE,
+    seed: int = 1,
+) -> np.ndarray:
+    """(len(documents), num_perm) uint32 MinHash signatures.
+
+    Each permutation is a multiply-shift hash of the shingle hash. Documents
+    without words get a row of ``2**32 - 1``, which ``find_near_duplicates``
+    leaves out.
+    """
+    multipliers, offsets = _hash_params(num_perm, seed)
+    signatures = np.full((len(documents), num_perm), _EMPTY, dtype=np.uint32)
+    for chunk_start in range(0, len(documents), SIGNATURE_CHUNK_DOCS):
+        hashes, shingle_docs = _shingle_hashes(documents[chunk_start:chunk_start + SIGNATURE_CHUNK_DOCS], shingle_size)
+        shingle_docs += chunk_start
+        for lo in range(0, len(hashes), MINHASH_BLOCK_SHINGLES):
+            # (num_perm, shingles), so each document's minimum is a contiguous reduction
+            block = np.multiply.outer(multipliers, hashes[lo:lo + MINHASH_BLOCK_SHINGLES])
+            block += offsets[:, None]
+            block >>= np.uint64(32)
+            block_docs = shingle_docs[lo:lo + MINHASH_BLOCK_SHINGLES]
+            # Shingles are grouped by document; a document can straddle two blocks
+            starts = np.flatnonzero(np.r_[True, block_docs[1:] != block_docs[:-1]])
+            docs = block_docs[starts]
+            signatures[docs] = np.minimum(signatures[docs], np.minimum.reduceat(block, starts, axis=1).T)
+    return signatures
+
+
+def lsh_bands(num_perm: int, threshold: float) -> tuple[int, int]:
+    """(bands, rows) whose candidate curve turns at or just below ``threshold``.
+
+    A pair with Jaccard similarity s becomes a candidate with probability
+    1 - (1 - s**rows)**bands, which is steepest near (1 / bands) ** (1 / rows).
+    Turning a little early favours recall; verification drops the extra pairs.
+    """
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1)]
+    below = [(b, r) for b, r in options if (1 / b) ** (1 / r) <= threshold]
+    return max(below or options[:1], key=lambda br: ((1 / br[0]) ** (1 / br[1]), br[0] * br[1]))
+
+
+def _components(size: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Smallest member index of each element's connected component."""
+    parent = np.arange(size)
+    while True:
+        roots_left, roots_right = parent[left], parent[right]
+        low, high = np.minimum(roots_left, roots_right), np.maximum(roots_left, roots_right)
+        if not (low != high).any():
+            return parent
+        np.minimum.at(parent, high, low)
+        while True:
+            jumped = parent[parent]
+            if (jumped == parent).all():
+                break
+            parent = jumped
+
+
+def find_near_duplicates(
+    documents: list[str],
+    threshold: float = PipelineConfig.NEAR_DUP_THRESHOLD,
+    num_perm: int = PipelineConfig.NEAR_DUP_NUM_PERM,
+    shingle_size: int = PipelineConfig.NEAR_DUP_SHINGLE_SIZE,
+) -> np.ndarray:
+    """Index of each document's cluster representative (its own index if unique).
+
+    The representative is the cluster's earliest document. Clusters are
+    connected components, so a chain of pairwise near-duplicates ends up in
+    one cluster even if its ends are less similar than ``threshold``.
+    """
+    signatures = minhash_signatures(documents, num_perm, shingle_size)
+    bands, rows = lsh_bands(num_perm, threshold)
+    candidates = np.flatnonzero(signatures[:, 0] != _EMPTY)
+    band_weights, _ = _hash_params(rows, seed=2)
+
+    left, right = [], []
+    for band in range(bands):
+        band_values = signatures[candidates, band * rows:(band + 1) * rows].astype(np.uint64)
+        keys = (band_values * band_weights).sum(axis=1)
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        # Pair every document with the first one in its bucket, then verify
+        representatives = candidates[first[inverse]]
+        paired = representatives != candidates
+        docs, reps = candidates[paired], representatives[paired]
+        similar = (signatures[docs] == signatures[reps]).mean(axis=1) >= threshold
+        left.append(docs[similar])
+        right.append(reps[similar])
+
+    if not left:
+        return np.arange(len(documents))
+    return _components(len(documents), np.concatenate(left), np.concatenate(right))
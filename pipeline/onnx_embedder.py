@@ -0,0 +1,212 @@
+"""Int8-quantized ONNX Runtime backend for sentence-transformers models on CPU.
+
+The first load of a model exports its transformer to ONNX, applies dynamic
+int8 quantization to the weights and checks the result against the fp32
+PyTorch model on a fixed set of probe sentences. Later loads only need
+``onnxruntime`` and ``tokenizers``.
+
+Layout: ``{export_dir}/{model}/``
+
+- ``model_int8.onnx`` — quantized transformer (token ids in, hidden states out)
+- ``tokenizer.json`` — the model's fast tokenizer, truncating to ``max_seq_length``
+- ``embedder.json`` — pooling, normalization, dimensions and the probe agreement
+
+Documents are batched by length: they are sorted by token count and each
+batch is padded only to its own longest member, with short documents
+packed into larger batches under a token budget.
+"""
+import json
+import logging
+import re
+from pathlib import Path
+
+import numpy as np
+from bertopic.backend import BaseEmbedder
+
+logger = logging.getLogger(__name__)
+
+BATCH_TOKENS = 16384  # padded tokens per ONNX Runtime call
+MAX_BATCH_DOCS = 256
+MIN_PROBE_AGREEMENT = 0.98  # mean cosine similarity to fp32 required after quantization
+
+# Probe sentences for the export check: short, long, and typical posts
+_PROBE_SENTENCES = [
+    "My son has meltdowns every night and I don't know what to do.",
+    "Sleep training",
+    "We tried therapy, a reward chart and cutting screen time but nothing works. "
+    "She is seven and gets so anxious before school that she cries in the car every morning.",
+    "Any advice on picky eating?",
+    "My daughter (4) hits her little brother whenever she doesn't get her way. "
+    "Time-outs make it worse. Is this normal at this age or should we talk to her pediatrician?",
+    "How do you handle a teenager who refuses to talk to you?",
+    "Update: the new routine is working, thanks everyone!",
+    "ADHD diagnosis at 6 — medication or wait?",
+]
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> dict:
+    """Row-wise cosine similarity between two embedding matrices of the same documents."""
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosines = (reference * candidate).sum(axis=1)
+    return {
+        "mean": round(float(cosines.mean()), 5),
+        "min": round(float(cosines.min()), 5),
+        "p01": round(float(np.percentile(cosines, 1)), 5),
+    }
+
+
+def _pooling_mode(config: dict) -> str:
+    # sentence-transformers >= 5 stores the mode by name, older versions as flags
+    mode = config.get("pooling_mode")
+    if mode is None:
+        flags = {"cls": "pooling_mode_cls_token", "mean": "pooling_mode_mean_tokens"}
+        mode = next((name for name, flag in flags.items() if config.get(flag)), None)
+    if mode not in ("cls", "mean"):
+        raise ValueError(f"Unsupported pooling mode for the ONNX backend: {mode!r}")
+    return mode
+
+
+def export_int8(model_name: str, model_dir: Path) -> dict:
+    """Export and quantize ``model_name`` into ``model_dir``; returns the embedder settings."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    modules = [type(module).__name__ for module in model]
+    if modules[:2] != ["Transformer", "Pooling"] or set(modules[2:]) - {"Normalize"}:
+        raise ValueError(
+            f"{model_name} has modules {modules}; the ONNX backend supports Transformer, Pooling[, Normalize]"
+        )
+    settings = {
+        "source_model": model_name,
+        "pooling": _pooling_mode(model[1].get_config_dict()),
+        "normalize": "Normalize" in modules,
+        "max_seq_length": model.max_seq_length,
+        "dim": model.get_sentence_embedding_dimension(),
+    }
+
+    model_dir.mkdir(parents=True, exist_ok=True)
+    model.tokenizer.save_pretrained(model_dir)
+    transformer = model[0].auto_model.eval()
+    # Eager attention exports as plain MatMul/Softmax nodes, which ONNX Runtime runs faster than the SDPA export
+    if hasattr(transformer, "set_attn_implementation"):
+        transformer.set_attn_implementation("eager")
+    input_names = [
+        name for name in ("input_ids", "attention_mask", "token_type_ids") if name in model.tokenizer.model_input_names
+    ]
+
+    class HiddenStates(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, *inputs):
+            return self.transformer(**dict(zip(input_names, inputs))).last_hidden_state
+
+    sample = model.tokenizer(["an example sentence", "another"], padding=True, return_tensors="pt")
+    fp32_path = model_dir / "model_fp32.onnx"
+    with torch.no_grad():
+        torch.onnx.export(
+            HiddenStates(), tuple(sample[name] for name in input_names), fp32_path,
+            input_names=input_names, output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "tokens"} for name in input_names + ["last_hidden_state"]},
+            opset_version=17, dynamo=False,
+        )
+    quantize_dynamic(fp32_path, model_dir / "model_int8.onnx", weight_type=QuantType.QInt8, per_channel=True)
+    fp32_path.unlink()
+
+    (model_dir / "embedder.json").write_text(json.dumps(settings, indent=2))
+    quantized = OnnxInt8Embedder(model_dir)
+    agreement = cosine_agreement(
+        model.encode(_PROBE_SENTENCES, show_progress_bar=False), quantized.encode(_PROBE_SENTENCES)
+    )
+    settings["probe_agreement"] = agreement
+    (model_dir / "embedder.json").write_text(json.dumps(settings, indent=2))
+    logger.info(f"Exported {model_name} to int8 ONNX in {model_dir} (probe cosine agreement {agreement})")
+    if agreement["mean"] < MIN_PROBE_AGREEMENT:
+        (model_dir / "embedder.json").unlink()  # so the next load doesn't pick up this export
+        raise ValueError(
+            f"int8 {model_name} agrees with fp32 at mean cosine {agreement['mean']} on the probe sentences, "
+            f"below {MIN_PROBE_AGREEMENT}; use the torch backend"
+        )
+    return settings
+
+
+class OnnxInt8Embedder(BaseEmbedder):
+    """Sentence embeddings from an exported int8 ONNX model.
+
+    ``encode`` mirrors ``SentenceTransformer.encode`` for the arguments the
+    pipeline uses, and as a BERTopic ``BaseEmbedder`` it can be passed as
+    ``embedding_model``.
+    """
+
+    def __init__(self, model_dir: str | Path, threads: int = 0):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        super().__init__()
+        model_dir = Path(model_dir)
+        self.settings = json.loads((model_dir / "embedder.json").read_text())
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(self.settings["max_seq_length"])
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            str(model_dir / "model_int8.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    @classmethod
+    def load(cls, model_name: str, export_dir: str, threads: int = 0) -> "OnnxInt8Embedder":
+        """Load the int8 export of ``model_name``, exporting it on first use."""
+        model_dir = Path(export_dir) / re.sub(r"[^\w.-]+", "_", model_name)
+        if not (model_dir / "embedder.json").exists():
+            export_int8(model_name, model_dir)
+        return cls(model_dir, threads)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.settings["dim"]
+
+    def _run(self, encodings: list) -> np.ndarray:
+        """Pooled embeddings of one batch, padded to its longest member."""
+        width = max(len(e.ids) for e in encodings)
+        ids = np.zeros((len(encodings), width), dtype=np.int64)
+        mask = np.zeros((len(encodings), width), dtype=np.int64)
+        for row, e in enumerate(encodings):
+            ids[row, :len(e.ids)] = e.ids
+            mask[row, :len(e.ids)] = 1
+        feeds = {"input_ids": ids, "attention_mask": mask, "token_type_ids": np.zeros_like(ids)}
+        hidden = self.session.run(None, {name: feeds[name] for name in self.input_names})[0]
+        if self.settings["pooling"] == "cls":
+            return hidden[:, 0]
+        return (hidden * mask[:, :, None]).sum(axis=1) / mask.sum(axis=1, keepdims=True)
+
+    def encode(
+        self, sentences: list[str], batch_size: int = MAX_BATCH_DOCS, show_progress_bar: bool = False, **kwargs
+    ) -> np.ndarray:
+        """(len(sentences), dim) float32 embeddings, in input order."""
+        embeddings = np.zeros((len(sentences), self.settings["dim"]), dtype=np.float32)
+        if not sentences:
+            return embeddings
+        encodings = self.tokenizer.encode_batch(list(sentences))
+        lengths = np.fromiter((len(e.ids) for e in encodings), dtype=np.int64, count=len(encodings))
+        order = np.argsort(-lengths, kind="stable")
+
+        start = 0
+        while start < len(order):
+            # Longest first, so the first document sets the batch's padded width
+            size = max(1, min(batch_size, BATCH_TOKENS // int(lengths[order[start]])))
+            batch = order[start:start + size]
+            embeddings[batch] = self._run([encodings[i] for i in batch])
+            start += size
+
+        if self.settings["normalize"]:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings
+
+    def embed(self, documents: list[str], verbose: bool = False) -> np.ndarray:
+        return self.encode(documents, show_progress_bar=verbose)
@@ -1,11 +1,23 @@
+import hashlib
+import json
 import logging
 import re
 import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import NamedTuple
 
+import numpy as np
 import pandas as pd
+from sqlalchemy import func, or_, select
 from sqlalchemy.orm import Session
 
-from backend.models import RawPost
+from backend.models import PreprocessedDocument, RawPost
+from pipeline.config import PipelineConfig
+from pipeline.db import upsert_preprocessed_documents
+from pipeline.near_dedup import find_near_duplicates
+from pipeline.text_utils import PAIN_SIGNAL_KEYWORDS, _PAIN_PATTERN, _pain_score
 
 logger = logging.getLogger(__name__)
 
@@ -138,40 +150,6 @@ BUILD_LEGENDS_EXCLUDE_PATTERNS = [
 ]
 
 
-# Pain signal keywords — phrases indicating struggle, desperation, negative emotion.
-# Used to prioritize negative/complaint posts over positive/advice posts.
-PAIN_SIGNAL_KEYWORDS = [
-    "nothing works", "at my wits end", "at my wit's end", "desperate",
-    "don't know what to do", "i don't know what", "i'm lost",
-    "struggling", "exhausted", "can't do this", "breaking point",
-    "tried everything", "what am i doing wrong", "falling apart",
-    "don't know how", "going to break", "scared", "worried sick",
-    "can't handle", "out of control", "every day is a battle",
-    "i'm failing", "feel like a failure", "helpless", "hopeless",
-    "at a loss", "no idea what to do", "cried", "crying",
-    "so frustrated", "ready to give up", "it's getting worse",
-    "rock bottom", "end of my rope", "i can't take it",
-    "tearing our family apart", "ruining", "destroying",
-    "i hate that", "breaks my heart", "kills me to see",
-    "watching him struggle", "watching her struggle",
-]
-
-_PAIN_PATTERN = re.compile(
-    r'\b(?:' + '|'.join(re.escape(kw) for kw in sorted(PAIN_SIGNAL_KEYWORDS, key=len, reverse=True)) + r')\b',
-    re.IGNORECASE,
-)
-
-
-def compute_pain_score(text: str) -> float:
-    """Score how much a post expresses pain/struggle (0.0-1.0)."""
-    if not text:
-        return 0.0
-    matches = _PAIN_PATTERN.findall(text.lower())
-    # Normalize: each unique keyword match adds signal, cap at 1.0
-    unique_matches = len(set(matches))
-    return min(1.0, unique_matches / 3.0)
-
-
 def _build_keyword_pattern(keyword_groups: dict[str, list[str]]) -> re.Pattern:
     """Build a single compiled regex from all keyword groups."""
     all_keywords = []
@@ -186,41 +164,201 @@ def _build_keyword_pattern(keyword_groups: dict[str, list[str]]) -> re.Pattern:
 _BL_PATTERN = _build_keyword_pattern(BUILD_LEGENDS_KEYWORDS)
 
 
+_BL_EXCLUDE_PATTERN = re.compile('|'.join(BUILD_LEGENDS_EXCLUDE_PATTERNS), re.IGNORECASE)
+
+_BL_CATEGORY_PATTERNS = {
+    category: re.compile(r'\b(?:' + '|'.join(re.escape(kw) for kw in keywords) + r')\b', re.IGNORECASE)
+    for category, keywords in BUILD_LEGENDS_KEYWORDS.items()
+}
+
+
+def _matched_categories(text: str) -> list[str]:
+    return [cat for cat, pat in _BL_CATEGORY_PATTERNS.items() if pat.search(text)]
+
+
+# The patterns above are the reference definitions. match_keywords finds the
+# same hits with one scan: every keyword sits in one trie-shaped regex tried at
+# each word boundary, and the terminal capture group that closes last says
+# which keyword (the longest one ending on a word boundary) starts there.
+# Exclusion patterns get a trie of their own, searched only for included
+# documents; folding them into the scan made it slower, not faster.
+
+class KeywordMatches(NamedTuple):
+    include: bool  # any Build Legends keyword
+    exclude: bool  # an exclusion pattern, only checked for included documents
+    categories: list[str]  # matched categories, in BUILD_LEGENDS_KEYWORDS order
+    pain_hits: set[str]  # unique pain phrases as compute_pain_score counts them
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"  # what \w matches in a str pattern
+
+
+def _trie_regex(entries: dict[str, list[str]]) -> tuple[str, list[str]]:
+    """Regex source for a trie over the literal keys of ``entries``.
+
+    Each key is followed by its own regex tails, which are tried after the
+    longer keys that continue it. Returns the source and the keys in the
+    order their tails appear in it.
+    """
+    root = {}
+    for literal, tails in entries.items():
+        node = root
+        for ch in literal:
+            node = node.setdefault(ch, {})
+        node[""] = literal
+    order = []
+
+    def render(node: dict) -> str:
+        branches = [re.escape(ch) + render(child) for ch, child in node.items() if ch]
+        if "" in node:
+            order.append(node[""])
+            tails = entries[node[""]]
+            branches.append(tails[0] if len(tails) == 1 else "(?:" + "|".join(tails) + ")")
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return render(root), order
+
+
+def _exclusion_regex(patterns: list[str]) -> str:
+    """``patterns`` as one alternation, with their ``\\b<literal>`` prefixes merged into a trie."""
+    anchored, other = {}, []
+    for pattern in patterns:
+        literal = re.match(r"\\b((?:[\w '-](?![?*+{]))*)", pattern)
+        if literal and literal.group(1):
+            anchored.setdefault(literal.group(1).lower(), []).append(pattern[literal.end():])
+        else:
+            other.append(pattern)
+    trie = [r"\b" + _trie_regex(anchored)[0]] if anchored else []
+    return "|".join(trie + other)
+
+
+def _keyword_tags(keyword: str, keywords: set[str], pain_keywords: set[str]) -> tuple[bool, set[str], int]:
+    """(include, categories, pain keyword length) for a match whose longest keyword is ``keyword``.
+
+    Any shorter keyword starting at the same place is a prefix of it, and
+    whether its end is a word boundary is decided by the longer keyword's
+    own characters.
+    """
+    hits = [
+        other for other in keywords
+        if keyword.startswith(other)
+        and (len(other) == len(keyword) or _is_word(keyword[len(other) - 1]) != _is_word(keyword[len(other)]))
+    ]
+    categories = {cat for cat, group in _BL_KEYWORD_SETS.items() if group.intersection(hits)}
+    pain = [len(other) for other in hits if other in pain_keywords]
+    return bool(categories), categories, max(pain, default=0)
+
+
+_BL_KEYWORD_SETS = {cat: {kw.lower() for kw in keywords} for cat, keywords in BUILD_LEGENDS_KEYWORDS.items()}
+_PAIN_KEYWORD_SET = {kw.lower() for kw in PAIN_SIGNAL_KEYWORDS}
+_ALL_KEYWORDS = set().union(*_BL_KEYWORD_SETS.values(), _PAIN_KEYWORD_SET)
+_KEYWORD_TRIE, _TRIE_KEYWORDS = _trie_regex({kw: [r"()\b"] for kw in sorted(_ALL_KEYWORDS)})
+_EXCLUSION_TRIE = re.compile(_exclusion_regex(BUILD_LEGENDS_EXCLUDE_PATTERNS), re.IGNORECASE)
+_KEYWORD_SCANNER = re.compile(rf"(?=\b{_KEYWORD_TRIE})", re.IGNORECASE)
+_KEYWORD_GROUP_TAGS = {
+    group: _keyword_tags(keyword, _ALL_KEYWORDS, _PAIN_KEYWORD_SET)
+    for group, keyword in enumerate(_TRIE_KEYWORDS, start=1)
+}
+
+
+def match_keywords(text: str) -> KeywordMatches:
+    """Build Legends include/exclude/category hits and pain phrases for ``text``.
+
+    Agrees with ``_BL_PATTERN``, ``_BL_EXCLUDE_PATTERN``, ``_matched_categories``
+    and ``compute_pain_score``.
+    """
+    if not text:
+        return KeywordMatches(False, False, [], set())
+    include = False
+    categories = set()
+    pain_hits, pain_end = set(), 0
+    for m in _KEYWORD_SCANNER.finditer(text):
+        keyword_include, keyword_categories, pain_length = _KEYWORD_GROUP_TAGS[m.lastindex]
+        include |= keyword_include
+        categories |= keyword_categories
+        # Pain phrases are counted like findall: leftmost, longest, non-overlapping
+        start = m.start()
+        if pain_length and start >= pain_end:
+            pain_end = start + pain_length
+            pain_hits.add(text[start:pain_end].lower())
+    if "\u0130" in text:
+        # Lowercasing İ adds a character, so findall on text.lower() sees other offsets
+        pain_hits = set(_PAIN_PATTERN.findall(text.lower()))
+    exclude = include and _EXCLUSION_TRIE.search(text) is not None
+    keep = include and not exclude
+    return KeywordMatches(
+        include=include,
+        exclude=exclude,
+        categories=[cat for cat in BUILD_LEGENDS_KEYWORDS if cat in categories] if keep else [],
+        pain_hits=pain_hits,
+    )
+
+
+# Bit i of a category mask stands for the i-th BUILD_LEGENDS_KEYWORDS category
+_CATEGORY_BITS = {category: 1 << i for i, category in enumerate(BUILD_LEGENDS_KEYWORDS)}
+_CATEGORY_MASK_DTYPE = "int16" if len(_CATEGORY_BITS) < 16 else "int64"
+
+
+def category_mask(categories: list[str]) -> int:
+    return sum(_CATEGORY_BITS[category] for category in categories)
+
+
+def mask_categories(mask: int) -> list[str]:
+    """Inverse of ``category_mask``, in BUILD_LEGENDS_KEYWORDS order."""
+    return [category for category, bit in _CATEGORY_BITS.items() if mask & bit]
+
+
+def annotate_build_legends(df: pd.DataFrame, matches: list[KeywordMatches] | None = None) -> pd.DataFrame:
+    """Add the per-document Build Legends columns ``filter_for_build_legends`` uses.
+
+    ``bl_include``/``bl_exclude`` are the keyword and exclusion matches and
+    ``category_mask`` (see ``mask_categories``) is set for documents that pass both. Every
+    value depends on its own document only, so chunks can be annotated
+    separately (and in parallel) and concatenated. Pass ``matches`` when the
+    documents were already scanned with ``match_keywords``.
+    """
+    if matches is None:
+        matches = [match_keywords(text) for text in df["document"]]
+    return df.assign(
+        bl_include=pd.Series([m.include for m in matches], index=df.index, dtype=bool),
+        bl_exclude=pd.Series([m.exclude for m in matches], index=df.index, dtype=bool),
+        category_mask=pd.Series(
+            [category_mask(m.categories) for m in matches], index=df.index, dtype=_CATEGORY_MASK_DTYPE
+        ),
+    )
+
+
 def filter_for_build_legends(df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
     """Filter documents to kids' mental health topics only.
 
     Two-pass filter:
     1. Include posts matching mental health keywords
     2. Exclude posts matching physical/daily-life patterns
-    """
-    before_count = len(df)
 
-    # Pass 1: Include posts matching mental health keywords
-    mask = df["document"].str.contains(_BL_PATTERN, regex=True)
-    filtered_df = df[mask].copy()
-    after_include = len(filtered_df)
+    Uses the columns from ``annotate_build_legends`` when ``df`` already has them.
+    """
+    if "bl_include" not in df.columns:
+        df = annotate_build_legends(df)
+    passes, metrics = _build_legends_pass(*(df[column].to_numpy() for column in _BL_COLUMNS))
+    return df[passes].drop(columns=["bl_include", "bl_exclude"]), metrics
 
-    # Pass 2: Exclude posts about non-mental-health topics
-    exclude_pattern = '|'.join(BUILD_LEGENDS_EXCLUDE_PATTERNS)
-    exclude_re = re.compile(exclude_pattern, re.IGNORECASE)
-    exclude_mask = filtered_df["document"].str.contains(exclude_re, regex=True)
-    filtered_df = filtered_df[~exclude_mask].copy()
-    after_exclude = len(filtered_df)
 
-    # Track which keyword categories matched for each document
-    _category_patterns = {}
-    for category, keywords in BUILD_LEGENDS_KEYWORDS.items():
-        cat_pattern = r'\b(?:' + '|'.join(re.escape(kw) for kw in keywords) + r')\b'
-        _category_patterns[category] = re.compile(cat_pattern, re.IGNORECASE)
+def _build_legends_pass(include: np.ndarray, exclude: np.ndarray, masks: np.ndarray) -> tuple[np.ndarray, dict]:
+    """Which documents pass the Build Legends filter, from the annotated columns, and its metrics."""
+    before_count = len(include)
 
-    def get_matched_categories(text: str) -> list[str]:
-        return [cat for cat, pat in _category_patterns.items() if pat.search(text)]
+    # Pass 1: Include posts matching mental health keywords
+    after_include = int(include.sum())
 
-    filtered_df["matched_categories"] = filtered_df["document"].apply(get_matched_categories)
+    # Pass 2: Exclude posts about non-mental-health topics
+    passes = include & ~exclude
+    after_exclude = int(passes.sum())
 
-    after_multi = len(filtered_df)
+    after_multi = after_exclude
 
-    after_count = len(filtered_df)
+    after_count = after_exclude
+    masks = masks[passes]
     metrics = {
         "total_before_filtering": int(before_count),
         "total_after_include": int(after_include),
@@ -228,103 +366,358 @@ def filter_for_build_legends(df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
         "excluded_single_category": int(after_exclude - after_multi),
         "total_after_filtering": int(after_count),
         "filter_pass_rate": round(after_count / before_count * 100, 1) if before_count > 0 else 0,
-        "keyword_category_counts": {
-            cat: int(filtered_df["matched_categories"].apply(lambda cats, c=cat: c in cats).sum())
-            for cat in BUILD_LEGENDS_KEYWORDS
-        },
+        "keyword_category_counts": {cat: int((masks & bit != 0).sum()) for cat, bit in _CATEGORY_BITS.items()},
     }
 
-    return filtered_df, metrics
+    return passes, metrics
 
 
-def clean_text(text: str) -> str:
-    """Strip URLs, markdown formatting, collapse whitespace."""
-    if not text:
-        return ""
-    # Remove URLs
-    text = re.sub(r"https?://\S+", "", text)
-    # Remove markdown links [text](url)
-    text = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", text)
-    # Remove markdown bold/italic
-    text = re.sub(r"[*_]{1,3}([^*_]+)[*_]{1,3}", r"\1", text)
-    # Remove markdown headers
-    text = re.sub(r"^#{1,6}\s+", "", text, flags=re.MULTILINE)
-    # Remove blockquotes
-    text = re.sub(r"^>\s*", "", text, flags=re.MULTILINE)
-    # Collapse whitespace
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
-
-
-def build_documents(posts: list[RawPost]) -> pd.DataFrame:
-    """Concatenate title + body + top 3 comments into one document per post."""
-    records = []
-    for post in posts:
-        title = clean_text(post.title or "")
-        body = clean_text(post.body or "")
-
-        comments = post.top_comments or []
-        comment_text = " ".join(clean_text(c) for c in comments[:3])
-
-        document = f"{title} {body} {comment_text}".strip()
-        records.append({
-            "post_id": post.id,
-            "document": document,
-            "subreddit": post.subreddit,
-            "upvotes": post.upvotes or 0,
-        })
-
-    return pd.DataFrame(records)
+# clean_text's substitutions, in order, each with the literals a match must
+# contain (at least one of). A pass only runs on the strings that still
+# contain one, which is exact: without them the pattern cannot match.
+_CLEAN_PASSES = [
+    (("://",), re.compile(r"https?://\S+"), ""),
+    (("](",), re.compile(r"\[([^\]]+)\]\([^)]+\)"), r"\1"),
+    (("*", "_"), re.compile(r"[*_]{1,3}([^*_]+)[*_]{1,3}"), r"\1"),
+    (("#",), re.compile(r"^#{1,6}\s+", re.MULTILINE), ""),
+    ((">",), re.compile(r"^>\s*", re.MULTILINE), ""),
+]
+
+
+def clean_texts(texts: pd.Series) -> pd.Series:
+    """``clean_text`` over a whole column; output is identical string for string.
+
+    Repeated strings are cleaned once, each substitution runs only on the
+    strings that can match it, and the whitespace collapse + strip is fused
+    into one split/join (the regex and ``str.split`` agree on what is
+    whitespace). Missing values become "".
+    """
+    # Not pd.factorize: its string hashtable stops at NUL characters
+    values = texts.fillna("").tolist()
+    uniques = list(dict.fromkeys(values))
+    cleaned = pd.Series(uniques, dtype=object)
+    for literals, pattern, repl in _CLEAN_PASSES:
+        mask = cleaned.str.contains(literals[0], regex=False)
+        for literal in literals[1:]:
+            mask |= cleaned.str.contains(literal, regex=False)
+        if mask.any():
+            cleaned[mask] = [pattern.sub(repl, text) for text in cleaned[mask]]
+    lookup = {text: " ".join(out.split()) for text, out in zip(uniques, cleaned)}
+    return pd.Series([lookup[text] for text in values], index=texts.index, dtype=object)
+
+
+# Rows fetched per round trip when streaming the corpus out of raw_posts
+LOAD_CHUNK_SIZE = 5000
+
+
+def build_documents(posts) -> pd.DataFrame:
+    """Concatenate title + body + top 3 comments into one document per post.
+
+    ``posts`` can be RawPost objects or rows with the same attributes. Titles,
+    bodies and comments are each cleaned as one column with ``clean_texts``.
+    """
+    posts = list(posts)
+    titles = clean_texts(pd.Series([post.title for post in posts], dtype=object))
+    bodies = clean_texts(pd.Series([post.body for post in posts], dtype=object))
+
+    comment_lists = [(post.top_comments or [])[:3] for post in posts]
+    flat_comments = iter(clean_texts(pd.Series([c for cs in comment_lists for c in cs], dtype=object)))
+    comment_texts = [" ".join(next(flat_comments) for _ in cs) for cs in comment_lists]
+
+    documents = [
+        f"{title} {body} {comment_text}".strip()
+        for title, body, comment_text in zip(titles, bodies, comment_texts)
+    ]
+    return pd.DataFrame({
+        "post_id": [post.id for post in posts],
+        "document": pd.Series(documents, dtype=str),  # keeps .str usable on an empty chunk
+        "subreddit": [post.subreddit for post in posts],
+        "upvotes": [post.upvotes or 0 for post in posts],
+    })
+
+
+_PostRow = namedtuple("_PostRow", ["id", "title", "body", "top_comments", "subreddit", "upvotes"])
+
+# Bump when document building or scoring code changes. Edits to the keyword
+# lists change the digest, so they invalidate preprocessed_documents by themselves.
+PREPROCESS_RULES_REVISION = 1
+PREPROCESS_RULES_VERSION = f"{PREPROCESS_RULES_REVISION}-" + hashlib.sha1(
+    json.dumps([BUILD_LEGENDS_KEYWORDS, BUILD_LEGENDS_EXCLUDE_PATTERNS, PAIN_SIGNAL_KEYWORDS]).encode("utf-8")
+).hexdigest()[:8]
+
+# Per-document outputs stored in preprocessed_documents, in frame column order.
+# The table keeps category names; frames carry them as category_mask.
+_CACHED_COLUMNS = ["document", "word_count", "pain_score", "bl_include", "bl_exclude", "matched_categories"]
+_BL_COLUMNS = ["bl_include", "bl_exclude", "category_mask"]
+
+# Corpus frame dtypes: 32-bit ids and counts (raw_posts.id is a 32-bit serial)
+_COMPACT_DTYPES = {
+    "post_id": "int32",
+    "upvotes": "int32",
+    "word_count": "int32",
+    "pain_score": "float32",
+    "category_mask": _CATEGORY_MASK_DTYPE,
+}
+
+
+def _document_input_hash(post: _PostRow) -> str:
+    """Hash of everything a post's document is built from."""
+    payload = json.dumps([post.title, post.body, (post.top_comments or [])[:3]], default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _iter_post_chunks(session: Session, chunk_size: int, cached: bool = False):
+    """Yield the columns documents need out of raw_posts, ``chunk_size`` rows at a time.
+
+    Only the six columns used downstream are selected, rows come back as plain
+    tuples rather than ORM objects, and ``yield_per`` streams them (a
+    server-side cursor on Postgres), so only one chunk is held at a time.
+    With ``cached``, each row comes as ``(post, cache)`` where ``cache`` is the
+    current-rules preprocessed_documents entry (input_hash first) or Nones.
+    """
+    columns = [RawPost.id, RawPost.title, RawPost.body, RawPost.top_comments, RawPost.subreddit, RawPost.upvotes]
+    if cached:
+        columns += [PreprocessedDocument.input_hash] + [getattr(PreprocessedDocument, c) for c in _CACHED_COLUMNS]
+    # Cross-posts/reposts share a content_hash; keep the first-stored copy only
+    first_of_hash = select(func.min(RawPost.id)).group_by(RawPost.content_hash)
+    stmt = select(*columns).where(or_(RawPost.content_hash.is_(None), RawPost.id.in_(first_of_hash)))
+    if cached:
+        stmt = stmt.outerjoin(
+            PreprocessedDocument,
+            (PreprocessedDocument.post_id == RawPost.id)
+            & (PreprocessedDocument.rules_version == PREPROCESS_RULES_VERSION),
+        )
+    stmt = stmt.order_by(RawPost.id).execution_options(yield_per=chunk_size)
+    for rows in session.execute(stmt).partitions():
+        if cached:
+            yield [(_PostRow(*row[:6]), row[6:]) for row in rows]
+        else:
+            yield [_PostRow(*row) for row in rows]
+
+
+def load_documents(session: Session, chunk_size: int = LOAD_CHUNK_SIZE) -> pd.DataFrame:
+    """Stream raw_posts and build the documents DataFrame chunk by chunk."""
+    chunks = [build_documents(rows) for rows in _iter_post_chunks(session, chunk_size)]
+    if not chunks:
+        return build_documents([])
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _preprocess_chunk(rows: list[_PostRow], build_legends: bool = False) -> pd.DataFrame:
+    """Build, count and score one chunk of posts. Runs in the worker processes."""
+    df = build_documents(rows)
+    df["word_count"] = df["document"].apply(lambda x: len(x.split()))
+    matches = [match_keywords(text) for text in df["document"]]
+    df["pain_score"] = pd.Series([_pain_score(m.pain_hits) for m in matches], index=df.index, dtype=float)
+    if build_legends:
+        df = annotate_build_legends(df, matches)
+    return _compact_chunk(df)
+
+
+def _compact_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """Narrow a chunk to the corpus dtypes; documents become Arrow strings if they aren't yet."""
+    dtypes = {column: dtype for column, dtype in _COMPACT_DTYPES.items() if column in df.columns}
+    if not isinstance(df["document"].dtype, pd.StringDtype):
+        dtypes["document"] = "string[pyarrow]"
+    return df.astype(dtypes)
+
+
+def _split_cache_hits(chunk: list[tuple]) -> tuple[list[dict], list[_PostRow], list[str]]:
+    """Separate posts with a valid cache entry from those that need preprocessing.
+
+    Returns (hit_records, miss_posts, miss_input_hashes).
+    """
+    hits, misses, miss_hashes = [], [], []
+    for post, cache in chunk:
+        input_hash = _document_input_hash(post)
+        if cache[0] == input_hash:
+            hit = dict(zip(_CACHED_COLUMNS, cache[1:]))
+            hit["category_mask"] = category_mask(hit.pop("matched_categories") or [])
+            hits.append({"post_id": post.id, "subreddit": post.subreddit, "upvotes": post.upvotes or 0, **hit})
+        else:
+            misses.append(post)
+            miss_hashes.append(input_hash)
+    return hits, misses, miss_hashes
+
+
+def _cache_records(df: pd.DataFrame, input_hashes: list[str]) -> list[dict]:
+    columns = {c: df[c].tolist() for c in ["post_id", *_CACHED_COLUMNS[:-1], "category_mask"]}
+    columns["matched_categories"] = [mask_categories(mask) for mask in columns.pop("category_mask")]
+    return [
+        {"input_hash": input_hash, "rules_version": PREPROCESS_RULES_VERSION,
+         **{c: values[i] for c, values in columns.items()}}
+        for i, input_hash in enumerate(input_hashes)
+    ]
+
+
+def _duplicated_documents(documents: pd.Series, block_size: int = LOAD_CHUNK_SIZE) -> np.ndarray:
+    """``documents.duplicated()`` as a numpy array, hashing the column a block at a time.
+
+    Arrow string columns are combined and dictionary-encoded by ``duplicated``,
+    which briefly takes about twice the column's size. Only documents whose
+    hash repeats are compared as strings.
+    """
+    hashes = np.concatenate([np.empty(0, dtype=np.uint64)] + [
+        pd.util.hash_array(documents.iloc[start:start + block_size].to_numpy(dtype=object))
+        for start in range(0, len(documents), block_size)
+    ])
+    duplicated = np.zeros(len(documents), dtype=bool)
+    candidates = np.flatnonzero(pd.Series(hashes).duplicated(keep=False).to_numpy())
+    if len(candidates):
+        duplicated[candidates] = documents.iloc[candidates].duplicated().to_numpy()
+    return duplicated
+
+
+def _ordered_map(pool, fn, iterable, depth: int):
+    """Like ``pool.map``, but submits at most ``depth`` items ahead of the consumer."""
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= depth:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
 
 
 def load_and_preprocess(
-    session: Session, filter_mode: str | None = None
+    session: Session,
+    filter_mode: str | None = None,
+    chunk_size: int = LOAD_CHUNK_SIZE,
+    workers: int = 1,
+    cache: bool = True,
+    near_dup_threshold: float | None = None,
+    near_dup_num_perm: int = PipelineConfig.NEAR_DUP_NUM_PERM,
+    near_dup_shingle_size: int = PipelineConfig.NEAR_DUP_SHINGLE_SIZE,
 ) -> tuple[pd.DataFrame, dict]:
-    """Load posts from DB, build documents, filter, dedup. Returns (df, metrics)."""
+    """Load posts from DB, build documents, filter, dedup. Returns (df, metrics).
+
+    Documents are built, counted and scored per chunk. With ``workers`` > 1
+    the chunks fan out to a process pool and are merged back in id order, so
+    the result and metrics are the same as in-process.
+
+    With ``cache``, posts whose inputs and rules version match their
+    preprocessed_documents entry are taken from it; only new or changed posts
+    are processed, and their results are written back.
+
+    With ``near_dup_threshold``, documents whose estimated Jaccard similarity
+    (over word shingles) to an earlier one reaches it are dropped as well;
+    see ``pipeline.near_dedup``.
+    """
     start_time = time.time()
 
-    posts = session.query(RawPost).all()
-    logger.info(f"Loaded {len(posts)} posts from database")
+    total_posts = session.query(func.count(RawPost.id)).scalar()
+    # Cache entries always carry the Build Legends columns so one entry serves both modes
+    process_chunk = partial(_preprocess_chunk, build_legends=cache or filter_mode == "build_legends")
+    if workers > 1:
+        # Several chunks per worker so the pool stays busy to the end
+        chunk_size = max(100, min(chunk_size, total_posts // (workers * 4) + 1))
+
+    cache_hits = deque()  # (hit_records, miss_input_hashes) per chunk, in stream order
+
+    def work_items():
+        for chunk in _iter_post_chunks(session, chunk_size, cached=cache):
+            if not cache:
+                yield chunk
+                continue
+            hits, misses, miss_hashes = _split_cache_hits(chunk)
+            cache_hits.append((hits, miss_hashes))
+            yield misses
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(_ordered_map(pool, process_chunk, work_items(), depth=workers * 2))
+    else:
+        frames = [process_chunk(items) for items in work_items()]
+
+    hit_count = miss_count = 0
+    if cache:
+        records = []
+        for i, (frame, (hits, miss_hashes)) in enumerate(zip(frames, cache_hits)):
+            records.extend(_cache_records(frame, miss_hashes))
+            hit_count += len(hits)
+            miss_count += len(miss_hashes)
+            if hits:
+                hit_frame = _compact_chunk(pd.DataFrame(hits, columns=frame.columns))
+                frames[i] = pd.concat([hit_frame, frame]).sort_values("post_id") if len(frame) else hit_frame
+        cache_hits.clear()
+        upsert_preprocessed_documents(session, records)
+        del records
+        session.commit()
+        logger.info(f"Preprocessing cache: {hit_count} reused, {miss_count} (re)computed")
+
+    frames = [frame for frame in frames if len(frame)]
+    df = pd.concat(frames, ignore_index=True) if frames else process_chunk([])
+    del frames
+    # Categories are only unified after concat; per-chunk categoricals would concat to strings
+    df["subreddit"] = df["subreddit"].astype("category")
+    if cache and filter_mode != "build_legends":
+        df = df.drop(columns=_BL_COLUMNS)
 
-    df = build_documents(posts)
     total_before = len(df)
+    removed_same_content = total_posts - total_before
+    logger.info(
+        f"Loaded {total_before} posts from database ({removed_same_content} same-content copies skipped, "
+        f"{workers} worker{'s' if workers != 1 else ''})"
+    )
 
-    # Word count per document
-    df["word_count"] = df["document"].apply(lambda x: len(x.split()))
+    # The filters below only build up ``keep``; the frame is selected once at the end,
+    # since every selection copies the surviving documents
 
     # Filter short documents (< 10 words)
-    short_mask = df["word_count"] < 10
+    short_mask = (df["word_count"] < 10).to_numpy()
     removed_short = short_mask.sum()
-    df = df[~short_mask].copy()
 
-    # Deduplicate by document text
-    before_dedup = len(df)
-    df = df.drop_duplicates(subset=["document"]).copy()
-    removed_dupes = before_dedup - len(df)
+    # Deduplicate by document text (copies share a word count, so only long ones count here)
+    dupe_mask = _duplicated_documents(df["document"]) & ~short_mask
+    removed_dupes = dupe_mask.sum()
+    keep = ~short_mask & ~dupe_mask
+
+    # Collapse near-duplicates (lightly edited reposts, pasted advice) onto their first copy
+    removed_near_dupes = 0
+    if near_dup_threshold:
+        kept = np.flatnonzero(keep)
+        representatives = find_near_duplicates(
+            df["document"].to_numpy()[kept].tolist(), near_dup_threshold, near_dup_num_perm, near_dup_shingle_size
+        )
+        cluster_sizes = np.bincount(representatives, minlength=len(kept))
+        keep[kept] = representatives == np.arange(len(kept))
+        removed_near_dupes = int(len(kept) - keep.sum())
 
-    total_after = len(df)
-    total_words = df["word_count"].sum()
+    word_counts = df["word_count"].to_numpy()[keep]
+    total_after = len(word_counts)
+    total_words = word_counts.sum()
 
     metrics = {
         "total_documents_before_cleaning": int(total_before),
         "documents_removed_too_short": int(removed_short),
         "documents_removed_duplicates": int(removed_dupes),
+        "documents_removed_near_duplicates": removed_near_dupes,
+        "documents_removed_same_content_hash": int(removed_same_content),
         "total_documents_after_cleaning": int(total_after),
         "total_words_processed": int(total_words),
         "avg_words_per_document": int(total_words / total_after) if total_after > 0 else 0,
-        "min_words_in_document": int(df["word_count"].min()) if total_after > 0 else 0,
-        "max_words_in_document": int(df["word_count"].max()) if total_after > 0 else 0,
+        "min_words_in_document": int(word_counts.min()) if total_after > 0 else 0,
+        "max_words_in_document": int(word_counts.max()) if total_after > 0 else 0,
         "preprocessing_duration_seconds": round(time.time() - start_time, 1),
     }
+    if near_dup_threshold:
+        metrics["near_duplicate_threshold"] = near_dup_threshold
+        metrics["near_duplicate_clusters"] = int((cluster_sizes > 1).sum())
+        metrics["largest_near_duplicate_cluster"] = int(cluster_sizes.max()) if len(cluster_sizes) else 0
+    if cache:
+        metrics["preprocess_cache_hits"] = hit_count
+        metrics["preprocess_cache_misses"] = miss_count
 
     logger.info(
         f"Preprocessing: {total_before} -> {total_after} documents "
-        f"(removed {removed_short} short, {removed_dupes} dupes)"
+        f"(removed {removed_short} short, {removed_dupes} dupes, {removed_near_dupes} near-dupes)"
     )
 
     # Apply Build Legends filter if requested
     if filter_mode == "build_legends":
-        df, filter_metrics = filter_for_build_legends(df)
+        kept = np.flatnonzero(keep)
+        passes, filter_metrics = _build_legends_pass(*(df[column].to_numpy()[kept] for column in _BL_COLUMNS))
+        keep[kept] = passes
         metrics["build_legends_filter"] = filter_metrics
         logger.info(
             f"Build Legends filter: {filter_metrics['total_before_filtering']} -> "
@@ -332,8 +725,12 @@ def load_and_preprocess(
             f"({filter_metrics['filter_pass_rate']}% pass rate)"
         )
 
-    # Compute pain signal score for each document
-    df["pain_score"] = df["document"].apply(compute_pain_score)
+    if not keep.all():
+        df = df[keep]
+    if filter_mode == "build_legends":
+        df = df.drop(columns=["bl_include", "bl_exclude"])
+
+    # Pain signal score was computed per document with the chunk
     pain_posts = (df["pain_score"] > 0).sum()
     metrics["pain_signal_posts"] = int(pain_posts)
     logger.info(f"Pain signal: {pain_posts}/{len(df)} posts have pain keywords")
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Async token-bucket limiter shared by every request to one upstream.
+
+    ``rate`` is the ceiling in requests per second. Responses can lower the
+    effective rate via Reddit's ``X-Ratelimit-*`` headers, or stop all callers
+    for a while via ``pause`` (used for ``Retry-After``).
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0, clock=time.monotonic):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = self._clock()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Block all acquirers for ``seconds`` and drop any saved-up burst."""
+        now = self._clock()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+        self._updated = now
+
+    def update_from_headers(self, headers):
+        """Adapt to ``X-Ratelimit-Remaining`` / ``X-Ratelimit-Reset`` if present.
+
+        Spreads the remaining budget over the rest of the window (never above
+        ``max_rate``) and pauses until the reset when the budget is spent.
+        """
+        remaining = headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-ratelimit-reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining = float(remaining)
+            reset = float(reset)
+        except ValueError:
+            return
+
+        if remaining < 1:
+            logger.info(f"Rate limit budget exhausted, pausing {reset:.0f}s")
+            self._refill(self._clock())
+            self.pause(reset)
+        elif reset > 0:
+            self._refill(self._clock())
+            self.rate = min(self.max_rate, remaining / reset)
+
+
+def retry_after_seconds(headers) -> float | None:
+    """Parse a ``Retry-After`` header given as seconds or an HTTP date."""
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
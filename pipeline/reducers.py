@@ -0,0 +1,85 @@
+"""Dimensionality reduction of document embeddings before clustering.
+
+``make_reducer`` builds the reducer a stage is configured with (see
+``TOPIC_REDUCER`` and ``LABEL_REDUCER``) as a scikit-learn style estimator,
+which BERTopic accepts as its ``umap_model``:
+
+- ``umap`` — UMAP on every document (cosine), the original reducer
+- ``umap_sample`` — UMAP fitted on a random sample of documents; every
+  document is then placed with ``transform``
+- ``pca`` — PCA
+- ``svd`` — truncated SVD (no centering)
+- ``random_projection`` — Gaussian random projection
+
+The linear reducers cost one or two passes over the embedding matrix and
+grow linearly with the corpus, where UMAP's neighbour graph grows faster.
+They keep more components than UMAP does, since a linear map needs more
+dimensions to keep the clusters apart.
+"""
+import numpy as np
+from sklearn.decomposition import PCA, TruncatedSVD
+from sklearn.random_projection import GaussianRandomProjection
+from umap import UMAP
+
+REDUCERS = ("umap", "umap_sample", "pca", "svd", "random_projection")
+
+
+class SampledUMAP:
+    """UMAP fitted on at most ``sample_size`` random rows; all rows are placed with ``transform``."""
+
+    def __init__(self, sample_size: int, random_state: int = 42, **umap_params):
+        self.sample_size = sample_size
+        self.random_state = random_state
+        self.umap_model = UMAP(random_state=random_state, **umap_params)
+
+    def fit(self, X, y=None) -> "SampledUMAP":
+        if len(X) > self.sample_size:
+            rng = np.random.default_rng(self.random_state)
+            X = X[np.sort(rng.choice(len(X), self.sample_size, replace=False))]
+        self.umap_model.fit(X)
+        return self
+
+    def transform(self, X) -> np.ndarray:
+        return self.umap_model.transform(X)
+
+    def fit_transform(self, X, y=None) -> np.ndarray:
+        if len(X) <= self.sample_size:
+            return self.umap_model.fit_transform(X)
+        return self.fit(X).transform(X)
+
+
+def make_reducer(
+    method: str,
+    n_docs: int,
+    n_neighbors: int = 15,
+    n_components: int = 5,
+    linear_components: int = 10,
+    sample_size: int = 20000,
+    random_state: int = 42,
+) -> tuple[object, dict]:
+    """Reducer for ``n_docs`` documents. Returns (reducer, params for the run metrics).
+
+    ``n_neighbors`` and ``n_components`` apply to the UMAP methods,
+    ``linear_components`` to the others; components are capped below ``n_docs``.
+    """
+    if method in ("umap", "umap_sample"):
+        params = {
+            "n_neighbors": n_neighbors,
+            "n_components": min(n_components, n_docs - 1),
+            "min_dist": 0.0,
+            "metric": "cosine",
+        }
+        if method == "umap":
+            return UMAP(random_state=random_state, **params), {"method": method, **params}
+        return SampledUMAP(sample_size, random_state, **params), {"method": method, "sample_size": sample_size, **params}
+
+    components = min(linear_components, n_docs - 1)
+    if method == "pca":
+        reducer = PCA(n_components=components, random_state=random_state)
+    elif method == "svd":
+        reducer = TruncatedSVD(n_components=components, random_state=random_state)
+    elif method == "random_projection":
+        reducer = GaussianRandomProjection(n_components=components, random_state=random_state)
+    else:
+        raise ValueError(f"Unknown reducer {method!r} (expected one of {', '.join(REDUCERS)})")
+    return reducer, {"method": method, "n_components": components}
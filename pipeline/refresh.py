@@ -0,0 +1,203 @@
+"""Refresh upvotes and top comments of posts that are already stored.
+
+Usage:
+    python -m pipeline.refresh                          # Re-fetch scores via old.reddit.com /by_id/
+    python -m pipeline.refresh --max-age-days 30        # Only posts created in the last 30 days
+    python -m pipeline.refresh --source apify           # Re-run the actor; refreshes comments too
+    python -m pipeline.refresh --source apify --dataset-id <id> --subreddit Parenting
+
+Ingest never touches a post once its reddit_id is stored, so scores used for
+ranking go stale. This re-fetches them in batches and writes only the rows
+whose values changed, with one bulk UPDATE per batch.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from apify_client import ApifyClient
+
+from backend.models import RawPost
+from pipeline.config import PipelineConfig
+from pipeline.db import bulk_update_post_scores, ensure_tables, get_session
+from pipeline.rate_limit import TokenBucket
+from pipeline.scraper import (
+    fetch_listing,
+    group_apify_pages,
+    iter_dataset_pages,
+    post_from_listing_child,
+    prefetch,
+    run_apify_actor,
+)
+
+logger = logging.getLogger(__name__)
+
+BY_ID_BATCH_SIZE = 100  # names per /by_id/ request (Reddit's limit)
+
+
+def _stored_reddit_ids(session, subreddits: list[str], max_age_days: int | None) -> list[str]:
+    query = session.query(RawPost.reddit_id).filter(RawPost.subreddit.in_(subreddits))
+    if max_age_days is not None:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+        query = query.filter(RawPost.created_utc >= cutoff)
+    return [reddit_id for (reddit_id,) in query.order_by(RawPost.id)]
+
+
+async def refresh_scores_direct_async(config: PipelineConfig, max_age_days: int | None = None) -> dict:
+    """Re-fetch upvotes for stored posts through ``/by_id/``, 100 posts per request.
+
+    Requests share one token bucket (``DIRECT_REQUESTS_PER_SECOND``) and at most
+    ``DIRECT_MAX_CONCURRENT_SUBREDDITS`` are in flight. Each batch is written
+    as soon as it arrives.
+    """
+    metrics = {
+        "source": "direct",
+        "posts_checked": 0,
+        "posts_returned": 0,
+        "posts_updated": 0,
+        "batches_failed": 0,
+        "duration_seconds": 0,
+    }
+    start_time = time.time()
+    session = get_session(config.DATABASE_URL)
+    try:
+        reddit_ids = _stored_reddit_ids(session, config.TARGET_SUBREDDITS, max_age_days)
+        metrics["posts_checked"] = len(reddit_ids)
+        batches = [reddit_ids[i:i + BY_ID_BATCH_SIZE] for i in range(0, len(reddit_ids), BY_ID_BATCH_SIZE)]
+        logger.info(f"Refreshing scores for {len(reddit_ids)} posts in {len(batches)} requests")
+
+        limiter = TokenBucket(config.DIRECT_REQUESTS_PER_SECOND)
+        semaphore = asyncio.Semaphore(max(1, config.DIRECT_MAX_CONCURRENT_SUBREDDITS))
+
+        async def refresh_batch(client, batch):
+            async with semaphore:
+                names = ",".join(f"t3_{reddit_id}" for reddit_id in batch)
+                try:
+                    data = await fetch_listing(client, limiter, f"{config.REDDIT_BASE_URL}/by_id/{names}.json", {})
+                except Exception as e:
+                    logger.error(f"  Failed to refresh batch starting {batch[0]}: {e}")
+                    metrics["batches_failed"] += 1
+                    return
+                # No await between update and commit: batches never share a transaction
+                rows = [
+                    {"reddit_id": row["reddit_id"], "upvotes": row["upvotes"]}
+                    for row in (
+                        post_from_listing_child(child, "")
+                        for child in data.get("data", {}).get("children", [])
+                    )
+                    if row
+                ]
+                metrics["posts_returned"] += len(rows)
+                metrics["posts_updated"] += bulk_update_post_scores(session, rows)
+                session.commit()
+
+        async with httpx.AsyncClient(
+            headers={"User-Agent": "LegendsScraper/1.0"},
+            proxy=config.brightdata_proxy_url if config.has_brightdata else None,
+            timeout=30,
+            limits=httpx.Limits(max_keepalive_connections=config.DIRECT_MAX_CONCURRENT_SUBREDDITS),
+        ) as client:
+            await asyncio.gather(*(refresh_batch(client, batch) for batch in batches))
+    finally:
+        metrics["duration_seconds"] = round(time.time() - start_time, 1)
+        session.close()
+
+    return metrics
+
+
+def refresh_scores_direct(config: PipelineConfig, max_age_days: int | None = None) -> dict:
+    return asyncio.run(refresh_scores_direct_async(config, max_age_days))
+
+
+def refresh_scores_apify(
+    config: PipelineConfig,
+    client: ApifyClient | None = None,
+    dataset_ids: dict[str, str] | None = None,
+) -> dict:
+    """Refresh upvotes and top comments from Apify datasets.
+
+    Starts a fresh top-of-period actor run per target subreddit (bounded by
+    ``APIFY_MAX_CONCURRENT_RUNS``), or reads the given ``{subreddit: dataset_id}``
+    instead. Posts that are not stored yet are left for the regular scrape.
+    """
+    metrics = {
+        "source": "apify",
+        "posts_checked": 0,
+        "posts_updated": 0,
+        "subreddits_failed": [],
+        "duration_seconds": 0,
+    }
+    start_time = time.time()
+    session = get_session(config.DATABASE_URL)
+    try:
+        client = client or ApifyClient(config.APIFY_API_TOKEN)
+        dataset_ids = dataset_ids or {}
+        subreddits = list(dataset_ids) or list(config.TARGET_SUBREDDITS)
+        with ThreadPoolExecutor(max_workers=max(1, config.APIFY_MAX_CONCURRENT_RUNS)) as pool:
+            futures = {
+                pool.submit(run_apify_actor, client, config, subreddit, dataset_id=dataset_ids.get(subreddit)): subreddit
+                for subreddit in subreddits
+            }
+            for future in as_completed(futures):
+                subreddit = futures[future]
+                try:
+                    stats = {"comments": 0, "late_comments": 0, "dates": []}
+                    pages = prefetch(iter_dataset_pages(client, future.result(), config.APIFY_DATASET_PAGE_SIZE))
+                    sub_updated = 0
+                    for rows, _, _ in group_apify_pages(pages, subreddit, stats):
+                        metrics["posts_checked"] += len(rows)
+                        # A post whose comments weren't collected this time keeps its old ones
+                        updates = [
+                            {"reddit_id": r["reddit_id"], "upvotes": r["upvotes"], "top_comments": r["top_comments"] or None}
+                            for r in rows
+                        ]
+                        sub_updated += bulk_update_post_scores(session, updates)
+                        session.commit()
+                    metrics["posts_updated"] += sub_updated
+                    logger.info(f"  r/{subreddit}: {sub_updated} posts refreshed")
+                except Exception as e:
+                    logger.error(f"  Failed to refresh r/{subreddit}: {e}")
+                    metrics["subreddits_failed"].append({"subreddit": subreddit, "error": str(e)})
+                    session.rollback()
+    finally:
+        metrics["duration_seconds"] = round(time.time() - start_time, 1)
+        session.close()
+
+    return metrics
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    parser = argparse.ArgumentParser(description="Refresh upvotes/comments of stored posts")
+    parser.add_argument("--source", choices=["direct", "apify"], default="direct")
+    parser.add_argument("--max-age-days", type=int, help="Direct: only refresh posts created this recently")
+    parser.add_argument("--dataset-id", help="Apify: read this finished dataset instead of starting a run")
+    parser.add_argument("--subreddit", help="Only refresh this subreddit")
+    args = parser.parse_args()
+
+    config = PipelineConfig()
+    if args.subreddit:
+        config.TARGET_SUBREDDITS = [args.subreddit]
+    ensure_tables(config.DATABASE_URL)
+
+    if args.source == "apify":
+        if args.dataset_id and not args.subreddit:
+            parser.error("--dataset-id needs --subreddit")
+        dataset_ids = {args.subreddit: args.dataset_id} if args.dataset_id else None
+        metrics = refresh_scores_apify(config, dataset_ids=dataset_ids)
+    else:
+        metrics = refresh_scores_direct(config, args.max_age_days)
+    logger.info(
+        f"Refreshed {metrics['posts_updated']} of {metrics['posts_checked']} posts "
+        f"({metrics['duration_seconds']}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Replay the raw scrape archive into raw_posts without touching the network.
+
+Usage:
+    python -m pipeline.reingest                                 # Everything under RAW_ARCHIVE_DIR
+    python -m pipeline.reingest --source apify --subreddit Parenting
+    python -m pipeline.reingest --since 2026-01-01              # Archive days on/after this date
+    python -m pipeline.reingest --archive-dir /mnt/backup/raw_archive
+
+Records go through the same field mapping and bulk ON CONFLICT insert as a
+live scrape, so re-running after a mapping fix only adds posts that are not
+already stored. Direct-mode posts get the top comments archived by the same
+scrape. Delete the affected raw_posts rows first to rebuild them.
+"""
+import argparse
+import logging
+import time
+from pathlib import Path
+
+from pipeline.archive import iter_archive_files, read_archive_file
+from pipeline.config import PipelineConfig
+from pipeline.db import bulk_insert_raw_posts, ensure_tables, get_session
+from pipeline.scraper import group_apify_pages, post_from_listing_child, top_level_comments
+
+logger = logging.getLogger(__name__)
+
+
+def _chunks(records, size: int):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _archived_comments(listing_path: Path) -> dict[str, list[str]]:
+    """Top comments by reddit_id from the ``direct_comments`` files of a ``direct`` file's scrape."""
+    subreddit_dir = listing_path.parent.parent
+    comments_dir = subreddit_dir.parent.parent / "direct_comments" / subreddit_dir.name
+    comments = {}
+    # Same scrape id; any day, since a scrape can run past midnight
+    for path in sorted(comments_dir.glob(f"*/{listing_path.name}")):
+        for data in read_archive_file(path):
+            try:
+                reddit_id = data[0]["data"]["children"][0]["data"]["id"]
+            except (IndexError, KeyError, TypeError):
+                continue
+            comments[reddit_id] = top_level_comments(data)
+    return comments
+
+
+def _rows_from_file(source: str, subreddit: str, path: Path, page_size: int, stats: dict):
+    """Yield batches of raw_posts rows rebuilt from one archive file."""
+    records = read_archive_file(path)
+    if source == "apify":
+        for rows, _, _ in group_apify_pages(_chunks(records, page_size), subreddit, stats):
+            if rows:
+                yield rows
+    elif source == "direct":
+        comments = _archived_comments(path)
+        for page in records:
+            rows = [
+                row for row in (
+                    post_from_listing_child(child, subreddit)
+                    for child in page.get("data", {}).get("children", [])
+                )
+                if row
+            ]
+            for row in rows:
+                row["top_comments"] = comments.get(row["reddit_id"], [])
+                stats["comments"] += len(row["top_comments"])
+            if rows:
+                yield rows
+    else:
+        logger.warning(f"Skipping {path}: unknown archive source '{source}'")
+
+
+def reingest(
+    config: PipelineConfig,
+    archive_dir: str | None = None,
+    source: str | None = None,
+    subreddit: str | None = None,
+    since: str | None = None,
+) -> dict:
+    """Bulk-insert every archived post matching the filters. Returns metrics."""
+    archive_dir = archive_dir or config.RAW_ARCHIVE_DIR
+    metrics = {
+        "archive_dir": archive_dir,
+        "files_read": 0,
+        "posts_inserted": 0,
+        "posts_skipped_existing": 0,
+        "posts_skipped_duplicate_content": 0,
+        "duration_seconds": 0,
+        "posts_per_second": 0,
+    }
+
+    start_time = time.time()
+    session = get_session(config.DATABASE_URL)
+    try:
+        for file_source, file_subreddit, day, path in iter_archive_files(archive_dir, source, subreddit, since):
+            if file_source == "direct_comments":
+                continue  # merged into the rows of their direct listing file
+            stats = {"comments": 0, "late_comments": 0, "dates": []}
+            file_inserted = 0
+            for rows in _rows_from_file(file_source, file_subreddit, path, config.APIFY_DATASET_PAGE_SIZE, stats):
+                inserted, skipped, duplicates = bulk_insert_raw_posts(session, rows)
+                session.commit()
+                file_inserted += inserted
+                metrics["posts_inserted"] += inserted
+                metrics["posts_skipped_existing"] += skipped
+                metrics["posts_skipped_duplicate_content"] += duplicates
+            metrics["files_read"] += 1
+            logger.info(f"  {file_source}/r/{file_subreddit}/{day}: {file_inserted} new posts from {path.name}")
+    finally:
+        session.close()
+
+    elapsed = time.time() - start_time
+    metrics["duration_seconds"] = round(elapsed, 1)
+    total = metrics["posts_inserted"] + metrics["posts_skipped_existing"] + metrics["posts_skipped_duplicate_content"]
+    metrics["posts_per_second"] = round(total / elapsed) if elapsed > 0 else 0
+    return metrics
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    parser = argparse.ArgumentParser(description="Re-ingest the raw scrape archive into raw_posts")
+    parser.add_argument("--archive-dir", help="Archive root (default: RAW_ARCHIVE_DIR)")
+    parser.add_argument("--source", choices=["apify", "direct"], help="Only replay this scraper's payloads")
+    parser.add_argument("--subreddit", help="Only replay this subreddit")
+    parser.add_argument("--since", help="Only replay archive days on or after YYYY-MM-DD")
+    args = parser.parse_args()
+
+    config = PipelineConfig()
+    ensure_tables(config.DATABASE_URL)
+    metrics = reingest(config, args.archive_dir, args.source, args.subreddit, args.since)
+    logger.info(
+        f"Re-ingested {metrics['files_read']} files: {metrics['posts_inserted']} new, "
+        f"{metrics['posts_skipped_existing']} already stored, "
+        f"{metrics['posts_skipped_duplicate_content']} duplicate content "
+        f"({metrics['duration_seconds']}s, {metrics['posts_per_second']} posts/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
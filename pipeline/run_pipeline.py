@@ -5,27 +5,51 @@ Usage:
     python -m pipeline.run_pipeline --skip-scrape      # Reuse existing data
     python -m pipeline.run_pipeline --skip-summarize   # Skip GPT labels
     python -m pipeline.run_pipeline --direct-scrape    # Use BrightData direct instead of Apify
+    python -m pipeline.run_pipeline --incremental      # Only scrape posts newer than each subreddit's watermark
+    python -m pipeline.run_pipeline --resume-scrape    # Continue the last interrupted scrape where it stopped
     python -m pipeline.run_pipeline --build-legends    # Build Legends analysis lens
     python -m pipeline.run_pipeline --skip-labels      # Skip label analysis step
+    python -m pipeline.run_pipeline --from-snapshot    # Model the latest corpus snapshot (no scrape/preprocess)
+    python -m pipeline.run_pipeline --from-snapshot data/corpus_snapshots/all/run-000042.parquet
+    python -m pipeline.run_pipeline --assign-only      # Add new posts to the latest saved model's topics (no refit)
 """
 import argparse
 import logging
 import time
 from datetime import datetime, timezone
 
+import pandas as pd
+
 from pipeline.config import PipelineConfig
 from pipeline.db import (
+    add_topic_assignments,
+    assigned_post_ids,
     create_pipeline_run,
     ensure_tables,
+    get_pipeline_run,
     get_session,
+    latest_completed_run,
     store_post_topic,
     store_topic,
     update_pipeline_run,
 )
+from pipeline.model_store import (
+    fitted_post_ids,
+    latest_topic_model,
+    load_topic_model,
+    save_topic_model,
+)
 from pipeline.preprocessor import load_and_preprocess
 from pipeline.scraper import run_scraper, scrape_direct
+from pipeline.snapshot import latest_snapshot, read_snapshot, write_snapshot
 from pipeline.summarizer import summarize_all_topics, summarize_all_topics_build_legends
-from pipeline.topic_modeler import extract_topic_data, run_topic_modeling
+from pipeline.topic_modeler import (
+    assign_topics,
+    embed_corpus,
+    extract_topic_data,
+    load_embedding_model,
+    run_topic_modeling,
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -34,27 +58,117 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def assign_new_posts(session, config: PipelineConfig, filter_mode: str | None) -> dict:
+    """Put posts the latest completed run's topic model hasn't seen into its topics, without refitting.
+
+    New posts are those in the preprocessed corpus that the model wasn't
+    fitted on and that have no post_topics row for its run. They are
+    embedded (through the embedding cache) and assigned to the most similar
+    topic. Rows and topic counts are added to that run in place, and the
+    assignment is recorded in its methodology; no new pipeline run is
+    created. Posts that land in a topic the run didn't store are not
+    written, so later calls assign them again. Returns the assignment
+    metrics.
+
+    Raises ValueError if that run saved no model: an older run's model would
+    add rows to a run the dashboard doesn't show.
+    """
+    start_time = time.time()
+    if not config.TOPIC_MODEL_DIR:
+        raise ValueError("--assign-only needs TOPIC_MODEL_DIR")
+    run = latest_completed_run(session, build_legends=filter_mode == "build_legends")
+    if run is None:
+        raise ValueError("No completed pipeline run for this mode")
+    model_path = latest_topic_model(config.TOPIC_MODEL_DIR, filter_mode, {run.id})
+    if model_path is None:
+        raise ValueError(
+            f"Run #{run.id}, the latest completed run for this mode, has no topic model under {config.TOPIC_MODEL_DIR}"
+        )
+    run_id = run.id
+    logger.info(f"Assigning new posts to the topics of run #{run_id} ({model_path})")
+
+    df, _ = load_and_preprocess(
+        session,
+        filter_mode=filter_mode,
+        workers=config.PREPROCESS_WORKERS,
+        near_dup_threshold=config.NEAR_DUP_THRESHOLD,
+        near_dup_num_perm=config.NEAR_DUP_NUM_PERM,
+        near_dup_shingle_size=config.NEAR_DUP_SHINGLE_SIZE,
+    )
+    seen = fitted_post_ids(model_path).union(pd.Index(sorted(assigned_post_ids(session, run_id))))
+    new_df = df[~df["post_id"].isin(seen)]
+    metrics = {"topic_model": str(model_path), "corpus_documents": len(df), "new_posts": len(new_df)}
+    if new_df.empty:
+        logger.info(f"No new posts for run #{run_id}")
+        return metrics
+
+    embedding_model = load_embedding_model(config)
+    topic_model = load_topic_model(model_path, embedding_model, config)
+    # Not a generation of the embedding cache: the rest of the corpus wasn't read
+    embeddings = embed_corpus(new_df, config, embedding_model, new_generation=False)
+    assigned = assign_topics(topic_model, new_df, embeddings)
+    added = add_topic_assignments(
+        session, run_id, assigned[["post_id", "topic", "probability", "upvotes"]].to_dict("records")
+    )
+
+    metrics.update({
+        "posts_assigned": added,
+        "posts_in_unstored_topics": len(new_df) - added,
+        **embeddings.stats,
+        "assigned_at": datetime.now(timezone.utc).isoformat(),
+        "duration_seconds": round(time.time() - start_time, 1),
+    })
+    methodology = dict(get_pipeline_run(session, run_id).methodology or {})
+    methodology["incremental_assignments"] = [*methodology.get("incremental_assignments", []), metrics]
+    update_pipeline_run(session, run_id, methodology=methodology)  # commits the assignments with it
+    logger.info(
+        f"Assigned {added} of {len(new_df)} new posts to the topics of run #{run_id} "
+        f"({metrics['posts_in_unstored_topics']} outliers or in unstored topics)"
+    )
+    return metrics
+
+
 def main():
     parser = argparse.ArgumentParser(description="Legends NPoints Pipeline")
     parser.add_argument("--skip-scrape", action="store_true", help="Skip scraping, use existing data")
     parser.add_argument("--skip-summarize", action="store_true", help="Skip GPT summarization")
     parser.add_argument("--direct-scrape", action="store_true", help="Use BrightData direct scraping")
+    parser.add_argument("--incremental", action="store_true", help="Scrape only posts newer than each subreddit's watermark")
+    parser.add_argument("--resume-scrape", action="store_true", help="Resume the last interrupted scrape from its journal")
     parser.add_argument("--build-legends", action="store_true", help="Build Legends analysis lens (filter + targeted summarization)")
     parser.add_argument("--skip-labels", action="store_true", help="Skip label analysis step")
+    parser.add_argument(
+        "--from-snapshot", nargs="?", const="latest", metavar="PATH",
+        help="Skip scraping and preprocessing; load the corpus from a Parquet snapshot (default: latest for the mode)",
+    )
+    parser.add_argument(
+        "--assign-only", action="store_true",
+        help="Assign posts the latest saved topic model hasn't seen to its topics, without refitting",
+    )
     args = parser.parse_args()
 
     config = PipelineConfig()
     ensure_tables(config.DATABASE_URL)
     session = get_session(config.DATABASE_URL)
 
+    if args.assign_only:
+        try:
+            assign_new_posts(session, config, "build_legends" if args.build_legends else None)
+        finally:
+            session.close()
+        return
+
     pipeline_start = time.time()
     methodology = {}
 
     # Create pipeline run record
     run = create_pipeline_run(session, config_dict={
-        "skip_scrape": args.skip_scrape,
+        "skip_scrape": args.skip_scrape or bool(args.from_snapshot),
+        "from_snapshot": args.from_snapshot,
         "skip_summarize": args.skip_summarize,
         "direct_scrape": args.direct_scrape,
+        "incremental": args.incremental,
+        "resume_scrape": args.resume_scrape,
         "build_legends_mode": args.build_legends,
         "subreddits": list(config.TARGET_SUBREDDITS),
         "max_posts_per_subreddit": config.MAX_POSTS_PER_SUBREDDIT,
@@ -63,12 +177,16 @@ def main():
 
     try:
         # Step 1: Scrape
-        if not args.skip_scrape:
+        if not args.skip_scrape and not args.from_snapshot:
             logger.info("=== STEP 1: Scraping Reddit ===")
             if args.direct_scrape:
-                new_posts, scrape_metrics = scrape_direct(config)
+                new_posts, scrape_metrics = scrape_direct(
+                    config, incremental=args.incremental, pipeline_run_id=run.id, resume=args.resume_scrape
+                )
             else:
-                new_posts, scrape_metrics = run_scraper(config)
+                new_posts, scrape_metrics = run_scraper(
+                    config, incremental=args.incremental, pipeline_run_id=run.id, resume=args.resume_scrape
+                )
             methodology["ingestion"] = scrape_metrics
             logger.info(f"Scraped {new_posts} new posts")
         else:
@@ -76,9 +194,28 @@ def main():
             methodology["ingestion"] = {"skipped": True}
 
         # Step 2: Preprocess
-        logger.info("=== STEP 2: Preprocessing ===")
         filter_mode = "build_legends" if args.build_legends else None
-        df, preprocess_metrics = load_and_preprocess(session, filter_mode=filter_mode)
+        if args.from_snapshot:
+            logger.info("=== STEP 2: Preprocessing SKIPPED (corpus snapshot) ===")
+            snapshot_path = args.from_snapshot
+            if snapshot_path == "latest":
+                snapshot_path = latest_snapshot(config.CORPUS_SNAPSHOT_DIR, filter_mode)
+                if snapshot_path is None:
+                    raise ValueError(f"No corpus snapshot for this mode under {config.CORPUS_SNAPSHOT_DIR}")
+            df, preprocess_metrics = read_snapshot(snapshot_path, filter_mode)
+            preprocess_metrics = {**preprocess_metrics, "snapshot": str(snapshot_path)}
+        else:
+            logger.info("=== STEP 2: Preprocessing ===")
+            df, preprocess_metrics = load_and_preprocess(
+                session,
+                filter_mode=filter_mode,
+                workers=config.PREPROCESS_WORKERS,
+                near_dup_threshold=config.NEAR_DUP_THRESHOLD,
+                near_dup_num_perm=config.NEAR_DUP_NUM_PERM,
+                near_dup_shingle_size=config.NEAR_DUP_SHINGLE_SIZE,
+            )
+            if config.CORPUS_SNAPSHOT_DIR:
+                write_snapshot(df, preprocess_metrics, config.CORPUS_SNAPSHOT_DIR, filter_mode, run.id)
         methodology["preprocessing"] = preprocess_metrics
 
         if len(df) < 50:
@@ -87,7 +224,9 @@ def main():
         # Step 3: Topic modeling
         logger.info("=== STEP 3: Topic Modeling ===")
         mode = "build_legends" if args.build_legends else "default"
-        topic_model, results_df, model_metrics = run_topic_modeling(df, config, mode=mode)
+        # Embedded once; label analysis reuses the same matrix
+        embeddings = embed_corpus(df, config)
+        topic_model, results_df, model_metrics = run_topic_modeling(df, config, mode=mode, embeddings=embeddings)
         methodology["topic_modeling"] = model_metrics
 
         # Extract topic data
@@ -141,11 +280,17 @@ def main():
 
         session.commit()
 
+        if config.TOPIC_MODEL_DIR:
+            model_path = save_topic_model(
+                topic_model, results_df["post_id"], config.TOPIC_MODEL_DIR, filter_mode, run.id, config
+            )
+            model_metrics["topic_model"] = str(model_path)
+
         # Step 6: Label Analysis (Build Legends only)
         if args.build_legends and not args.skip_labels:
             logger.info("=== STEP 6: Label Analysis ===")
             from pipeline.label_analyzer import run_label_analysis
-            label_metrics = run_label_analysis(session, df, run.id, config)
+            label_metrics = run_label_analysis(session, df, run.id, config, embeddings=embeddings)
             methodology["label_analysis"] = label_metrics
         elif args.build_legends:
             logger.info("=== STEP 6: Label Analysis SKIPPED ===")
@@ -1,18 +1,323 @@
+import asyncio
 import logging
+import queue
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 
-import requests
+import httpx
 from apify_client import ApifyClient
+from sqlalchemy.orm import sessionmaker
 
+from pipeline.archive import RawArchive
 from pipeline.config import PipelineConfig
-from pipeline.db import get_session, upsert_raw_post
+from pipeline.db import (
+    bulk_insert_raw_posts,
+    existing_reddit_ids,
+    get_session,
+    get_watermarks,
+    open_scrape_journal,
+    save_checkpoint,
+    update_watermark,
+)
+from pipeline.rate_limit import TokenBucket, retry_after_seconds
 
 logger = logging.getLogger(__name__)
 
 
-def run_scraper(config: PipelineConfig) -> tuple[int, dict]:
-    """Scrape Reddit posts via Apify. Returns (new_post_count, metrics_dict)."""
+def _post_from_apify_item(item: dict, subreddit: str, comment_texts: list[str]) -> dict | None:
+    """Map an Apify post item to a raw_posts row. Returns None if it has no id."""
+    reddit_id = item.get("parsedId") or item.get("id", "")
+    if not reddit_id:
+        return None
+
+    created_utc = item.get("createdAt")
+    if created_utc and isinstance(created_utc, str):
+        try:
+            created_utc = datetime.fromisoformat(created_utc.replace("Z", "+00:00"))
+        except (ValueError, TypeError):
+            created_utc = None
+
+    return {
+        "reddit_id": reddit_id,
+        "subreddit": item.get("parsedCommunityName") or subreddit,
+        "title": item.get("title", ""),
+        "body": item.get("body", ""),
+        "top_comments": comment_texts,
+        "upvotes": item.get("upVotes", 0),
+        "url": item.get("url", ""),
+        "author": item.get("username", ""),
+        "created_utc": created_utc,
+    }
+
+
+def post_from_listing_child(child: dict, subreddit: str) -> dict | None:
+    """Map a child of an old.reddit.com listing to a raw_posts row."""
+    pd = child.get("data", {})
+    reddit_id = pd.get("id", "")
+    if not reddit_id:
+        return None
+
+    created_utc = None
+    if pd.get("created_utc"):
+        created_utc = datetime.fromtimestamp(pd["created_utc"], tz=timezone.utc)
+
+    return {
+        "reddit_id": reddit_id,
+        "subreddit": subreddit,
+        "title": pd.get("title", ""),
+        "body": pd.get("selftext", ""),
+        "top_comments": [],
+        "upvotes": pd.get("ups", 0),
+        "url": f"https://reddit.com{pd.get('permalink', '')}",
+        "author": pd.get("author", ""),
+        "created_utc": created_utc,
+    }
+
+
+def _newest_post(rows: list[dict]) -> tuple[datetime, str] | None:
+    """(created_utc, reddit_id) of the most recent row, for the scrape watermark."""
+    dated = [(r["created_utc"], r["reddit_id"]) for r in rows if isinstance(r["created_utc"], datetime)]
+    return max(dated) if dated else None
+
+
+def _checkpoint_progress(checkpoint) -> tuple[int, int, int, tuple[datetime, str] | None]:
+    """(inserted, skipped, duplicates, newest_post) already committed under a journal checkpoint."""
+    if checkpoint is None:
+        return 0, 0, 0, None
+    newest = None
+    if checkpoint.newest_created_utc:
+        created = checkpoint.newest_created_utc
+        if created.tzinfo is None:
+            created = created.replace(tzinfo=timezone.utc)
+        newest = (created, checkpoint.newest_reddit_id)
+    return (
+        checkpoint.posts_inserted or 0,
+        checkpoint.posts_skipped or 0,
+        checkpoint.posts_skipped_duplicate or 0,
+        newest,
+    )
+
+
+def _count_finished_checkpoint(metrics: dict, subreddit: str, checkpoint) -> int:
+    """Add a subreddit finished by an earlier attempt to ``metrics``. Returns its post count."""
+    inserted, skipped, duplicates, _ = _checkpoint_progress(checkpoint)
+    sub_count = inserted + skipped + duplicates
+    logger.info(f"  r/{subreddit}: already scraped ({sub_count} posts), skipping")
+    metrics["threads_per_subreddit"][subreddit] = sub_count
+    metrics["total_comments_collected"] += checkpoint.comments_collected
+    metrics["posts_inserted"] += inserted
+    metrics["posts_skipped_existing"] += skipped
+    metrics["posts_skipped_duplicate_content"] += duplicates
+    metrics["subreddits_successfully_scraped"] += 1
+    return sub_count
+
+
+def _apify_actor_input(config: PipelineConfig, subreddit: str, since: datetime | None = None) -> dict:
+    # maxItems counts posts+comments together, so multiply to account for comments
+    max_items = config.MAX_POSTS_PER_SUBREDDIT * 6  # ~5 comments per post + the post itself
+    if since:
+        # Incremental: newest first, and let the actor stop at the watermark
+        actor_input = {
+            "startUrls": [{"url": f"https://www.reddit.com/r/{subreddit}/new/"}],
+            "maxItems": max_items,
+            "maxPostCount": config.MAX_POSTS_PER_SUBREDDIT,
+            "maxComments": 5,
+            "sort": "new",
+            "postDateLimit": since.isoformat(),
+        }
+    else:
+        actor_input = {
+            "startUrls": [
+                {"url": f"https://www.reddit.com/r/{subreddit}/top/?t={config.TIME_FILTER}"}
+            ],
+            "maxItems": max_items,
+            "maxPostCount": config.MAX_POSTS_PER_SUBREDDIT,
+            "maxComments": 5,
+            "sort": "top",
+            "time": config.TIME_FILTER,
+        }
+
+    if config.has_brightdata:
+        actor_input["proxy"] = {
+            "useApifyProxy": False,
+            "proxyUrls": [config.brightdata_proxy_url],
+        }
+    return actor_input
+
+
+def run_apify_actor(
+    client: ApifyClient,
+    config: PipelineConfig,
+    subreddit: str,
+    since: datetime | None = None,
+    apify_run_id: str | None = None,
+    dataset_id: str | None = None,
+    on_start=None,
+) -> str:
+    """Run the actor for one subreddit, block until it finishes, return its dataset id.
+
+    A journaled ``dataset_id`` is returned as-is and a journaled ``apify_run_id``
+    is awaited instead of starting (and paying for) a new run.
+    """
+    if dataset_id:
+        return dataset_id
+    if apify_run_id:
+        logger.info(f"Resuming r/{subreddit}: waiting for actor run {apify_run_id}")
+    else:
+        logger.info(f"Scraping r/{subreddit}{' (incremental)' if since else ''}...")
+        run = client.actor(config.APIFY_ACTOR).start(run_input=_apify_actor_input(config, subreddit, since))
+        apify_run_id = run["id"]
+        if on_start:
+            on_start(subreddit, apify_run_id)
+    run = client.run(apify_run_id).wait_for_finish()
+    return run["defaultDatasetId"]
+
+
+def iter_dataset_pages(client: ApifyClient, dataset_id: str, page_size: int, offset: int = 0):
+    """Yield a finished dataset's items ``page_size`` at a time, from ``offset``."""
+    while True:
+        items = client.dataset(dataset_id).list_items(offset=offset, limit=page_size).items
+        if items:
+            yield items
+        if len(items) < page_size:
+            return
+        offset += len(items)
+
+
+def prefetch(iterator, depth: int = 2):
+    """Run ``iterator`` on a background thread, keeping up to ``depth`` items ready.
+
+    Lets the next dataset page download while the current one is written.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterator:
+                if not put(item):
+                    return
+            put(done)
+        except Exception as e:
+            put(e)
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def group_apify_pages(pages, subreddit: str, stats: dict, window_pages: int = 1, skip_ids=()):
+    """Pair Apify post items with their comments as pages stream in.
+
+    A post is released once it has 5 comments or ``window_pages`` further
+    pages have arrived (the actor writes comments right after their post), so
+    only a small window is ever held in memory.
+
+    Yields ``(rows, resume_page, carry_ids)`` after every page: the raw_posts
+    rows released by it, the index of the first page that still holds
+    unreleased data, and the ids released from that page onwards. Re-reading
+    from ``resume_page`` with ``skip_ids=carry_ids`` picks up exactly where
+    this stream stopped. Updates ``stats["comments"]``, ``stats["late_comments"]``
+    and ``stats["dates"]``.
+    """
+    pending: dict[str, tuple[int, dict]] = {}  # post id -> (page seen, item)
+    comments: dict[str, tuple[int, list[str]]] = {}  # post id -> (page first seen, bodies)
+    released: dict[str, int] = {}  # post id -> page seen
+    skip_ids = set(skip_ids)
+
+    def release(keys):
+        rows = []
+        for key in keys:
+            seen, item = pending.pop(key)
+            comment_texts = comments.pop(key, (0, []))[1][:5]
+            released[key] = seen
+            post_data = _post_from_apify_item(item, subreddit, comment_texts)
+            if not post_data:
+                continue
+            stats["comments"] += len(comment_texts)
+            if isinstance(post_data["created_utc"], datetime):
+                stats["dates"].append(post_data["created_utc"])
+            rows.append(post_data)
+        return rows
+
+    def progress(rows, resume_page):
+        carry = [key for key, seen in released.items() if seen >= resume_page]
+        return rows, resume_page, carry
+
+    page_no = -1
+    for page_no, items in enumerate(pages):
+        for item in items:
+            if item.get("dataType") == "comment" and item.get("postId"):
+                key = item["postId"]
+                if key in skip_ids:
+                    continue
+                if key in released:
+                    stats["late_comments"] += 1
+                elif item.get("body"):
+                    comments.setdefault(key, (page_no, []))[1].append(item["body"])
+            elif item.get("dataType") == "post" or "title" in item:
+                key = item.get("id") or item.get("parsedId")
+                if key and key not in skip_ids:
+                    pending[key] = (page_no, item)
+
+        ready = [
+            key for key, (seen, _) in pending.items()
+            if page_no - seen >= window_pages or len(comments.get(key, (0, []))[1]) >= 5
+        ]
+        # Comments whose post never showed up within the window
+        for key in [k for k, (seen, _) in comments.items() if k not in pending and page_no - seen > window_pages]:
+            del comments[key]
+        rows = release(ready)
+        unreleased = [seen for seen, _ in pending.values()] + [seen for seen, _ in comments.values()]
+        yield progress(rows, min(unreleased, default=page_no + 1))
+
+    yield progress(release(list(pending)), page_no + 1)
+
+
+def run_scraper(
+    config: PipelineConfig,
+    client: ApifyClient | None = None,
+    incremental: bool = False,
+    pipeline_run_id: int | None = None,
+    resume: bool = False,
+) -> tuple[int, dict]:
+    """Scrape Reddit posts via Apify. Returns (new_post_count, metrics_dict).
+
+    Up to ``config.APIFY_MAX_CONCURRENT_RUNS`` actor runs are in flight at once;
+    each dataset is streamed in ``APIFY_DATASET_PAGE_SIZE`` pages and ingested
+    on the calling thread as soon as its run finishes.
+    With ``incremental``, subreddits that have a watermark are scraped from the
+    ``new`` listing back to that watermark only.
+
+    Progress is journaled per subreddit (actor run, dataset offset, counts) in
+    the same transaction as the rows. With ``resume``, the latest unfinished
+    journal is continued: finished subreddits are skipped, running actor runs
+    are awaited rather than restarted, and datasets are read from the
+    committed offset.
+
+    Every dataset item is also appended to the raw archive under
+    ``config.RAW_ARCHIVE_DIR`` (see ``pipeline.reingest``).
+    """
     metrics = {
         "subreddits_targeted": list(config.TARGET_SUBREDDITS),
         "subreddits_successfully_scraped": 0,
@@ -20,10 +325,19 @@ def run_scraper(config: PipelineConfig) -> tuple[int, dict]:
         "total_threads_scraped": 0,
         "threads_per_subreddit": {},
         "total_comments_collected": 0,
+        "posts_inserted": 0,
+        "posts_skipped_existing": 0,
+        "posts_skipped_duplicate_content": 0,
         "date_range_of_posts": {"earliest": None, "latest": None},
         "scrape_duration_seconds": 0,
-        "proxy_method": "apify_builtin",
+        "proxy_method": "brightdata_residential" if config.has_brightdata else "apify_builtin",
         "apify_actor_version": config.APIFY_ACTOR,
+        "apify_max_concurrent_runs": config.APIFY_MAX_CONCURRENT_RUNS,
+        "late_comments_dropped": 0,
+        "scrape_mode": "incremental" if incremental else "full",
+        "subreddits_incremental": [],
+        "scrape_id": None,
+        "subreddits_resumed": [],
     }
 
     start_time = time.time()
@@ -32,93 +346,113 @@ def run_scraper(config: PipelineConfig) -> tuple[int, dict]:
     all_dates = []
 
     try:
-        client = ApifyClient(config.APIFY_API_TOKEN)
-
+        client = client or ApifyClient(config.APIFY_API_TOKEN)
+        watermarks = get_watermarks(session) if incremental else {}
+        metrics["subreddits_incremental"] = [s for s in config.TARGET_SUBREDDITS if s in watermarks]
+        scrape_id, journal = open_scrape_journal(
+            session, "apify", config.TARGET_SUBREDDITS, pipeline_run_id, resume=resume
+        )
+        metrics["scrape_id"] = scrape_id
+        metrics["subreddits_resumed"] = [
+            sub for sub, cp in journal.items() if cp.status != "pending"
+        ]
+        archive = RawArchive(config.RAW_ARCHIVE_DIR, scrape_id) if config.RAW_ARCHIVE_DIR else None
+        todo = []
         for subreddit in config.TARGET_SUBREDDITS:
-            try:
-                logger.info(f"Scraping r/{subreddit}...")
-                sub_count = 0
-                sub_comments = 0
-
-                # maxItems counts posts+comments together, so multiply to account for comments
-                max_items = config.MAX_POSTS_PER_SUBREDDIT * 6  # ~5 comments per post + the post itself
-                actor_input = {
-                    "startUrls": [
-                        {"url": f"https://www.reddit.com/r/{subreddit}/top/?t={config.TIME_FILTER}"}
-                    ],
-                    "maxItems": max_items,
-                    "maxPostCount": config.MAX_POSTS_PER_SUBREDDIT,
-                    "maxComments": 5,
-                    "sort": "top",
-                    "time": config.TIME_FILTER,
-                }
-
-                if config.has_brightdata:
-                    actor_input["proxy"] = {
-                        "useApifyProxy": False,
-                        "proxyUrls": [config.brightdata_proxy_url],
-                    }
-                    metrics["proxy_method"] = "brightdata_residential"
-
-                run = client.actor(config.APIFY_ACTOR).call(run_input=actor_input)
-                dataset_items = client.dataset(run["defaultDatasetId"]).list_items().items
-
-                # Separate posts and comments (regular actor mixes them)
-                posts = [i for i in dataset_items if i.get("dataType") == "post" or "title" in i]
-                comments_by_post: dict[str, list[str]] = {}
-                for item in dataset_items:
-                    if item.get("dataType") == "comment" and item.get("postId"):
-                        post_id_key = item["postId"]
-                        comments_by_post.setdefault(post_id_key, [])
-                        if item.get("body"):
-                            comments_by_post[post_id_key].append(item["body"])
-
-                for item in posts:
-                    reddit_id = item.get("parsedId") or item.get("id", "")
-                    if not reddit_id:
-                        continue
-
-                    # Get comments for this post
-                    full_id = item.get("id", "")
-                    comment_texts = comments_by_post.get(full_id, [])[:5]
-                    sub_comments += len(comment_texts)
-
-                    created_utc = item.get("createdAt")
-                    if created_utc and isinstance(created_utc, str):
-                        try:
-                            created_utc = datetime.fromisoformat(created_utc.replace("Z", "+00:00"))
-                            all_dates.append(created_utc)
-                        except (ValueError, TypeError):
-                            created_utc = None
-
-                    post_data = {
-                        "reddit_id": reddit_id,
-                        "subreddit": item.get("parsedCommunityName") or subreddit,
-                        "title": item.get("title", ""),
-                        "body": item.get("body", ""),
-                        "top_comments": comment_texts,
-                        "upvotes": item.get("upVotes", 0),
-                        "url": item.get("url", ""),
-                        "author": item.get("username", ""),
-                        "created_utc": created_utc,
-                    }
-
-                    post_id = upsert_raw_post(session, post_data)
-                    if post_id:
-                        sub_count += 1
-
-                session.commit()
-                metrics["threads_per_subreddit"][subreddit] = sub_count
-                metrics["total_comments_collected"] += sub_comments
-                metrics["subreddits_successfully_scraped"] += 1
-                total_new += sub_count
-                logger.info(f"  r/{subreddit}: {sub_count} posts scraped")
-
-            except Exception as e:
-                logger.error(f"  Failed to scrape r/{subreddit}: {e}")
-                metrics["subreddits_failed"].append({"subreddit": subreddit, "error": str(e)})
-                session.rollback()
+            if journal[subreddit].status == "done":
+                total_new += _count_finished_checkpoint(metrics, subreddit, journal[subreddit])
+            else:
+                todo.append(subreddit)
+
+        # Worker threads record actor starts through their own sessions
+        SessionLocal = sessionmaker(bind=session.get_bind())
+
+        def record_actor_start(subreddit: str, apify_run_id: str):
+            with SessionLocal() as worker_session:
+                save_checkpoint(worker_session, scrape_id, subreddit, status="running", apify_run_id=apify_run_id)
+                worker_session.commit()
+
+        with ThreadPoolExecutor(max_workers=max(1, config.APIFY_MAX_CONCURRENT_RUNS)) as pool:
+            futures = {
+                pool.submit(
+                    run_apify_actor, client, config, subreddit,
+                    watermarks[subreddit][0] if subreddit in watermarks else None,
+                    journal[subreddit].apify_run_id, journal[subreddit].dataset_id, record_actor_start,
+                ): subreddit
+                for subreddit in todo
+            }
 
+            for future in as_completed(futures):
+                subreddit = futures[future]
+                cp = journal[subreddit]
+                try:
+                    dataset_id = future.result()
+                    offset = int(cp.cursor or 0)
+                    stats = {"comments": cp.comments_collected, "late_comments": 0, "dates": all_dates}
+                    inserted, skipped, duplicates, newest = _checkpoint_progress(cp)
+                    if offset:
+                        logger.info(f"  r/{subreddit}: resuming dataset {dataset_id} at item {offset}")
+                    save_checkpoint(session, scrape_id, subreddit, status="running", dataset_id=dataset_id)
+                    session.commit()
+
+                    page_size = config.APIFY_DATASET_PAGE_SIZE
+                    pages = prefetch(iter_dataset_pages(client, dataset_id, page_size, offset))
+                    if archive:
+                        pages = archive.tee("apify", subreddit, pages)
+                    for rows, resume_page, carry_ids in group_apify_pages(
+                        pages, subreddit, stats, skip_ids=cp.carry_ids or ()
+                    ):
+                        if rows:
+                            batch_inserted, batch_skipped, batch_duplicates = bulk_insert_raw_posts(session, rows)
+                            inserted += batch_inserted
+                            skipped += batch_skipped
+                            duplicates += batch_duplicates
+                            batch_newest = _newest_post(rows)
+                            if batch_newest and (newest is None or batch_newest > newest):
+                                newest = batch_newest
+                        save_checkpoint(
+                            session, scrape_id, subreddit,
+                            cursor=str(offset + resume_page * page_size),
+                            carry_ids=carry_ids,
+                            posts_inserted=inserted,
+                            posts_skipped=skipped,
+                            posts_skipped_duplicate=duplicates,
+                            comments_collected=stats["comments"],
+                            newest_created_utc=newest[0] if newest else None,
+                            newest_reddit_id=newest[1] if newest else None,
+                        )
+                        session.commit()
+
+                    sub_count = inserted + skipped + duplicates
+                    sub_comments = stats["comments"]
+                    metrics["late_comments_dropped"] += stats["late_comments"]
+                    if newest:
+                        update_watermark(session, subreddit, *newest, pipeline_run_id=pipeline_run_id)
+                    save_checkpoint(session, scrape_id, subreddit, status="done", error_message=None)
+
+                    session.commit()
+                    metrics["threads_per_subreddit"][subreddit] = sub_count
+                    metrics["total_comments_collected"] += sub_comments
+                    metrics["posts_inserted"] += inserted
+                    metrics["posts_skipped_existing"] += skipped
+                    metrics["posts_skipped_duplicate_content"] += duplicates
+                    metrics["subreddits_successfully_scraped"] += 1
+                    total_new += sub_count
+                    logger.info(f"  r/{subreddit}: {sub_count} posts scraped")
+
+                except Exception as e:
+                    logger.error(f"  Failed to scrape r/{subreddit}: {e}")
+                    metrics["subreddits_failed"].append({"subreddit": subreddit, "error": str(e)})
+                    session.rollback()
+                    save_checkpoint(session, scrape_id, subreddit, status="failed", error_message=str(e))
+                    session.commit()
+
+        # Runs finish in any order; report per-subreddit results in target order
+        order = {sub: i for i, sub in enumerate(config.TARGET_SUBREDDITS)}
+        metrics["threads_per_subreddit"] = dict(
+            sorted(metrics["threads_per_subreddit"].items(), key=lambda kv: order[kv[0]])
+        )
+        metrics["subreddits_failed"].sort(key=lambda f: order[f["subreddit"]])
         metrics["total_threads_scraped"] = total_new
 
         if all_dates:
@@ -134,8 +468,188 @@ def run_scraper(config: PipelineConfig) -> tuple[int, dict]:
     return total_new, metrics
 
 
-def scrape_direct(config: PipelineConfig) -> tuple[int, dict]:
-    """Fallback: scrape Reddit's old JSON API via BrightData proxies."""
+async def fetch_listing(
+    client: httpx.AsyncClient, limiter: TokenBucket, url: str, params: dict, max_retries: int = 3
+) -> dict:
+    """GET one listing page under the shared limiter, retrying 429/503 after Retry-After."""
+    for attempt in range(max_retries + 1):
+        await limiter.acquire()
+        resp = await client.get(url, params=params)
+        limiter.update_from_headers(resp.headers)
+        if resp.status_code in (429, 503) and attempt < max_retries:
+            wait = retry_after_seconds(resp.headers)
+            if wait is None:
+                wait = 2 ** attempt
+            logger.warning(f"  {resp.status_code} from {url}, retrying in {wait:.0f}s")
+            limiter.pause(wait)
+            continue
+        resp.raise_for_status()
+        return resp.json()
+
+
+def top_level_comments(data) -> list[str]:
+    """Bodies of the top-level comments in a ``/comments/{id}.json`` response."""
+    if not isinstance(data, list) or len(data) < 2:
+        return []
+    children = data[1].get("data", {}).get("children", [])
+    return [
+        c["data"]["body"] for c in children
+        if c.get("kind") == "t1" and c.get("data", {}).get("body")
+    ][:5]
+
+
+async def _fetch_top_comments(
+    client: httpx.AsyncClient,
+    limiter: TokenBucket,
+    semaphore: asyncio.Semaphore,
+    config: PipelineConfig,
+    reddit_id: str,
+    subreddit: str,
+    archive: RawArchive | None = None,
+) -> list[str] | None:
+    """Top 5 comment bodies of one post, or None if the fetch failed.
+
+    The raw response is appended to ``archive`` as ``direct_comments``.
+    """
+    async with semaphore:
+        try:
+            data = await fetch_listing(
+                client, limiter, f"{config.REDDIT_BASE_URL}/comments/{reddit_id}.json", {"limit": 5, "depth": 1}
+            )
+        except (httpx.HTTPError, ValueError) as e:  # ValueError: a body that isn't JSON
+            logger.warning(f"  Could not fetch comments for {reddit_id}: {e}")
+            return None
+    if archive:
+        archive.write("direct_comments", subreddit, [data])
+    return top_level_comments(data)
+
+
+async def _scrape_subreddit_direct(
+    client: httpx.AsyncClient,
+    limiter: TokenBucket,
+    session,
+    config: PipelineConfig,
+    subreddit: str,
+    all_dates: list,
+    since: datetime | None = None,
+    scrape_id: str | None = None,
+    checkpoint=None,
+    archive: RawArchive | None = None,
+    comment_semaphore: asyncio.Semaphore | None = None,
+    stats: dict | None = None,
+) -> tuple[int, int, int, tuple[datetime, str] | None]:
+    """Paginate one subreddit's listing. Returns (inserted, skipped, duplicates, newest_post).
+
+    Without ``since`` this walks the top-of-period listing. With ``since`` it
+    walks ``new`` and stops at the first page that is entirely known posts or
+    that reaches back past the watermark.
+
+    Each page is committed, together with its journal checkpoint, as soon as it
+    is fetched; there is no await between insert and commit, so concurrent
+    subreddits never share a transaction. A checkpoint with a cursor resumes
+    pagination from that ``after`` token. Raw listing pages and comment
+    responses are appended to ``archive`` when one is given.
+
+    With a ``comment_semaphore``, the top comments of posts not stored yet are
+    fetched concurrently (bounded by the semaphore, paced by ``limiter``)
+    before the page is written, so each post is inserted once, complete.
+    Failed fetches leave ``top_comments`` empty and are counted in
+    ``stats["comment_failures"]``.
+    """
+    stats = stats if stats is not None else {"comment_failures": 0}
+    inserted, skipped, duplicates, newest = _checkpoint_progress(checkpoint)
+    comments = (checkpoint.comments_collected or 0) if checkpoint else 0
+    after = checkpoint.cursor if checkpoint else None
+    if after:
+        logger.info(f"Direct scraping r/{subreddit}: resuming after {after}")
+    else:
+        logger.info(f"Direct scraping r/{subreddit}{' (incremental)' if since else ''}...")
+    listing = "new" if since else "top"
+    url = f"{config.REDDIT_BASE_URL}/r/{subreddit}/{listing}.json"
+
+    while inserted + skipped + duplicates < config.MAX_POSTS_PER_SUBREDDIT:
+        params = {"limit": 100} if since else {"t": config.TIME_FILTER, "limit": 100}
+        if after:
+            params["after"] = after
+
+        data = await fetch_listing(client, limiter, url, params)
+        if archive:
+            archive.write("direct", subreddit, [data])
+
+        posts = data.get("data", {}).get("children", [])
+        if not posts:
+            break
+
+        rows = []
+        for post in posts:
+            post_data = post_from_listing_child(post, subreddit)
+            if not post_data:
+                continue
+            if post_data["created_utc"]:
+                all_dates.append(post_data["created_utc"])
+            rows.append(post_data)
+
+        if comment_semaphore is not None:
+            known = existing_reddit_ids(session, [r["reddit_id"] for r in rows])
+            session.commit()  # end the read before awaiting; the session is shared
+            new_rows = [r for r in rows if r["reddit_id"] not in known]
+            fetched = await asyncio.gather(*(
+                _fetch_top_comments(client, limiter, comment_semaphore, config, r["reddit_id"], subreddit, archive)
+                for r in new_rows
+            ))
+            for row, comment_texts in zip(new_rows, fetched):
+                if comment_texts is None:
+                    stats["comment_failures"] += 1
+                    continue
+                row["top_comments"] = comment_texts
+                comments += len(comment_texts)
+
+        page_inserted, page_skipped, page_duplicates = bulk_insert_raw_posts(session, rows)
+        inserted += page_inserted
+        skipped += page_skipped
+        duplicates += page_duplicates
+        page_newest = _newest_post(rows)
+        if page_newest and (newest is None or page_newest > newest):
+            newest = page_newest
+        after = data.get("data", {}).get("after")
+        if scrape_id:
+            save_checkpoint(
+                session, scrape_id, subreddit,
+                status="running",
+                cursor=after,
+                posts_inserted=inserted,
+                posts_skipped=skipped,
+                posts_skipped_duplicate=duplicates,
+                comments_collected=comments,
+                newest_created_utc=newest[0] if newest else None,
+                newest_reddit_id=newest[1] if newest else None,
+            )
+        session.commit()
+
+        if since:
+            dates = [r["created_utc"] for r in rows if r["created_utc"]]
+            if page_inserted == 0 or (dates and min(dates) <= since):
+                break
+
+        if not after:
+            break
+
+    return inserted, skipped, duplicates, newest
+
+
+async def scrape_direct_async(
+    config: PipelineConfig,
+    incremental: bool = False,
+    pipeline_run_id: int | None = None,
+    resume: bool = False,
+) -> tuple[int, dict]:
+    """Scrape Reddit's old JSON API via BrightData proxies, several subreddits at once.
+
+    One pooled ``httpx.AsyncClient`` keeps proxy connections alive, and a shared
+    token bucket (``DIRECT_REQUESTS_PER_SECOND``) paces every request, including
+    up to ``DIRECT_COMMENT_WORKERS`` concurrent comment fetches for new posts. With
+    ``resume``, the latest unfinished scrape journal is continued.
+    """
     metrics = {
         "subreddits_targeted": list(config.TARGET_SUBREDDITS),
         "subreddits_successfully_scraped": 0,
@@ -143,82 +657,98 @@ def scrape_direct(config: PipelineConfig) -> tuple[int, dict]:
         "total_threads_scraped": 0,
         "threads_per_subreddit": {},
         "total_comments_collected": 0,
+        "posts_inserted": 0,
+        "posts_skipped_existing": 0,
+        "posts_skipped_duplicate_content": 0,
         "date_range_of_posts": {"earliest": None, "latest": None},
         "scrape_duration_seconds": 0,
         "proxy_method": "brightdata_residential_direct",
+        "requests_per_second_limit": config.DIRECT_REQUESTS_PER_SECOND,
+        "max_concurrent_subreddits": config.DIRECT_MAX_CONCURRENT_SUBREDDITS,
+        "comment_workers": config.DIRECT_COMMENT_WORKERS,
+        "comment_fetch_failures": 0,
+        "scrape_mode": "incremental" if incremental else "full",
+        "subreddits_incremental": [],
+        "scrape_id": None,
+        "subreddits_resumed": [],
     }
 
     start_time = time.time()
     session = get_session(config.DATABASE_URL)
     total_new = 0
     all_dates = []
-
-    proxies = {"https": config.brightdata_proxy_url} if config.has_brightdata else None
-    headers = {"User-Agent": "LegendsScraper/1.0"}
-
-    try:
-        for subreddit in config.TARGET_SUBREDDITS:
+    watermarks = get_watermarks(session) if incremental else {}
+    metrics["subreddits_incremental"] = [s for s in config.TARGET_SUBREDDITS if s in watermarks]
+    scrape_id, journal = open_scrape_journal(
+        session, "direct", config.TARGET_SUBREDDITS, pipeline_run_id, resume=resume
+    )
+    metrics["scrape_id"] = scrape_id
+    metrics["subreddits_resumed"] = [sub for sub, cp in journal.items() if cp.status != "pending"]
+    archive = RawArchive(config.RAW_ARCHIVE_DIR, scrape_id) if config.RAW_ARCHIVE_DIR else None
+    todo = []
+    for subreddit in config.TARGET_SUBREDDITS:
+        if journal[subreddit].status == "done":
+            total_new += _count_finished_checkpoint(metrics, subreddit, journal[subreddit])
+        else:
+            todo.append(subreddit)
+
+    limiter = TokenBucket(config.DIRECT_REQUESTS_PER_SECOND)
+    semaphore = asyncio.Semaphore(max(1, config.DIRECT_MAX_CONCURRENT_SUBREDDITS))
+    comment_semaphore = asyncio.Semaphore(config.DIRECT_COMMENT_WORKERS) if config.DIRECT_COMMENT_WORKERS > 0 else None
+    comment_stats = {"comment_failures": 0}
+
+    async def scrape_one(client, subreddit):
+        async with semaphore:
             try:
-                logger.info(f"Direct scraping r/{subreddit}...")
-                sub_count = 0
-                after = None
-
-                while sub_count < config.MAX_POSTS_PER_SUBREDDIT:
-                    url = f"https://old.reddit.com/r/{subreddit}/top.json?t={config.TIME_FILTER}&limit=100"
-                    if after:
-                        url += f"&after={after}"
-
-                    resp = requests.get(url, headers=headers, proxies=proxies, timeout=30)
-                    resp.raise_for_status()
-                    data = resp.json()
-
-                    posts = data.get("data", {}).get("children", [])
-                    if not posts:
-                        break
-
-                    for post in posts:
-                        pd = post.get("data", {})
-                        reddit_id = pd.get("id", "")
-                        if not reddit_id:
-                            continue
-
-                        created_utc = None
-                        if pd.get("created_utc"):
-                            created_utc = datetime.fromtimestamp(pd["created_utc"], tz=timezone.utc)
-                            all_dates.append(created_utc)
-
-                        post_data = {
-                            "reddit_id": reddit_id,
-                            "subreddit": subreddit,
-                            "title": pd.get("title", ""),
-                            "body": pd.get("selftext", ""),
-                            "top_comments": [],
-                            "upvotes": pd.get("ups", 0),
-                            "url": f"https://reddit.com{pd.get('permalink', '')}",
-                            "author": pd.get("author", ""),
-                            "created_utc": created_utc,
-                        }
-
-                        post_id = upsert_raw_post(session, post_data)
-                        if post_id:
-                            sub_count += 1
-
-                    after = data.get("data", {}).get("after")
-                    if not after:
-                        break
-                    time.sleep(1)  # Rate limiting
-
-                session.commit()
-                metrics["threads_per_subreddit"][subreddit] = sub_count
-                metrics["subreddits_successfully_scraped"] += 1
-                total_new += sub_count
-                logger.info(f"  r/{subreddit}: {sub_count} posts scraped")
-
+                since = watermarks[subreddit][0] if subreddit in watermarks else None
+                return await _scrape_subreddit_direct(
+                    client, limiter, session, config, subreddit, all_dates, since,
+                    scrape_id, journal[subreddit], archive, comment_semaphore, comment_stats,
+                )
             except Exception as e:
-                logger.error(f"  Failed to scrape r/{subreddit}: {e}")
-                metrics["subreddits_failed"].append({"subreddit": subreddit, "error": str(e)})
                 session.rollback()
+                save_checkpoint(session, scrape_id, subreddit, status="failed", error_message=str(e))
+                session.commit()
+                raise
 
+    try:
+        async with httpx.AsyncClient(
+            headers={"User-Agent": "LegendsScraper/1.0"},
+            proxy=config.brightdata_proxy_url if config.has_brightdata else None,
+            timeout=30,
+            limits=httpx.Limits(max_keepalive_connections=config.DIRECT_MAX_CONCURRENT_SUBREDDITS),
+        ) as client:
+            results = await asyncio.gather(
+                *(scrape_one(client, sub) for sub in todo),
+                return_exceptions=True,
+            )
+
+        for subreddit, result in zip(todo, results):
+            if isinstance(result, Exception):
+                logger.error(f"  Failed to scrape r/{subreddit}: {result}")
+                metrics["subreddits_failed"].append({"subreddit": subreddit, "error": str(result)})
+                continue
+            inserted, skipped, duplicates, newest = result
+            if newest:
+                update_watermark(session, subreddit, *newest, pipeline_run_id=pipeline_run_id)
+            save_checkpoint(session, scrape_id, subreddit, status="done", error_message=None)
+            session.commit()
+            sub_count = inserted + skipped + duplicates
+            metrics["threads_per_subreddit"][subreddit] = sub_count
+            metrics["posts_inserted"] += inserted
+            metrics["posts_skipped_existing"] += skipped
+            metrics["posts_skipped_duplicate_content"] += duplicates
+            metrics["total_comments_collected"] += journal[subreddit].comments_collected or 0
+            metrics["subreddits_successfully_scraped"] += 1
+            total_new += sub_count
+            logger.info(f"  r/{subreddit}: {sub_count} posts scraped")
+
+        metrics["comment_fetch_failures"] = comment_stats["comment_failures"]
+        # Resumed subreddits were counted first; report in target order
+        order = {sub: i for i, sub in enumerate(config.TARGET_SUBREDDITS)}
+        metrics["threads_per_subreddit"] = dict(
+            sorted(metrics["threads_per_subreddit"].items(), key=lambda kv: order[kv[0]])
+        )
         metrics["total_threads_scraped"] = total_new
 
         if all_dates:
@@ -232,3 +762,13 @@ def scrape_direct(config: PipelineConfig) -> tuple[int, dict]:
         session.close()
 
     return total_new, metrics
+
+
+def scrape_direct(
+    config: PipelineConfig,
+    incremental: bool = False,
+    pipeline_run_id: int | None = None,
+    resume: bool = False,
+) -> tuple[int, dict]:
+    """Fallback: scrape Reddit's old JSON API via BrightData proxies."""
+    return asyncio.run(scrape_direct_async(config, incremental, pipeline_run_id, resume))
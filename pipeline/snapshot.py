@@ -0,0 +1,100 @@
+"""Parquet snapshots of the preprocessed corpus.
+
+Layout: ``{base_dir}/{mode}/run-{pipeline_run_id:06d}.parquet`` where ``mode``
+is the preprocessing filter mode (``all`` or ``build_legends``).
+
+A snapshot holds the frame ``load_and_preprocess`` returned, with its dtypes,
+and the preprocessing metrics. Reading one back replaces the DB load and
+preprocessing steps, so topic modeling can be re-run on the same corpus.
+The file records the format and preprocessing rules versions it was written
+with; a snapshot from older rules still loads, with a warning.
+"""
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pipeline.preprocessor import PREPROCESS_RULES_VERSION
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+_METADATA_KEY = b"legends_npoints.snapshot"
+
+
+def _mode_dir(base_dir: str, filter_mode: str | None) -> Path:
+    return Path(base_dir) / (filter_mode or "all")
+
+
+def write_snapshot(
+    df: pd.DataFrame,
+    metrics: dict,
+    base_dir: str,
+    filter_mode: str | None,
+    pipeline_run_id: int,
+) -> Path:
+    """Write ``df`` and its preprocessing ``metrics``; returns the snapshot path."""
+    path = _mode_dir(base_dir, filter_mode) / f"run-{pipeline_run_id:06d}.parquet"
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    info = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "rules_version": PREPROCESS_RULES_VERSION,
+        "filter_mode": filter_mode,
+        "pipeline_run_id": pipeline_run_id,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "preprocessing": metrics,
+    }
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        _METADATA_KEY: json.dumps(info, default=str).encode("utf-8"),
+    })
+    # Write next to the target and rename, so a crash never leaves a truncated snapshot
+    tmp_path = path.with_suffix(".parquet.tmp")
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote corpus snapshot {path} ({len(df)} documents)")
+    return path
+
+
+def latest_snapshot(base_dir: str, filter_mode: str | None) -> Path | None:
+    """The snapshot of the most recent pipeline run for ``filter_mode``, if any."""
+    paths = sorted(_mode_dir(base_dir, filter_mode).glob("run-*.parquet"))
+    return paths[-1] if paths else None
+
+
+def read_snapshot_info(path: str | Path) -> dict:
+    """The metadata stored with a snapshot, without reading its rows."""
+    metadata = pq.read_schema(path).metadata or {}
+    if _METADATA_KEY not in metadata:
+        raise ValueError(f"{path} is not a corpus snapshot")
+    return json.loads(metadata[_METADATA_KEY])
+
+
+def read_snapshot(path: str | Path, filter_mode: str | None) -> tuple[pd.DataFrame, dict]:
+    """Load a snapshot written for ``filter_mode``. Returns (df, preprocessing metrics).
+
+    The file is memory-mapped rather than read into a buffer first.
+    """
+    info = read_snapshot_info(path)
+    if info["format_version"] != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(
+            f"{path} has snapshot format {info['format_version']}, expected {SNAPSHOT_FORMAT_VERSION}"
+        )
+    if info["filter_mode"] != filter_mode:
+        raise ValueError(f"{path} was written with filter mode {info['filter_mode']!r}, not {filter_mode!r}")
+    if info["rules_version"] != PREPROCESS_RULES_VERSION:
+        logger.warning(
+            f"Snapshot {path} was preprocessed with rules {info['rules_version']}, "
+            f"current rules are {PREPROCESS_RULES_VERSION}"
+        )
+
+    df = pd.read_parquet(path, memory_map=True)
+    logger.info(f"Loaded corpus snapshot {path} ({len(df)} documents, run #{info['pipeline_run_id']})")
+    return df, info["preprocessing"]
@@ -0,0 +1,193 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.models import Base
+
+# The tiny_model vocabulary; tests build documents from it so nothing maps to [UNK]
+TINY_MODEL_WORDS = ["my", "son", "daughter", "has", "meltdowns", "at", "school", "we", "tried", "therapy", "so", "tired"]
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
+
+
+class StubReddit:
+    """Serves old.reddit.com-style listing JSON from memory, 100 posts per page."""
+
+    def __init__(self):
+        self.posts: dict[str, list[dict]] = {}
+        self.requests: list[tuple[float, str]] = []
+        self.throttle_once: set[str] = set()
+        self.ratelimit_remaining = "6000"
+        self.fail_from_request: dict[str, int] = {}  # subreddit -> nth request that starts failing
+        self.request_counts: dict[str, int] = {}
+        self.comments: dict[str, list[str]] = {}  # post id -> top-level comment bodies
+        self.fail_comments: set[str] = set()
+        self.html_comments: set[str] = set()  # post ids answered with an HTML page
+        self.base_url = ""
+
+    def add_subreddit(self, subreddit: str, n: int, start_utc: int = 1_700_000_000):
+        self.posts[subreddit] = [
+            {
+                "id": f"{subreddit}{i}",
+                "title": f"Post {i} in {subreddit}",
+                "selftext": "body text",
+                "ups": n - i,
+                "permalink": f"/r/{subreddit}/comments/{subreddit}{i}/",
+                "author": "someone",
+                "created_utc": start_utc - i * 60,
+            }
+            for i in range(n)
+        ]
+
+    def prepend_posts(self, subreddit: str, n: int):
+        """Simulate ``n`` posts submitted since the last scrape."""
+        newest = self.posts[subreddit][0]["created_utc"]
+        fresh = [
+            {
+                "id": f"{subreddit}new{i}",
+                "title": f"New post {i} in {subreddit}",
+                "selftext": "body text",
+                "ups": 1,
+                "permalink": f"/r/{subreddit}/comments/{subreddit}new{i}/",
+                "author": "someone",
+                "created_utc": newest + (n - i) * 60,
+            }
+            for i in range(n)
+        ]
+        self.posts[subreddit] = fresh + self.posts[subreddit]
+
+    def comment_thread(self, reddit_id: str) -> list:
+        children = [{"kind": "t1", "data": {"body": body}} for body in self.comments.get(reddit_id, [])]
+        children.append({"kind": "more", "data": {"count": 10}})
+        return [
+            {"data": {"children": [{"kind": "t3", "data": {"id": reddit_id}}]}},
+            {"data": {"children": children}},
+        ]
+
+    def by_id(self, names: str) -> dict:
+        wanted = {name.removeprefix("t3_") for name in names.removesuffix(".json").split(",")}
+        found = [p for posts in self.posts.values() for p in posts if p["id"] in wanted]
+        return {"data": {"children": [{"kind": "t3", "data": p} for p in found], "after": None}}
+
+    def listing(self, subreddit: str, query: dict) -> dict:
+        posts = self.posts[subreddit]
+        limit = int(query.get("limit", ["25"])[0])
+        start = 0
+        if "after" in query:
+            after_id = query["after"][0].removeprefix("t3_")
+            start = next(i for i, p in enumerate(posts) if p["id"] == after_id) + 1
+        page = posts[start:start + limit]
+        has_more = start + limit < len(posts)
+        return {
+            "data": {
+                "children": [{"kind": "t3", "data": p} for p in page],
+                "after": f"t3_{page[-1]['id']}" if page and has_more else None,
+            }
+        }
+
+
+@pytest.fixture
+def reddit_stub():
+    stub = StubReddit()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            stub.requests.append((time.monotonic(), self.path))
+            parts = parsed.path.strip("/").split("/")
+            if parts[0] == "by_id":
+                self._send(200, stub.by_id(parts[1]), {})
+                return
+            if parts[0] == "comments":
+                reddit_id = parts[1].removesuffix(".json")
+                if reddit_id in stub.fail_comments:
+                    self._send(404, {"error": 404}, {})
+                elif reddit_id in stub.html_comments:
+                    self._send_html(200, "<html><body>Please wait while we verify your browser</body></html>")
+                else:
+                    self._send(200, stub.comment_thread(reddit_id), {})
+                return
+            subreddit = parts[1]
+            stub.request_counts[subreddit] = stub.request_counts.get(subreddit, 0) + 1
+            if stub.request_counts[subreddit] >= stub.fail_from_request.get(subreddit, float("inf")):
+                self._send(500, {"error": 500}, {})
+                return
+            if subreddit in stub.throttle_once:
+                stub.throttle_once.discard(subreddit)
+                self._send(429, {"error": 429}, {"Retry-After": "1"})
+                return
+            body = stub.listing(subreddit, parse_qs(parsed.query))
+            self._send(200, body, {"X-Ratelimit-Remaining": stub.ratelimit_remaining, "X-Ratelimit-Reset": "60"})
+
+        def _send(self, status, body, headers):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _send_html(self, status, html):
+            payload = html.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    stub.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        yield stub
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(scope="session")
+def tiny_model(tmp_path_factory):
+    """A randomly initialised two-layer BERT sentence-transformer (mean pooling, normalized)."""
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    path = tmp_path_factory.mktemp("tiny_bert")
+    (path / "vocab.txt").write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + TINY_MODEL_WORDS))
+    BertTokenizerFast(str(path / "vocab.txt")).save_pretrained(path)
+    torch.manual_seed(0)
+    BertModel(BertConfig(
+        vocab_size=len(TINY_MODEL_WORDS) + 5, hidden_size=32, num_hidden_layers=2, num_attention_heads=2, intermediate_size=64,
+    )).save_pretrained(path)
+    transformer = models.Transformer(str(path), max_seq_length=64)
+    st_path = tmp_path_factory.mktemp("tiny_st")
+    SentenceTransformer(modules=[transformer, models.Pooling(32, "mean"), models.Normalize()]).save(str(st_path))
+    return str(st_path)
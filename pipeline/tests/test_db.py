@@ -0,0 +1,152 @@
+from backend.models import RawPost
+from pipeline.backfill import backfill_content_hashes, backfill_pain_scores
+from pipeline.db import (
+    add_topic_assignments,
+    assigned_post_ids,
+    bulk_insert_raw_posts,
+    bulk_update_post_scores,
+    create_pipeline_run,
+    store_topic,
+    upsert_raw_post,
+)
+from pipeline.preprocessor import load_and_preprocess
+from pipeline.text_utils import compute_content_hash, compute_post_pain_score
+
+
+def _post(reddit_id, **overrides):
+    post = {
+        "reddit_id": reddit_id,
+        "subreddit": "Parenting",
+        "title": f"Title {reddit_id}",
+        "body": "Body",
+        "top_comments": ["c1"],
+        "upvotes": 10,
+        "url": "",
+        "author": "someone",
+        "created_utc": None,
+    }
+    post.update(overrides)
+    return post
+
+
+def test_bulk_insert_counts_inserted_and_skipped(db_session):
+    upsert_raw_post(db_session, _post("a1"))
+    db_session.commit()
+
+    counts = bulk_insert_raw_posts(db_session, [_post("a1"), _post("b2"), _post("c3"), _post("b2")])
+    db_session.commit()
+
+    assert counts == (2, 2, 0)  # a re-scraped post is an existing one, not duplicate content
+    assert db_session.query(RawPost).count() == 3
+
+
+def test_bulk_insert_does_not_overwrite_existing(db_session):
+    bulk_insert_raw_posts(db_session, [_post("a1", upvotes=5)])
+    bulk_insert_raw_posts(db_session, [_post("a1", upvotes=500)])
+    db_session.commit()
+
+    post = db_session.query(RawPost).filter_by(reddit_id="a1").one()
+    assert post.upvotes == 5
+    assert post.top_comments == ["c1"]
+    assert post.scraped_at is not None
+
+
+def test_bulk_insert_spans_batches(db_session):
+    posts = [_post(f"p{i}") for i in range(25)]
+    assert bulk_insert_raw_posts(db_session, posts, batch_size=10) == (25, 0, 0)
+
+
+def test_bulk_insert_empty(db_session):
+    assert bulk_insert_raw_posts(db_session, []) == (0, 0, 0)
+
+
+def test_bulk_update_writes_only_changed_scores(db_session):
+    bulk_insert_raw_posts(db_session, [_post("a1"), _post("b2"), _post("c3")])
+    db_session.commit()
+
+    updated = bulk_update_post_scores(db_session, [
+        {"reddit_id": "a1", "upvotes": 99},
+        {"reddit_id": "b2", "upvotes": 10},  # unchanged
+        {"reddit_id": "c3", "upvotes": 10, "top_comments": ["new"]},
+        {"reddit_id": "zz", "upvotes": 1},  # not stored
+    ], batch_size=2)
+    db_session.commit()
+    db_session.expire_all()
+
+    assert updated == 2
+    posts = {p.reddit_id: (p.upvotes, p.top_comments) for p in db_session.query(RawPost).all()}
+    assert posts == {"a1": (99, ["c1"]), "b2": (10, ["c1"]), "c3": (10, ["new"])}
+
+
+def test_content_hash_ignores_formatting_but_needs_a_body():
+    assert compute_content_hash("My kid won't sleep", "We tried **everything**!") == compute_content_hash(
+        "MY KID WON'T SLEEP", "We tried everything https://example.com"
+    )
+    assert compute_content_hash("My kid won't sleep", "We tried everything") != compute_content_hash(
+        "My kid won't eat", "We tried everything"
+    )
+    assert compute_content_hash("Help!", "") is None
+
+
+def test_bulk_insert_skips_cross_posts(db_session):
+    bulk_insert_raw_posts(db_session, [_post("a1", title="Help", body="Same text everywhere")])
+    counts = bulk_insert_raw_posts(db_session, [
+        _post("a1", title="Help", body="Same text everywhere"),
+        _post("b2", title="Help", subreddit="Mommit", body="Same *text* everywhere!"),
+        _post("c3", title="Other", body="Something else"),
+        _post("d4", title="Other", body="Something else"),
+    ])
+    db_session.commit()
+
+    assert counts == (1, 1, 2)
+    assert {p.reddit_id for p in db_session.query(RawPost).all()} == {"a1", "c3"}
+    assert bulk_insert_raw_posts(db_session, [_post("b2", title="Help", body="Same text everywhere")], skip_duplicate_content=False) == (1, 0, 0)
+
+
+def test_loader_keeps_first_copy_per_content_hash(db_session):
+    words = "my toddler screams every night and nothing we try seems to help at all"
+    db_session.add_all([
+        RawPost(reddit_id="a1", subreddit="Parenting", title="Bedtime", body=words, top_comments=["x"]),
+        RawPost(reddit_id="b2", subreddit="Mommit", title="Bedtime", body=words, top_comments=["y"]),
+        RawPost(reddit_id="c3", subreddit="daddit", title="Other", body=words + " again", top_comments=[]),
+    ])
+    db_session.commit()
+    assert backfill_content_hashes(db_session, batch_size=2) == 3
+
+    df, metrics = load_and_preprocess(db_session)
+
+    assert sorted(df["subreddit"]) == ["Parenting", "daddit"]
+    assert metrics["documents_removed_same_content_hash"] == 1
+
+
+def test_pain_score_is_stored_at_insert_and_backfilled(db_session):
+    title, body = "At my wits end", "Nothing works and I'm exhausted"
+    assert compute_post_pain_score(title, body) == 1.0
+    bulk_insert_raw_posts(db_session, [_post("a1", title=title, body=body), _post("b2")])
+    db_session.add(RawPost(reddit_id="c3", subreddit="Parenting", title="So frustrated", body=None))
+    db_session.commit()
+
+    scores = dict(db_session.query(RawPost.reddit_id, RawPost.pain_score))
+    assert scores == {"a1": 1.0, "b2": 0.0, "c3": None}
+    assert backfill_pain_scores(db_session, batch_size=2) == 1
+    assert db_session.query(RawPost.pain_score).filter_by(reddit_id="c3").scalar() == compute_post_pain_score("So frustrated", None)
+
+
+def test_topic_assignments_update_counts_and_skip_unstored_topics(db_session):
+    bulk_insert_raw_posts(db_session, [_post(f"p{i}") for i in range(4)])
+    run = create_pipeline_run(db_session)
+    topic = store_topic(db_session, {
+        "pipeline_run_id": run.id, "topic_index": 0, "rank": 1, "keywords": [], "post_count": 2, "avg_upvotes": 10.0,
+    })
+    post_ids = [p.id for p in db_session.query(RawPost).order_by(RawPost.id)]
+
+    added = add_topic_assignments(db_session, run.id, [
+        {"post_id": post_ids[0], "topic": 0, "probability": 0.9, "upvotes": 40},
+        {"post_id": post_ids[1], "topic": -1, "probability": 0.2, "upvotes": 5},  # outlier
+        {"post_id": post_ids[2], "topic": 3, "probability": 0.7, "upvotes": 5},  # topic the run didn't store
+    ])
+    db_session.commit()
+
+    assert added == 1
+    assert (topic.post_count, topic.avg_upvotes) == (3, 20.0)
+    assert assigned_post_ids(db_session, run.id) == {post_ids[0]}
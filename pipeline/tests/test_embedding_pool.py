@@ -0,0 +1,20 @@
+import numpy as np
+
+from pipeline.config import PipelineConfig
+from pipeline.embedding_pool import EmbeddingPool
+from pipeline.tests.conftest import TINY_MODEL_WORDS
+
+
+def test_pool_matches_in_process_encoding(tiny_model):
+    from sentence_transformers import SentenceTransformer
+
+    rng = np.random.default_rng(0)
+    documents = [" ".join(rng.choice(TINY_MODEL_WORDS, size=rng.integers(1, 60))) for _ in range(150)]
+    config = PipelineConfig(EMBEDDING_MODEL=tiny_model)
+
+    reference = SentenceTransformer(tiny_model, device="cpu").encode(documents)
+    with EmbeddingPool(config, workers=2) as pool:
+        # Several tasks per call, finished out of order, written back to the caller's rows
+        assert np.allclose(pool.encode(documents), reference, atol=1e-5)
+        assert np.allclose(pool.encode(documents[:3]), reference[:3], atol=1e-5)
+        assert pool.encode([]).shape == (0, 32)
@@ -0,0 +1,118 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from pipeline.embedding_store import EmbeddingStore
+
+
+class FakeEncoder:
+    """Deterministic 8-dim embeddings derived from the text; records what it encoded."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def __call__(self, documents):
+        self.encoded.extend(documents)
+        return np.array([[len(doc), sum(map(ord, doc)) % 97] + [i] * 6 for i, doc in enumerate(documents)], dtype=float)
+
+
+def _expected(documents):
+    return np.array([[len(doc), sum(map(ord, doc)) % 97] for doc in documents], dtype=np.float32)
+
+
+def test_embed_encodes_only_unseen_documents(tmp_path):
+    encoder = FakeEncoder()
+    store = EmbeddingStore(str(tmp_path), "test/model-a")
+    docs = ["alpha", "beta", "alpha", "gamma"]
+
+    embeddings, stats = store.embed(docs, encoder)
+    assert encoder.encoded == ["alpha", "beta", "gamma"]
+    assert embeddings.shape == (4, 8) and embeddings.dtype == np.float32
+    assert np.array_equal(embeddings[:, :2], _expected(docs))
+    assert (stats["embedding_cache_hits"], stats["embedding_cache_misses"]) == (0, 4)
+
+    # A fresh store over the same directory sees the committed rows
+    reopened = EmbeddingStore(str(tmp_path), "test/model-a")
+    encoder.encoded.clear()
+    more = ["gamma", "delta", "alpha"]
+    again, stats = reopened.embed(more, encoder)
+    assert encoder.encoded == ["delta"]
+    assert np.array_equal(again[:, :2], _expected(more))
+    assert np.array_equal(again[[0, 2]], embeddings[[3, 0]])
+    assert (stats["embedding_cache_hits"], stats["embedding_cache_misses"]) == (2, 1)
+
+
+def test_embed_evicts_rows_idle_for_max_idle_runs(tmp_path):
+    encoder = FakeEncoder()
+    store = EmbeddingStore(str(tmp_path), "model", max_idle_runs=2)
+    store.embed(["old", "kept"], encoder)
+    store.embed(["kept"], encoder)
+    _, stats = store.embed(["kept"], encoder)
+    assert (stats["embedding_cache_evicted"], stats["embedding_cache_rows"]) == (0, 2)
+    _, stats = store.embed(["kept", "new"], encoder)
+    assert (stats["embedding_cache_evicted"], stats["embedding_cache_rows"]) == (1, 2)
+    assert len(list(tmp_path.glob("model/vectors-*.f32"))) == 1
+
+    reopened = EmbeddingStore(str(tmp_path), "model", max_idle_runs=2)
+    encoder.encoded.clear()
+    embeddings, _ = reopened.embed(["new", "old", "kept"], encoder)
+    assert encoder.encoded == ["old"]
+    assert np.array_equal(embeddings[:, :2], _expected(["new", "old", "kept"]))
+
+
+def test_partial_embeds_do_not_age_the_corpus(tmp_path):
+    encoder = FakeEncoder()
+    store = EmbeddingStore(str(tmp_path), "model", max_idle_runs=1)
+    store.embed(["a", "b", "c"], encoder)
+    for doc in ["d", "e", "f"]:  # e.g. --assign-only calls on new posts
+        _, stats = store.embed([doc], encoder, new_generation=False)
+        assert stats["embedding_cache_evicted"] == 0
+    assert store.generation == 1
+
+    encoder.encoded.clear()
+    _, stats = EmbeddingStore(str(tmp_path), "model", max_idle_runs=1).embed(list("abcdef"), encoder)
+    assert encoder.encoded == []
+    assert (stats["embedding_cache_hits"], stats["embedding_cache_rows"]) == (6, 6)
+
+
+def test_partial_embed_keeps_committed_index_until_meta_changes(tmp_path, monkeypatch):
+    encoder = FakeEncoder()
+    store = EmbeddingStore(str(tmp_path), "model")
+    store.embed(["a", "b"], encoder)
+    index_path = tmp_path / "model" / json.loads((tmp_path / "model" / "meta.json").read_text())["index"]
+    committed = index_path.read_bytes()
+
+    def crash(*args):
+        raise OSError("crashed before replacing meta.json")
+
+    monkeypatch.setattr(os, "replace", crash)
+    with pytest.raises(OSError):
+        store.embed(["c"], encoder, new_generation=False)
+    monkeypatch.undo()
+    assert index_path.read_bytes() == committed
+
+    reopened = EmbeddingStore(str(tmp_path), "model")
+    assert reopened.rows == 2
+    _, stats = reopened.embed(["a", "b", "c"], encoder, new_generation=False)
+    assert (stats["embedding_cache_hits"], stats["embedding_cache_misses"]) == (2, 1)
+    assert not index_path.exists()  # replaced by the new commit's index
+
+
+def test_uncommitted_rows_are_overwritten(tmp_path):
+    encoder = FakeEncoder()
+    EmbeddingStore(str(tmp_path), "model").embed(["one"], encoder)
+
+    crashed = EmbeddingStore(str(tmp_path), "model")
+    crashed._append(np.ones((3, 8)))  # appended, never committed
+
+    embeddings, _ = EmbeddingStore(str(tmp_path), "model").embed(["one", "two"], encoder)
+    assert np.array_equal(embeddings[:, :2], _expected(["one", "two"]))
+
+
+def test_store_rejects_other_dimensions(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "model")
+    store.embed(["one"], FakeEncoder())
+    with pytest.raises(ValueError, match="dimensions"):
+        store.embed(["two"], lambda docs: np.zeros((len(docs), 4)))
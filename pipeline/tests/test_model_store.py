@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from bertopic import BERTopic
+from bertopic.dimensionality import BaseDimensionalityReduction
+from sklearn.cluster import KMeans
+from sklearn.feature_extraction.text import CountVectorizer
+
+from pipeline.config import PipelineConfig
+from pipeline.db import create_pipeline_run, update_pipeline_run
+from pipeline.model_store import fitted_post_ids, latest_topic_model, load_topic_model, save_topic_model
+from pipeline.run_pipeline import assign_new_posts
+from pipeline.topic_modeler import CorpusEmbeddings, assign_topics
+
+_TOPIC_WORDS = [["sleep", "nap", "bedtime"], ["tantrum", "meltdown", "screaming"], ["school", "teacher", "homework"]]
+
+
+def _corpus(n: int, seed: int) -> tuple[pd.DataFrame, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    centres = np.eye(3, 32, dtype=np.float32)
+    topics = rng.integers(0, 3, size=n)
+    vectors = centres[topics] + rng.normal(0, 0.05, size=(n, 32)).astype(np.float32)
+    documents = [" ".join(rng.choice(_TOPIC_WORDS[t], size=6)) for t in topics]
+    post_ids = np.arange(seed * 1000, seed * 1000 + n)
+    return pd.DataFrame({"post_id": post_ids, "document": documents, "group": topics}), vectors
+
+
+def test_saved_model_assigns_new_posts_like_the_fit(tiny_model, tmp_path):
+    from sentence_transformers import SentenceTransformer
+
+    config = PipelineConfig(EMBEDDING_MODEL=tiny_model)
+    df, vectors = _corpus(90, seed=0)
+    topic_model = BERTopic(
+        umap_model=BaseDimensionalityReduction(),
+        hdbscan_model=KMeans(n_clusters=3, random_state=42, n_init=10),
+        vectorizer_model=CountVectorizer(),
+    )
+    topics, _ = topic_model.fit_transform(df["document"].tolist(), embeddings=vectors)
+
+    path = save_topic_model(topic_model, df["post_id"], str(tmp_path), "build_legends", 7, config)
+    assert latest_topic_model(str(tmp_path), "build_legends") == path
+    assert latest_topic_model(str(tmp_path), "build_legends", run_ids={1, 2}) is None
+    assert fitted_post_ids(path).equals(pd.Index(df["post_id"]))
+    assert not list(path.glob("*.pkl")) and (path / "topic_embeddings.safetensors").exists()
+
+    embedding_model = SentenceTransformer(tiny_model, device="cpu")
+    loaded = load_topic_model(path, embedding_model, config)
+    new_df, new_vectors = _corpus(20, seed=1)
+    assigned = assign_topics(loaded, new_df, CorpusEmbeddings(pd.Index(new_df["post_id"]), new_vectors, None, {}))
+    # New posts go to the topic fitted on documents of the same words
+    fitted_topic = dict(zip(df["group"], topics))
+    assert assigned["topic"].tolist() == [fitted_topic[g] for g in new_df["group"]]
+    assert assigned["probability"].between(0, 1.0001).all()
+
+    with pytest.raises(ValueError, match="embeddings"):
+        load_topic_model(path, embedding_model, PipelineConfig(EMBEDDING_MODEL=tiny_model, EMBEDDING_BACKEND="onnx-int8"))
+
+
+def test_assign_only_refuses_when_latest_run_saved_no_model(db_session, tmp_path):
+    config = PipelineConfig(TOPIC_MODEL_DIR=str(tmp_path))
+    for mode in (False, True, False):
+        run = create_pipeline_run(db_session, config_dict={"build_legends_mode": mode})
+        update_pipeline_run(db_session, run.id, status="completed")
+    (tmp_path / "all" / "run-000001").mkdir(parents=True)  # an older default-mode run's model
+
+    with pytest.raises(ValueError, match="Run #3, the latest completed run"):
+        assign_new_posts(db_session, config, None)
+    with pytest.raises(ValueError, match="Run #2, the latest completed run"):
+        assign_new_posts(db_session, config, "build_legends")
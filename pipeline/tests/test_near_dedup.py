@@ -0,0 +1,67 @@
+import random
+
+import numpy as np
+
+from backend.models import RawPost
+from pipeline.near_dedup import find_near_duplicates, lsh_bands, minhash_signatures
+from pipeline.preprocessor import load_and_preprocess
+
+_rng = random.Random(11)
+_VOCAB = [f"word{i}" for i in range(3000)]
+
+
+def _text(words: int) -> str:
+    return " ".join(_rng.choices(_VOCAB, k=words))
+
+
+def _edit(text: str, changes: int) -> str:
+    words = text.split()
+    for _ in range(changes):
+        words[_rng.randrange(len(words))] = "edited"
+    return " ".join(words)
+
+
+def test_lsh_bands_turn_at_or_below_threshold():
+    for num_perm, threshold in [(64, 0.8), (128, 0.8), (64, 0.5), (32, 0.9)]:
+        bands, rows = lsh_bands(num_perm, threshold)
+        assert bands * rows <= num_perm
+        assert (1 / bands) ** (1 / rows) <= threshold
+
+
+def test_minhash_signature_agreement_estimates_jaccard():
+    base = _text(400)
+    docs = [base, _edit(base, 4), _text(400)]
+    signatures = minhash_signatures(docs, num_perm=256)
+    assert (signatures[0] == signatures[1]).mean() > 0.8
+    assert (signatures[0] == signatures[2]).mean() < 0.05
+    # Same input, same signatures
+    assert np.array_equal(signatures, minhash_signatures(docs, num_perm=256))
+
+
+def test_find_near_duplicates_maps_copies_to_first_member():
+    originals = [_text(300) for _ in range(50)]
+    docs = originals + [_edit(text, 2) for text in originals[:10]] + ["", "tiny", "tiny"]
+
+    representatives = find_near_duplicates(docs, threshold=0.8)
+
+    assert list(representatives[:50]) == list(range(50))
+    assert list(representatives[50:60]) == list(range(10))
+    assert list(representatives[60:]) == [60, 61, 61]
+
+
+def test_load_and_preprocess_drops_near_duplicates(db_session):
+    body = _text(120)
+    db_session.add_all([
+        RawPost(reddit_id="orig", subreddit="Parenting", title="Bedtime help", body=body, upvotes=5),
+        RawPost(reddit_id="repost", subreddit="Mommit", title="Bedtime help!", body=_edit(body, 1), upvotes=9),
+        RawPost(reddit_id="other", subreddit="daddit", title="Something else", body=_text(120), upvotes=1),
+    ])
+    db_session.commit()
+
+    df, metrics = load_and_preprocess(db_session, near_dup_threshold=0.8)
+
+    assert sorted(df["subreddit"]) == ["Parenting", "daddit"]
+    assert metrics["documents_removed_near_duplicates"] == 1
+    assert metrics["near_duplicate_clusters"] == 1
+    assert metrics["largest_near_duplicate_cluster"] == 2
+    assert metrics["total_documents_after_cleaning"] == 2
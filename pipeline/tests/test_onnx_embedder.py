@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")
+
+from pipeline.onnx_embedder import OnnxInt8Embedder, cosine_agreement  # noqa: E402
+from pipeline.tests.conftest import TINY_MODEL_WORDS  # noqa: E402
+
+
+def test_int8_export_agrees_with_fp32(tiny_model, tmp_path):
+    from sentence_transformers import SentenceTransformer
+
+    rng = np.random.default_rng(0)
+    documents = [" ".join(rng.choice(TINY_MODEL_WORDS, size=rng.integers(1, 120))) for _ in range(50)]
+
+    embedder = OnnxInt8Embedder.load(tiny_model, str(tmp_path))
+    embeddings = embedder.encode(documents, batch_size=8)
+
+    assert embeddings.shape == (50, 32) and embeddings.dtype == np.float32
+    assert np.allclose(np.linalg.norm(embeddings, axis=1), 1, atol=1e-5)
+    assert embedder.settings["probe_agreement"]["mean"] >= 0.98
+    reference = SentenceTransformer(tiny_model, device="cpu").encode(documents)
+    assert cosine_agreement(reference, embeddings)["min"] > 0.98
+
+    # Bucketing sorts by length internally; results come back in input order. Activations
+    # are quantized per batch, so a different batch mix moves values slightly.
+    reloaded = OnnxInt8Embedder.load(tiny_model, str(tmp_path))
+    assert np.allclose(reloaded.encode(documents[::-1]), embeddings[::-1], atol=1e-3)
+    assert embedder.embed([]).shape == (0, 32)
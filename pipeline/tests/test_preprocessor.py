@@ -1,4 +1,23 @@
-from pipeline.preprocessor import clean_text, build_documents
+import random
+
+import pandas as pd
+
+from backend.models import RawPost
+from pipeline.preprocessor import (
+    BUILD_LEGENDS_KEYWORDS,
+    _BL_EXCLUDE_PATTERN,
+    _BL_PATTERN,
+    _duplicated_documents,
+    _matched_categories,
+    build_documents,
+    category_mask,
+    clean_texts,
+    load_and_preprocess,
+    load_documents,
+    mask_categories,
+    match_keywords,
+)
+from pipeline.text_utils import PAIN_SIGNAL_KEYWORDS, _PAIN_PATTERN, clean_text, compute_pain_score
 
 
 class FakePost:
@@ -87,3 +106,189 @@ def test_build_documents_handles_none():
     df = build_documents(posts)
     assert len(df) == 1
     assert "Title only" in df.iloc[0]["document"]
+
+
+def test_load_documents_streams_chunks_into_one_frame(db_session):
+    posts = [
+        RawPost(
+            reddit_id=f"p{i}", subreddit="Parenting", title=f"Title {i}", body=f"**Body** {i}",
+            top_comments=[f"c{i}"], upvotes=i, author="someone", url="",
+        )
+        for i in range(7)
+    ]
+    db_session.add_all(posts)
+    db_session.commit()
+
+    df = load_documents(db_session, chunk_size=3)
+
+    assert df.equals(build_documents(posts))
+    assert list(df.columns) == ["post_id", "document", "subreddit", "upvotes"]
+
+
+# Fragments that exercise every clean_text pass and the ways they interact
+_FRAGMENTS = [
+    "word", " ", "  ", "\n", "\r\n", "\t", "\x1c", "\xa0", "\u200b", "\x00", "é", "😀", "\\1",
+    "*", "**", "_", "__", "#", "## ", ">", "> ", "[", "]", "(", ")", "](",
+    "[link](http://x.y/z)", "https://ex.com/a_b*c", "http://",
+]
+
+
+def test_clean_texts_matches_clean_text_on_random_strings():
+    rng = random.Random(1234)
+    texts = [
+        "".join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(0, 30)))
+        for _ in range(5000)
+    ]
+    cleaned = clean_texts(pd.Series(texts, dtype=object))
+    assert cleaned.tolist() == [clean_text(t) for t in texts]
+
+
+def test_clean_texts_handles_missing_and_repeated_values():
+    texts = pd.Series(["**hi**", None, "", "**hi**", "\x00)"], index=[5, 6, 7, 8, 9], dtype=object)
+    cleaned = clean_texts(texts)
+    assert cleaned.tolist() == ["hi", "", "", "hi", "\x00)"]
+    assert list(cleaned.index) == [5, 6, 7, 8, 9]
+
+
+def test_load_and_preprocess_workers_match_in_process(db_session):
+    rng = random.Random(7)
+    words = [
+        "my", "son", "has", "meltdowns", "and", "anxiety", "at", "school", "we", "tried", "therapy",
+        "nothing works", "fever", "crib", "he", "is", "so", "frustrated", "today", "again",
+    ]
+    db_session.add_all([
+        RawPost(
+            reddit_id=f"p{i}", subreddit="Parenting", title=" ".join(rng.choices(words, k=6)),
+            body=" ".join(rng.choices(words, k=rng.randint(0, 40))),
+            top_comments=[" ".join(rng.choices(words, k=8))], upvotes=i,
+        )
+        for i in range(600)
+    ])
+    db_session.commit()
+
+    for mode in (None, "build_legends"):
+        serial_df, serial_metrics = load_and_preprocess(db_session, filter_mode=mode, cache=False)
+        pooled_df, pooled_metrics = load_and_preprocess(db_session, filter_mode=mode, workers=2, cache=False)
+        serial_metrics.pop("preprocessing_duration_seconds")
+        pooled_metrics.pop("preprocessing_duration_seconds")
+        assert pooled_metrics == serial_metrics
+        assert pooled_df.equals(serial_df)
+
+
+def test_load_and_preprocess_reuses_cached_documents(db_session, monkeypatch):
+    from pipeline import preprocessor
+
+    db_session.add_all([
+        RawPost(
+            reddit_id=f"p{i}", subreddit="Parenting", title=f"My son has meltdowns at school, day {i}",
+            body=f"We tried therapy and nothing works. He is so frustrated, post {i}.",
+            top_comments=[f"comment {i}"], upvotes=i,
+        )
+        for i in range(20)
+    ])
+    db_session.commit()
+    uncached_df, _ = load_and_preprocess(db_session, filter_mode="build_legends", cache=False)
+
+    first_df, first = load_and_preprocess(db_session, filter_mode="build_legends", chunk_size=6)
+    assert (first["preprocess_cache_hits"], first["preprocess_cache_misses"]) == (0, 20)
+    second_df, second = load_and_preprocess(db_session, filter_mode="build_legends", chunk_size=6)
+    assert (second["preprocess_cache_hits"], second["preprocess_cache_misses"]) == (20, 0)
+    assert first_df.equals(uncached_df)
+    assert second_df.equals(uncached_df)
+
+    plain_df, _ = load_and_preprocess(db_session)
+    assert plain_df.equals(load_and_preprocess(db_session, cache=False)[0])
+
+    post = db_session.query(RawPost).filter_by(reddit_id="p3").one()
+    post.body = "Edited: we tried therapy and nothing works, he is still frustrated."
+    db_session.commit()
+    edited_df, edited = load_and_preprocess(db_session, filter_mode="build_legends")
+    assert (edited["preprocess_cache_hits"], edited["preprocess_cache_misses"]) == (19, 1)
+    assert edited_df.equals(load_and_preprocess(db_session, filter_mode="build_legends", cache=False)[0])
+
+    monkeypatch.setattr(preprocessor, "PREPROCESS_RULES_VERSION", "test-rules")
+    _, bumped = load_and_preprocess(db_session, filter_mode="build_legends")
+    assert (bumped["preprocess_cache_hits"], bumped["preprocess_cache_misses"]) == (0, 20)
+
+
+def test_load_and_preprocess_returns_compact_frame(db_session):
+    db_session.add_all([
+        RawPost(
+            reddit_id=f"p{i}", subreddit=["Parenting", "Mommit"][i % 2],
+            title=f"My son has meltdowns and anxiety at school, day {i}" if i != 3 else "Anxiety",
+            body="We tried therapy and nothing works. He is so frustrated." if i != 3 else "short",
+            upvotes=i,
+        )
+        for i in range(6)
+    ])
+    db_session.commit()
+
+    for cache in (False, True, True):
+        df, metrics = load_and_preprocess(db_session, filter_mode="build_legends", cache=cache)
+        assert str(df["post_id"].dtype) == "int32"
+        assert str(df["upvotes"].dtype) == "int32"
+        assert isinstance(df["subreddit"].dtype, pd.CategoricalDtype)
+        assert isinstance(df["document"].dtype, pd.StringDtype)
+        assert "bl_include" not in df.columns
+        assert [mask_categories(mask) for mask in df["category_mask"]] == [["emotional", "anxiety", "interventions"]] * 5
+        assert metrics["documents_removed_too_short"] == 1
+        assert metrics["build_legends_filter"]["keyword_category_counts"]["anxiety"] == 5
+
+
+def test_category_mask_round_trips():
+    categories = list(BUILD_LEGENDS_KEYWORDS)
+    assert mask_categories(category_mask([])) == []
+    assert mask_categories(category_mask(categories)) == categories
+    assert mask_categories(category_mask([categories[2], categories[0]])) == [categories[0], categories[2]]
+
+
+def test_duplicated_documents_matches_pandas():
+    rng = random.Random(3)
+    for size in (0, 1, 50, 2500):
+        documents = pd.Series([str(rng.randrange(size // 3 + 1)) for _ in range(size)], dtype=str)
+        assert _duplicated_documents(documents, block_size=100).tolist() == documents.duplicated().tolist()
+
+
+_GOLDEN_DOCUMENTS = [
+    "",
+    "My son has meltdowns and I don't know what to do. I don't know what to do anymore!",
+    "She gives up easily, gives up on everything",  # keyword that is a prefix of another
+    "I don't know what to do, nothing works, exhausted",  # overlapping pain phrases
+    "Tantrum during sleep training in the crib",  # included, then excluded
+    "Crying over the co-sleeping arrangement and pull-ups",
+    "MELTDOWN over the iPad; RSV season anxiety",
+    "self-esteem, self esteem, self_esteem, selfesteem",
+    "anxious_kid anxiousness anxiety2 2e 504 plan",
+    "ſcared and ıepıc İ'm lost, İ'm so frustrated",  # characters re.IGNORECASE folds to ASCII
+    "The KELVIN sign: \u212aids panic",
+]
+
+_GOLDEN_FRAGMENTS = [
+    " ", " ", " ", "-", "'", "_", ".", "\n", "the", "kid", "x", "s", "ing", "2", "é", "ı", "ſ", "İ",
+    "sleep training", "cry it out", "co-sleep", "pull ups", "c-section", "potty train", "RSV",
+]
+
+
+def _golden_corpus():
+    rng = random.Random(2024)
+    keywords = [kw for group in BUILD_LEGENDS_KEYWORDS.values() for kw in group] + PAIN_SIGNAL_KEYWORDS
+    corpus = list(_GOLDEN_DOCUMENTS)
+    for _ in range(3000):
+        parts = [
+            rng.choice(keywords) if rng.random() < 0.4 else rng.choice(_GOLDEN_FRAGMENTS)
+            for _ in range(rng.randint(1, 25))
+        ]
+        doc = "".join(part + rng.choice([" ", "", "-"]) for part in parts)
+        corpus.append("".join(ch.upper() if rng.random() < 0.2 else ch for ch in doc))
+    return corpus
+
+
+def test_match_keywords_agrees_with_reference_patterns():
+    for text in _golden_corpus():
+        include = bool(_BL_PATTERN.search(text))
+        exclude = include and bool(_BL_EXCLUDE_PATTERN.search(text))
+        matches = match_keywords(text)
+        assert (matches.include, matches.exclude) == (include, exclude), text
+        assert matches.categories == (_matched_categories(text) if include and not exclude else []), text
+        assert matches.pain_hits == set(_PAIN_PATTERN.findall(text.lower())), text
+        assert min(1.0, len(matches.pain_hits) / 3.0) == compute_pain_score(text)
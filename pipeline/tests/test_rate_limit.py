@@ -0,0 +1,43 @@
+import asyncio
+
+from pipeline.rate_limit import TokenBucket, retry_after_seconds
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_paces_requests():
+    async def run():
+        limiter = TokenBucket(rate=50)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(11):
+            await limiter.acquire()
+        return loop.time() - start
+
+    assert asyncio.run(run()) >= 10 / 50 * 0.9
+
+
+def test_ratelimit_headers_lower_rate_and_pause():
+    clock = FakeClock()
+    limiter = TokenBucket(rate=10, clock=clock)
+
+    limiter.update_from_headers({"x-ratelimit-remaining": "30", "x-ratelimit-reset": "60"})
+    assert limiter.rate == 0.5
+
+    limiter.update_from_headers({"x-ratelimit-remaining": "900", "x-ratelimit-reset": "60"})
+    assert limiter.rate == 10
+
+    limiter.update_from_headers({"x-ratelimit-remaining": "0", "x-ratelimit-reset": "42"})
+    assert limiter._paused_until == 42
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds({"retry-after": "3"}) == 3.0
+    assert retry_after_seconds({}) is None
+    assert retry_after_seconds({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0.0
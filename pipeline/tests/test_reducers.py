@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from pipeline.reducers import SampledUMAP, make_reducer
+
+
+def _embeddings(n: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((n, 32)).astype(np.float32)
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("method", ["pca", "svd", "random_projection"])
+def test_linear_reducers_cap_components_below_document_count(method):
+    reducer, params = make_reducer(method, 200, linear_components=8)
+    assert params == {"method": method, "n_components": 8}
+    assert reducer.fit_transform(_embeddings(200)).shape == (200, 8)
+
+    reducer, params = make_reducer(method, 6, linear_components=8)  # a label with few posts
+    assert params["n_components"] == 5
+    assert reducer.fit_transform(_embeddings(6)).shape == (6, 5)
+
+
+def test_sampled_umap_fits_on_sample_and_places_every_document():
+    reducer, params = make_reducer("umap_sample", 300, n_neighbors=5, sample_size=100)
+    assert isinstance(reducer, SampledUMAP) and params["sample_size"] == 100
+    reduced = reducer.fit_transform(_embeddings(300))
+    assert reduced.shape == (300, 5)
+    assert reducer.umap_model.embedding_.shape == (100, 5)
+
+
+def test_unknown_reducer():
+    with pytest.raises(ValueError, match="Unknown reducer"):
+        make_reducer("tsne", 100)
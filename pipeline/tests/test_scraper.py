@@ -0,0 +1,529 @@
+import threading
+import time
+
+from backend.models import RawPost, ScrapeWatermark
+from pipeline.archive import iter_archive_files, read_archive_file
+from pipeline.config import PipelineConfig
+from pipeline.db import bulk_insert_raw_posts, create_pipeline_run, ensure_tables, get_session, get_watermarks
+from pipeline.refresh import refresh_scores_apify, refresh_scores_direct
+from pipeline.reingest import reingest
+from pipeline.scraper import group_apify_pages, prefetch, run_scraper, scrape_direct
+
+
+class FakeApifyClient:
+    """Stands in for ApifyClient: one dataset per subreddit, optional failures."""
+
+    def __init__(self, datasets, fail=(), delay=0.0):
+        self.datasets = datasets
+        self.fail = set(fail)
+        self.delay = delay
+        self.inputs = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def actor(self, name):
+        return self
+
+    def start(self, run_input):
+        subreddit = run_input["startUrls"][0]["url"].split("/r/")[1].split("/")[0]
+        with self._lock:
+            self.inputs.append(run_input)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return {"id": f"run-{subreddit}", "defaultDatasetId": subreddit}
+
+    def run(self, run_id):
+        return FakeRun(self, run_id.removeprefix("run-"))
+
+    def dataset(self, dataset_id):
+        return FakeDataset(self.datasets[dataset_id])
+
+
+class FakeRun:
+    def __init__(self, client, subreddit):
+        self.client = client
+        self.subreddit = subreddit
+
+    def wait_for_finish(self):
+        try:
+            time.sleep(self.client.delay)
+            if self.subreddit in self.client.fail:
+                raise RuntimeError("actor run timed out")
+            return {"id": f"run-{self.subreddit}", "defaultDatasetId": self.subreddit}
+        finally:
+            with self.client._lock:
+                self.client.in_flight -= 1
+
+
+class FakeDataset:
+    def __init__(self, items):
+        self.all_items = items
+        self.items = []
+        self.requested_limits = []
+
+    def list_items(self, offset=0, limit=None):
+        self.requested_limits.append(limit)
+        end = None if limit is None else offset + limit
+        self.items = self.all_items[offset:end]
+        return self
+
+
+def apify_items(subreddit, n):
+    items = []
+    for i in range(n):
+        full_id = f"t3_{subreddit}{i}"
+        items.append({
+            "dataType": "post",
+            "id": full_id,
+            "parsedId": f"{subreddit}{i}",
+            "title": f"Post {i} in {subreddit}",
+            "body": "body",
+            "upVotes": i,
+            "createdAt": "2025-06-01T12:00:00.000Z",
+        })
+        items.append({"dataType": "comment", "postId": full_id, "body": "a comment"})
+    return items
+
+
+def make_config(tmp_path, subreddits, concurrency):
+    config = PipelineConfig()
+    config.DATABASE_URL = f"sqlite:///{tmp_path / 'scrape.db'}"
+    config.TARGET_SUBREDDITS = subreddits
+    config.APIFY_MAX_CONCURRENT_RUNS = concurrency
+    config.BRIGHTDATA_PROXY_HOST = ""
+    config.RAW_ARCHIVE_DIR = str(tmp_path / "archive")
+    ensure_tables(config.DATABASE_URL)
+    return config
+
+
+def test_run_scraper_bounds_concurrent_actor_runs(tmp_path):
+    subs = [f"sub{i}" for i in range(6)]
+    config = make_config(tmp_path, subs, concurrency=3)
+    client = FakeApifyClient({s: apify_items(s, 4) for s in subs}, delay=0.1)
+
+    total, metrics = run_scraper(config, client=client)
+
+    assert client.max_in_flight == 3
+    assert total == 24
+    assert list(metrics["threads_per_subreddit"]) == subs
+    assert metrics["total_comments_collected"] == 24
+    assert metrics["posts_inserted"] == 24
+
+
+def test_run_scraper_isolates_failed_subreddit(tmp_path):
+    subs = ["a", "b", "c"]
+    config = make_config(tmp_path, subs, concurrency=2)
+    client = FakeApifyClient({s: apify_items(s, 2) for s in subs}, fail={"b"})
+
+    total, metrics = run_scraper(config, client=client)
+
+    assert metrics["threads_per_subreddit"] == {"a": 2, "c": 2}
+    assert metrics["subreddits_failed"] == [{"subreddit": "b", "error": "actor run timed out"}]
+    assert metrics["subreddits_successfully_scraped"] == 2
+    session = get_session(config.DATABASE_URL)
+    assert session.query(RawPost).count() == 4
+    session.close()
+
+
+def make_direct_config(tmp_path, stub, subreddits, rate=20.0, concurrency=4):
+    config = make_config(tmp_path, subreddits, concurrency=1)
+    config.REDDIT_BASE_URL = stub.base_url
+    config.DIRECT_REQUESTS_PER_SECOND = rate
+    config.DIRECT_MAX_CONCURRENT_SUBREDDITS = concurrency
+    config.DIRECT_COMMENT_WORKERS = 0
+    return config
+
+
+def test_scrape_direct_paginates_subreddits_concurrently(tmp_path, reddit_stub):
+    subs = ["a", "b", "c"]
+    for sub in subs:
+        reddit_stub.add_subreddit(sub, 250)
+    config = make_direct_config(tmp_path, reddit_stub, subs)
+
+    total, metrics = scrape_direct(config)
+
+    assert total == 750
+    assert metrics["threads_per_subreddit"] == {"a": 250, "b": 250, "c": 250}
+    assert metrics["posts_inserted"] == 750
+    # Pages from different subreddits interleave instead of running back to back
+    first_pages = [path.split("/")[2] for _, path in reddit_stub.requests[:3]]
+    assert sorted(first_pages) == subs
+
+
+def test_scrape_direct_reports_cross_posts_separately(tmp_path, reddit_stub):
+    reddit_stub.add_subreddit("a", 20)
+    reddit_stub.add_subreddit("b", 20)
+    reddit_stub.posts["b"][3].update(title=reddit_stub.posts["a"][5]["title"], selftext="Same text, cross-posted")
+    reddit_stub.posts["a"][5]["selftext"] = "Same text, cross-posted"
+    config = make_direct_config(tmp_path, reddit_stub, ["a", "b"])
+
+    total, metrics = scrape_direct(config)
+    assert total == 40
+    assert metrics["posts_inserted"] == 39
+    assert metrics["posts_skipped_duplicate_content"] == 1
+    assert metrics["posts_skipped_existing"] == 0
+
+    _, metrics = scrape_direct(config)
+    assert metrics["posts_skipped_existing"] == 39
+    assert metrics["posts_skipped_duplicate_content"] == 1
+
+
+def test_scrape_direct_respects_shared_rate_limit(tmp_path, reddit_stub):
+    subs = ["a", "b", "c", "d"]
+    for sub in subs:
+        reddit_stub.add_subreddit(sub, 200)
+    config = make_direct_config(tmp_path, reddit_stub, subs, rate=20.0)
+
+    scrape_direct(config)
+
+    times = [t for t, _ in reddit_stub.requests]
+    assert len(times) == 8
+    # 8 requests at 20 req/s need at least 7 intervals of 50ms, but no idle sleep
+    assert times[-1] - times[0] >= 7 / 20 * 0.9
+    assert times[-1] - times[0] < 1.5
+
+
+def test_scrape_direct_slows_down_on_ratelimit_headers(tmp_path, reddit_stub):
+    reddit_stub.add_subreddit("a", 300)
+    reddit_stub.ratelimit_remaining = "300"  # 300 requests per 60s window = 5 req/s
+    config = make_direct_config(tmp_path, reddit_stub, ["a"], rate=50.0)
+
+    scrape_direct(config)
+
+    times = [t for t, _ in reddit_stub.requests]
+    assert times[2] - times[1] >= 1 / 5 * 0.9
+
+
+def test_scrape_direct_honours_retry_after(tmp_path, reddit_stub):
+    reddit_stub.add_subreddit("a", 50)
+    reddit_stub.throttle_once.add("a")
+    config = make_direct_config(tmp_path, reddit_stub, ["a"])
+
+    total, metrics = scrape_direct(config)
+
+    assert total == 50
+    assert metrics["subreddits_failed"] == []
+    assert reddit_stub.requests[1][0] - reddit_stub.requests[0][0] >= 0.9
+
+
+def test_scrape_direct_isolates_failed_subreddit(tmp_path, reddit_stub):
+    reddit_stub.add_subreddit("a", 10)
+    config = make_direct_config(tmp_path, reddit_stub, ["a", "missing"])
+
+    total, metrics = scrape_direct(config)
+
+    assert metrics["threads_per_subreddit"] == {"a": 10}
+    assert metrics["subreddits_failed"][0]["subreddit"] == "missing"
+
+
+def test_incremental_direct_scrape_stops_at_watermark(tmp_path, reddit_stub):
+    reddit_stub.add_subreddit("a", 300)
+    config = make_direct_config(tmp_path, reddit_stub, ["a"])
+    session = get_session(config.DATABASE_URL)
+    run = create_pipeline_run(session)
+
+    scrape_direct(config, incremental=True, pipeline_run_id=run.id)
+    first_run_requests = len(reddit_stub.requests)
+    assert first_run_requests == 3  # no watermark yet: full top listing
+    assert get_watermarks(session)["a"][1] == "a0"
+
+    reddit_stub.prepend_posts("a", 5)
+    total, metrics = scrape_direct(config, incremental=True, pipeline_run_id=run.id)
+
+    assert metrics["subreddits_incremental"] == ["a"]
+    assert metrics["posts_inserted"] == 5
+    second_run = reddit_stub.requests[first_run_requests:]
+    assert len(second_run) == 1
+    assert "/r/a/new.json" in second_run[0][1]
+    assert get_watermarks(session)["a"][1] == "anew0"
+    wm = session.query(ScrapeWatermark).filter_by(subreddit="a").one()
+    assert wm.pipeline_run_id == run.id
+    session.close()
+
+
+def test_incremental_apify_scrape_uses_new_sort_since_watermark(tmp_path):
+    config = make_config(tmp_path, ["a"], concurrency=1)
+    client = FakeApifyClient({"a": apify_items("a", 3)})
+
+    run_scraper(config, client=client, incremental=True)
+    run_scraper(config, client=client, incremental=True)
+
+    first, second = client.inputs
+    assert first["sort"] == "top"
+    assert second["sort"] == "new"
+    assert second["postDateLimit"].startswith("2025-06-01T12:00:00")
+
+
+def test_group_apify_pages_matches_comments_across_page_boundaries():
+    items = apify_items("a", 3)
+    # post a0 | its comment lands on the next page with post a1 ...
+    pages = [items[0:1], items[1:3], items[3:5], items[5:6]]
+    stats = {"comments": 0, "late_comments": 0, "dates": []}
+
+    batches = [rows for rows, _, _ in group_apify_pages(iter(pages), "a", stats) if rows]
+
+    rows = [row for batch in batches for row in batch]
+    assert [r["reddit_id"] for r in rows] == ["a0", "a1", "a2"]
+    assert all(r["top_comments"] == ["a comment"] for r in rows)
+    assert len(batches) > 1  # posts are released before the dataset ends
+    assert stats["comments"] == 3
+
+
+def test_group_apify_pages_counts_late_comments():
+    post, comment = apify_items("a", 1)
+    stats = {"comments": 0, "late_comments": 0, "dates": []}
+
+    rows = [r for batch, _, _ in group_apify_pages(iter([[post], [], [comment]]), "a", stats) for r in batch]
+
+    assert rows[0]["top_comments"] == []
+    assert stats["late_comments"] == 1
+
+
+def test_prefetch_preserves_order_and_propagates_errors():
+    def pages():
+        yield 1
+        yield 2
+        raise RuntimeError("dataset fetch failed")
+
+    seen = []
+    try:
+        for page in prefetch(pages()):
+            seen.append(page)
+    except RuntimeError as e:
+        assert str(e) == "dataset fetch failed"
+    assert seen == [1, 2]
+
+
+def test_run_scraper_reads_dataset_in_pages(tmp_path):
+    config = make_config(tmp_path, ["a"], concurrency=1)
+    config.APIFY_DATASET_PAGE_SIZE = 4
+    client = FakeApifyClient({"a": apify_items("a", 10)})
+    datasets = {}
+    client.dataset = lambda dataset_id: datasets.setdefault(dataset_id, FakeDataset(client.datasets[dataset_id]))
+
+    total, metrics = run_scraper(config, client=client)
+
+    assert total == 10
+    assert metrics["total_comments_collected"] == 10
+    assert datasets["a"].requested_limits == [4] * 6  # 20 items, then an empty page
+
+
+def test_group_apify_pages_resume_point_replays_exactly():
+    items = apify_items("a", 12)
+    pages = [items[i:i + 5] for i in range(0, len(items), 5)]
+    full = [r for rows, _, _ in group_apify_pages(iter(pages), "a", {"comments": 0, "late_comments": 0, "dates": []}) for r in rows]
+
+    # Stop after the third page, then resume from the reported checkpoint
+    stream = group_apify_pages(iter(pages), "a", {"comments": 0, "late_comments": 0, "dates": []})
+    first = []
+    for i, (rows, resume_page, carry_ids) in enumerate(stream):
+        first.extend(rows)
+        if i == 2:
+            break
+    rest = [
+        r for rows, _, _ in group_apify_pages(
+            iter(pages[resume_page:]), "a", {"comments": 0, "late_comments": 0, "dates": []}, skip_ids=carry_ids
+        )
+        for r in rows
+    ]
+
+    assert first + rest == full
+
+
+class FlakyDataset(FakeDataset):
+    def __init__(self, items, fail_at_offset):
+        super().__init__(items)
+        self.fail_at_offset = fail_at_offset
+        self.offsets = []
+
+    def list_items(self, offset=0, limit=None):
+        self.offsets.append(offset)
+        if self.fail_at_offset is not None and offset >= self.fail_at_offset:
+            raise RuntimeError("dataset read failed")
+        return super().list_items(offset, limit)
+
+
+def test_run_scraper_resumes_from_journal_without_rerunning_actors(tmp_path):
+    config = make_config(tmp_path, ["a", "b"], concurrency=2)
+    config.APIFY_DATASET_PAGE_SIZE = 4
+    client = FakeApifyClient({"a": apify_items("a", 2), "b": apify_items("b", 10)})
+    flaky = FlakyDataset(client.datasets["b"], fail_at_offset=12)
+    client.dataset = lambda dataset_id: flaky if dataset_id == "b" else FakeDataset(client.datasets[dataset_id])
+
+    _, first = run_scraper(config, client=client)
+    assert first["subreddits_failed"][0]["subreddit"] == "b"
+    assert len(client.inputs) == 2
+
+    flaky.fail_at_offset = None
+    flaky.offsets.clear()
+    total, metrics = run_scraper(config, client=client, resume=True)
+
+    assert len(client.inputs) == 2  # no actor run started twice
+    assert metrics["scrape_id"] == first["scrape_id"]
+    assert metrics["subreddits_resumed"] == ["a", "b"]
+    assert flaky.offsets[0] > 0
+    assert metrics["threads_per_subreddit"] == {"a": 2, "b": 10}
+    assert metrics["posts_inserted"] == 12
+    assert metrics["total_comments_collected"] == 12
+    session = get_session(config.DATABASE_URL)
+    assert session.query(RawPost).count() == 12
+    session.close()
+
+
+def test_scrape_direct_resumes_after_last_committed_page(tmp_path, reddit_stub):
+    reddit_stub.add_subreddit("a", 100)
+    reddit_stub.add_subreddit("b", 350)
+    reddit_stub.fail_from_request["b"] = 3
+    config = make_direct_config(tmp_path, reddit_stub, ["a", "b"])
+
+    _, first = scrape_direct(config)
+    assert first["threads_per_subreddit"] == {"a": 100}
+    served = len(reddit_stub.requests)
+
+    del reddit_stub.fail_from_request["b"]
+    total, metrics = scrape_direct(config, resume=True)
+
+    resumed = [path for _, path in reddit_stub.requests[served:]]
+    assert all("/r/b/" in path for path in resumed)  # r/a is not fetched again
+    assert "after=t3_b199" in resumed[0]
+    assert metrics["threads_per_subreddit"] == {"a": 100, "b": 350}
+    assert metrics["posts_inserted"] == 450
+    assert total == 450
+
+
+def _stored_posts(config):
+    session = get_session(config.DATABASE_URL)
+    try:
+        return {
+            p.reddit_id: (p.subreddit, p.title, p.upvotes, p.top_comments)
+            for p in session.query(RawPost).all()
+        }
+    finally:
+        session.close()
+
+
+def _clear_posts(config):
+    session = get_session(config.DATABASE_URL)
+    session.query(RawPost).delete()
+    session.commit()
+    session.close()
+
+
+def test_apify_archive_reingests_to_identical_rows(tmp_path):
+    config = make_config(tmp_path, ["a", "b"], concurrency=2)
+    config.APIFY_DATASET_PAGE_SIZE = 4
+    client = FakeApifyClient({"a": apify_items("a", 10), "b": apify_items("b", 3)})
+    run_scraper(config, client=client)
+    scraped = _stored_posts(config)
+
+    files = list(iter_archive_files(config.RAW_ARCHIVE_DIR))
+    assert [(source, sub) for source, sub, _, _ in files] == [("apify", "a"), ("apify", "b")]
+    assert list(read_archive_file(files[0][3])) == apify_items("a", 10)
+
+    _clear_posts(config)
+    metrics = reingest(config)
+
+    assert metrics["files_read"] == 2
+    assert metrics["posts_inserted"] == 13
+    assert _stored_posts(config) == scraped
+    assert reingest(config, source="apify", subreddit="a")["posts_skipped_existing"] == 10
+
+
+def test_direct_archive_reingests_listing_pages_and_comments(tmp_path, reddit_stub):
+    reddit_stub.add_subreddit("a", 150)
+    reddit_stub.comments = {f"a{i}": [f"comment {i}"] for i in range(0, 150, 3)}
+    config = make_direct_config(tmp_path, reddit_stub, ["a"])
+    config.DIRECT_COMMENT_WORKERS = 4
+    scrape_direct(config)
+    scraped = _stored_posts(config)
+    assert scraped["a3"][3] == ["comment 3"]
+
+    files = {source: path for source, sub, _, path in iter_archive_files(config.RAW_ARCHIVE_DIR)}
+    assert len(list(read_archive_file(files["direct"]))) == 2  # one line per listing page
+    assert len(list(read_archive_file(files["direct_comments"]))) == 150  # one line per comment thread
+
+    _clear_posts(config)
+    metrics = reingest(config)
+    assert metrics["files_read"] == 1
+    assert metrics["posts_inserted"] == 150
+    assert _stored_posts(config) == scraped
+
+
+def test_refresh_scores_direct_updates_changed_upvotes(tmp_path, reddit_stub):
+    reddit_stub.add_subreddit("a", 150)
+    config = make_direct_config(tmp_path, reddit_stub, ["a"])
+    scrape_direct(config)
+    for post in reddit_stub.posts["a"][:5]:
+        post["ups"] += 1000
+    reddit_stub.requests.clear()
+
+    metrics = refresh_scores_direct(config)
+
+    assert metrics["posts_checked"] == 150
+    assert metrics["posts_returned"] == 150
+    assert metrics["posts_updated"] == 5
+    assert all(path.startswith("/by_id/") for _, path in reddit_stub.requests)
+    assert len(reddit_stub.requests) == 2  # 100 ids per request
+    assert _stored_posts(config)["a0"][2] == 1150
+
+
+def test_refresh_scores_apify_updates_scores_and_comments(tmp_path):
+    config = make_config(tmp_path, ["a"], concurrency=1)
+    run_scraper(config, client=FakeApifyClient({"a": apify_items("a", 4)}))
+
+    items = apify_items("a", 5)  # one post not stored yet
+    items[0]["upVotes"] = 500
+    items[3]["body"] = "a newer comment"
+    metrics = refresh_scores_apify(config, client=FakeApifyClient({"a": items}))
+
+    stored = _stored_posts(config)
+    assert metrics["posts_updated"] == 2
+    assert "a4" not in stored
+    assert stored["a0"][2] == 500
+    assert stored["a1"][3] == ["a newer comment"]
+
+
+def test_scrape_direct_fetches_comments_for_new_posts_only(tmp_path, reddit_stub):
+    reddit_stub.add_subreddit("a", 30)
+    reddit_stub.comments = {f"a{i}": [f"comment {j}" for j in range(7)] for i in range(30)}
+    reddit_stub.fail_comments = {"a7"}
+    config = make_direct_config(tmp_path, reddit_stub, ["a"])
+    config.DIRECT_COMMENT_WORKERS = 4
+    config.MAX_POSTS_PER_SUBREDDIT = 10
+    session = get_session(config.DATABASE_URL)
+    bulk_insert_raw_posts(session, [{
+        "reddit_id": "a3", "subreddit": "a", "title": "stored", "body": "", "top_comments": ["old"],
+        "upvotes": 0, "url": "", "author": "", "created_utc": None,
+    }])
+    session.commit()
+    session.close()
+
+    total, metrics = scrape_direct(config)
+
+    comment_paths = sorted(path for _, path in reddit_stub.requests if path.startswith("/comments/"))
+    assert len(comment_paths) == 29  # every post on the page except the stored one
+    assert "limit=5" in comment_paths[0] and "depth=1" in comment_paths[0]
+    stored = _stored_posts(config)
+    assert stored["a0"][3] == [f"comment {j}" for j in range(5)]
+    assert stored["a3"][3] == ["old"]
+    assert stored["a7"][3] == []
+    assert metrics["comment_fetch_failures"] == 1
+    assert metrics["total_comments_collected"] == 28 * 5
+
+
+def test_scrape_direct_keeps_post_when_comments_are_not_json(tmp_path, reddit_stub):
+    reddit_stub.add_subreddit("a", 10)
+    reddit_stub.comments = {f"a{i}": ["a comment"] for i in range(10)}
+    reddit_stub.html_comments = {"a4"}
+    config = make_direct_config(tmp_path, reddit_stub, ["a"])
+    config.DIRECT_COMMENT_WORKERS = 4
+
+    total, metrics = scrape_direct(config)
+
+    stored = _stored_posts(config)
+    assert total == 10
+    assert stored["a4"][3] == []
+    assert stored["a5"][3] == ["a comment"]
+    assert metrics["comment_fetch_failures"] == 1
+    assert metrics["subreddits_failed"] == []
@@ -0,0 +1,45 @@
+import pytest
+
+from backend.models import RawPost
+from pipeline.preprocessor import load_and_preprocess
+from pipeline.snapshot import latest_snapshot, read_snapshot, read_snapshot_info, write_snapshot
+
+
+def _seed(db_session):
+    db_session.add_all([
+        RawPost(
+            reddit_id=f"p{i}", subreddit=["Parenting", "Mommit"][i % 2],
+            title=f"My son has meltdowns and anxiety at school, day {i}",
+            body=f"We tried therapy and nothing works. He is so frustrated, week {i}.", upvotes=i,
+        )
+        for i in range(8)
+    ])
+    db_session.commit()
+
+
+def test_snapshot_round_trips_corpus_and_metrics(db_session, tmp_path):
+    _seed(db_session)
+    for mode in (None, "build_legends"):
+        df, metrics = load_and_preprocess(db_session, filter_mode=mode)
+
+        path = write_snapshot(df, metrics, str(tmp_path), mode, pipeline_run_id=7)
+        loaded_df, loaded_metrics = read_snapshot(path, mode)
+
+        assert loaded_df.equals(df.reset_index(drop=True))
+        assert dict(loaded_df.dtypes) == dict(df.dtypes)
+        assert loaded_metrics == metrics
+        assert read_snapshot_info(path)["pipeline_run_id"] == 7
+
+
+def test_latest_snapshot_is_per_mode(tmp_path, db_session):
+    _seed(db_session)
+    df, metrics = load_and_preprocess(db_session)
+    assert latest_snapshot(str(tmp_path), None) is None
+
+    write_snapshot(df, metrics, str(tmp_path), None, pipeline_run_id=9)
+    newest = write_snapshot(df, metrics, str(tmp_path), None, pipeline_run_id=10)
+
+    assert latest_snapshot(str(tmp_path), None) == newest
+    assert latest_snapshot(str(tmp_path), "build_legends") is None
+    with pytest.raises(ValueError, match="filter mode"):
+        read_snapshot(newest, "build_legends")
@@ -1,4 +1,8 @@
-from pipeline.topic_modeler import DOMAIN_STOP_WORDS
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.topic_modeler import DOMAIN_STOP_WORDS, CorpusEmbeddings
 
 
 def test_domain_stop_words_exist():
@@ -11,3 +15,13 @@ def test_domain_stop_words_exist():
 
 def test_domain_stop_words_no_duplicates():
     assert len(DOMAIN_STOP_WORDS) == len(set(DOMAIN_STOP_WORDS))
+
+
+def test_corpus_embeddings_take_rows_by_post_id():
+    vectors = np.arange(12, dtype=np.float32).reshape(4, 3)
+    embeddings = CorpusEmbeddings(pd.Index([10, 11, 12, 13]), vectors, model=None, stats={})
+
+    assert embeddings.take(pd.Series([10, 11, 12, 13])) is vectors
+    assert embeddings.take([13, 10]).tolist() == [[9, 10, 11], [0, 1, 2]]
+    with pytest.raises(KeyError):
+        embeddings.take([10, 99])
@@ -0,0 +1,87 @@
+"""Text helpers shared by ingest (pipeline.db) and preprocessing.
+
+Only the standard library, so the DB layer can hash and score posts without
+importing pandas or the preprocessing keyword tries.
+"""
+import hashlib
+import re
+
+# Pain signal keywords — phrases indicating struggle, desperation, negative emotion.
+# Used to prioritize negative/complaint posts over positive/advice posts.
+PAIN_SIGNAL_KEYWORDS = [
+    "nothing works", "at my wits end", "at my wit's end", "desperate",
+    "don't know what to do", "i don't know what", "i'm lost",
+    "struggling", "exhausted", "can't do this", "breaking point",
+    "tried everything", "what am i doing wrong", "falling apart",
+    "don't know how", "going to break", "scared", "worried sick",
+    "can't handle", "out of control", "every day is a battle",
+    "i'm failing", "feel like a failure", "helpless", "hopeless",
+    "at a loss", "no idea what to do", "cried", "crying",
+    "so frustrated", "ready to give up", "it's getting worse",
+    "rock bottom", "end of my rope", "i can't take it",
+    "tearing our family apart", "ruining", "destroying",
+    "i hate that", "breaks my heart", "kills me to see",
+    "watching him struggle", "watching her struggle",
+]
+
+_PAIN_PATTERN = re.compile(
+    r'\b(?:' + '|'.join(re.escape(kw) for kw in sorted(PAIN_SIGNAL_KEYWORDS, key=len, reverse=True)) + r')\b',
+    re.IGNORECASE,
+)
+
+
+def compute_pain_score(text: str) -> float:
+    """Score how much a post expresses pain/struggle (0.0-1.0)."""
+    if not text:
+        return 0.0
+    matches = _PAIN_PATTERN.findall(text.lower())
+    return _pain_score(set(matches))
+
+
+def _pain_score(unique_matches: set[str]) -> float:
+    # Normalize: each unique keyword match adds signal, cap at 1.0
+    return min(1.0, len(unique_matches) / 3.0)
+
+
+def clean_text(text: str) -> str:
+    """Strip URLs, markdown formatting, collapse whitespace."""
+    if not text:
+        return ""
+    # Remove URLs
+    text = re.sub(r"https?://\S+", "", text)
+    # Remove markdown links [text](url)
+    text = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", text)
+    # Remove markdown bold/italic
+    text = re.sub(r"[*_]{1,3}([^*_]+)[*_]{1,3}", r"\1", text)
+    # Remove markdown headers
+    text = re.sub(r"^#{1,6}\s+", "", text, flags=re.MULTILINE)
+    # Remove blockquotes
+    text = re.sub(r"^>\s*", "", text, flags=re.MULTILINE)
+    # Collapse whitespace
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def compute_content_hash(title: str | None, body: str | None) -> str | None:
+    """Normalized hash of a post's title + body, shared by cross-posts and reposts.
+
+    Case, punctuation, markdown, URLs and whitespace are ignored. Posts without
+    a body return None: a bare title ("Help!") is too weak to call a duplicate.
+    """
+    body = clean_text(body or "")
+    if not body:
+        return None
+    normalized = _NON_WORD.sub(" ", f"{clean_text(title or '')} {body}".lower()).strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def compute_post_pain_score(title: str | None, body: str | None) -> float:
+    """``compute_pain_score`` of a post's title + body, as stored in raw_posts.pain_score.
+
+    Comments are left out: refresh replaces them, while title and body never
+    change once a post is stored.
+    """
+    return compute_pain_score(f"{title or ''} {body or ''}")
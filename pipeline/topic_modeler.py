@@ -1,15 +1,20 @@
 import logging
 import time
+from functools import partial
+from typing import Callable, NamedTuple
 
 import numpy as np
 import pandas as pd
 from bertopic import BERTopic
+from bertopic.backend import BaseEmbedder
 from hdbscan import HDBSCAN
 from sentence_transformers import SentenceTransformer
 from sklearn.feature_extraction.text import CountVectorizer
-from umap import UMAP
 
 from pipeline.config import PipelineConfig
+from pipeline.embedding_pool import EmbeddingPool
+from pipeline.embedding_store import EmbeddingStore
+from pipeline.reducers import make_reducer
 
 logger = logging.getLogger(__name__)
 
@@ -57,10 +62,93 @@ BUILD_LEGENDS_EXTRA_STOP_WORDS = [
 ]
 
 
+def load_embedding_model(config: PipelineConfig, threads: int = 0) -> SentenceTransformer | BaseEmbedder:
+    """``config.EMBEDDING_MODEL`` on the ``config.EMBEDDING_BACKEND`` backend.
+
+    ``threads`` sets ONNX Runtime's intra-op threads (0 = its default).
+    """
+    if config.EMBEDDING_BACKEND == "torch":
+        return SentenceTransformer(config.EMBEDDING_MODEL)
+    if config.EMBEDDING_BACKEND == "onnx-int8":
+        from pipeline.onnx_embedder import OnnxInt8Embedder
+        return OnnxInt8Embedder.load(config.EMBEDDING_MODEL, config.EMBEDDING_ONNX_DIR, threads)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND {config.EMBEDDING_BACKEND!r} (expected 'torch' or 'onnx-int8')")
+
+
+def embed_documents(
+    documents: list[str],
+    encode: Callable[[list[str]], np.ndarray],
+    config: PipelineConfig,
+    new_generation: bool = True,
+) -> tuple[np.ndarray, dict]:
+    """Embed ``documents`` with ``encode``, reusing the on-disk embedding cache when one is configured.
+
+    ``new_generation`` is passed to ``EmbeddingStore.embed``. Returns
+    (embeddings, cache stats).
+    """
+    if not config.EMBEDDING_CACHE_DIR:
+        return np.asarray(encode(documents)), {}
+    # Backends give slightly different vectors, so each has its own cache
+    cache_key = config.EMBEDDING_MODEL
+    if config.EMBEDDING_BACKEND != "torch":
+        cache_key += f"@{config.EMBEDDING_BACKEND}"
+    store = EmbeddingStore(config.EMBEDDING_CACHE_DIR, cache_key, config.EMBEDDING_CACHE_MAX_IDLE_RUNS)
+    return store.embed(documents, encode, new_generation)
+
+
+class CorpusEmbeddings(NamedTuple):
+    """One run's document embeddings, indexed by post_id, and the model that made them."""
+
+    post_ids: pd.Index
+    vectors: np.ndarray
+    model: SentenceTransformer | BaseEmbedder
+    stats: dict  # embedding cache stats, reported with the topic modeling metrics
+
+    def take(self, post_ids) -> np.ndarray:
+        """Embedding rows for ``post_ids``, in that order (the matrix itself if it already is)."""
+        post_ids = pd.Index(post_ids)
+        if post_ids.equals(self.post_ids):
+            return self.vectors
+        rows = self.post_ids.get_indexer(post_ids)
+        if (rows < 0).any():
+            raise KeyError(f"{int((rows < 0).sum())} posts were not embedded in this run")
+        return self.vectors[rows]
+
+
+def embed_corpus(
+    df: pd.DataFrame,
+    config: PipelineConfig,
+    embedding_model: SentenceTransformer | BaseEmbedder | None = None,
+    new_generation: bool = True,
+) -> CorpusEmbeddings:
+    """Embed every document of the preprocessed corpus once, for all stages of a run.
+
+    With ``config.EMBEDDING_WORKERS`` > 1, documents the cache doesn't have
+    are encoded by a pool of worker processes. Pass ``embedding_model`` if
+    it is already loaded, and ``new_generation=False`` if ``df`` is only
+    part of the corpus, so the embedding cache doesn't evict the rest.
+    """
+    # Loaded here even with workers: BERTopic keeps it, and the ONNX export happens once, before they start
+    if embedding_model is None:
+        embedding_model = load_embedding_model(config)
+    documents = df["document"].tolist()
+    if config.EMBEDDING_WORKERS > 1:
+        with EmbeddingPool(config, config.EMBEDDING_WORKERS, config.EMBEDDING_THREADS_PER_WORKER) as pool:
+            vectors, stats = embed_documents(documents, pool.encode, config, new_generation)
+    else:
+        encode = partial(embedding_model.encode, show_progress_bar=False)
+        vectors, stats = embed_documents(documents, encode, config, new_generation)
+    return CorpusEmbeddings(pd.Index(df["post_id"]), vectors, embedding_model, stats)
+
+
 def run_topic_modeling(
-    df: pd.DataFrame, config: PipelineConfig, mode: str = "default"
+    df: pd.DataFrame, config: PipelineConfig, mode: str = "default", embeddings: CorpusEmbeddings | None = None
 ) -> tuple[BERTopic, pd.DataFrame, dict]:
-    """Run BERTopic on preprocessed documents. Returns (model, results_df, metrics)."""
+    """Run BERTopic on preprocessed documents. Returns (model, results_df, metrics).
+
+    Pass ``embeddings`` from ``embed_corpus`` to reuse them in later stages;
+    otherwise the documents are embedded here.
+    """
     start_time = time.time()
     documents = df["document"].tolist()
 
@@ -88,16 +176,19 @@ def run_topic_modeling(
             f"min_samples={min_samples}, n_neighbors={n_neighbors}"
         )
 
-    # Embedding model
-    embedding_model = SentenceTransformer(config.EMBEDDING_MODEL)
+    # Embeddings; documents seen by earlier runs come from the embedding cache
+    if embeddings is None:
+        embeddings = embed_corpus(df, config)
+    embedding_model = embeddings.model
+    vectors = embeddings.take(df["post_id"])
 
-    # UMAP
-    umap_model = UMAP(
+    # Dimensionality reduction (UMAP unless config.TOPIC_REDUCER picks a faster one)
+    reducer, reducer_params = make_reducer(
+        config.TOPIC_REDUCER,
+        len(documents),
         n_neighbors=n_neighbors,
-        n_components=5,
-        min_dist=0.0,
-        metric="cosine",
-        random_state=42,
+        linear_components=config.REDUCER_LINEAR_COMPONENTS,
+        sample_size=config.REDUCER_SAMPLE_SIZE,
     )
 
     # Clustering model
@@ -130,7 +221,7 @@ def run_topic_modeling(
     # BERTopic
     topic_model = BERTopic(
         embedding_model=embedding_model,
-        umap_model=umap_model,
+        umap_model=reducer,
         hdbscan_model=cluster_model,
         vectorizer_model=vectorizer,
         nr_topics=None if mode == "build_legends" else num_topics,
@@ -138,12 +229,10 @@ def run_topic_modeling(
         verbose=True,
     )
 
-    topics, probs = topic_model.fit_transform(documents)
+    topics, probs = topic_model.fit_transform(documents, embeddings=vectors)
 
-    # Add results to dataframe
-    df = df.copy()
-    df["topic"] = topics
-    df["probability"] = probs if probs is not None else [None] * len(topics)
+    # Add results to dataframe (assign shares the corpus columns instead of copying them)
+    df = df.assign(topic=topics, probability=probs if probs is not None else [None] * len(topics))
 
     # Metrics
     unique_topics = set(topics)
@@ -152,14 +241,12 @@ def run_topic_modeling(
 
     metrics = {
         "embedding_model": config.EMBEDDING_MODEL,
-        "embedding_dimensions": 384,
+        "embedding_backend": config.EMBEDDING_BACKEND,
+        "embedding_workers": config.EMBEDDING_WORKERS,
+        "embedding_dimensions": int(vectors.shape[1]),
+        **embeddings.stats,
         "mode": mode,
-        "umap_params": {
-            "n_neighbors": n_neighbors,
-            "n_components": 5,
-            "min_dist": 0.0,
-            "metric": "cosine",
-        },
+        "reducer_params": reducer_params,
         "hdbscan_params": {
             "min_cluster_size": min_cluster_size,
             "min_samples": min_samples,
@@ -179,6 +266,16 @@ def run_topic_modeling(
     return topic_model, df, metrics
 
 
+def assign_topics(topic_model: BERTopic, df: pd.DataFrame, embeddings: CorpusEmbeddings) -> pd.DataFrame:
+    """Assign documents to a fitted model's topics, without refitting.
+
+    Returns ``df`` with ``topic`` and ``probability`` columns, as
+    ``run_topic_modeling`` does.
+    """
+    topics, probs = topic_model.transform(df["document"].tolist(), embeddings=embeddings.take(df["post_id"]))
+    return df.assign(topic=topics, probability=probs)
+
+
 def extract_topic_data(
     topic_model: BERTopic, df: pd.DataFrame, num_topics: int = 20
 ) -> list[dict]:
@@ -1,4 +1,8 @@
-"""Scrape all subreddits, then re-run topic modeling + GPT to update dashboard."""
+"""Incrementally scrape all subreddits, then re-run topic modeling + GPT to update dashboard.
+
+Subreddits with a scrape watermark only fetch posts newer than it; subreddits
+scraped for the first time get the full top-of-year listing.
+"""
 import logging
 import time
 from datetime import datetime, timezone
@@ -12,8 +16,10 @@ from pipeline.db import (
     store_topic,
     update_pipeline_run,
 )
+from pipeline.model_store import save_topic_model
 from pipeline.preprocessor import load_and_preprocess
 from pipeline.scraper import run_scraper
+from pipeline.snapshot import write_snapshot
 from pipeline.summarizer import summarize_all_topics
 from pipeline.topic_modeler import extract_topic_data, run_topic_modeling
 from sqlalchemy import text
@@ -26,13 +32,6 @@ logger = logging.getLogger(__name__)
 
 config = PipelineConfig()
 
-# Only scrape subreddits we don't already have data for
-ALREADY_SCRAPED = {
-    "Parenting", "Mommit", "daddit", "beyondthebump",
-    "toddlers", "NewParents", "Preschoolers", "ScienceBasedParenting",
-}
-NEW_SUBS = [s for s in config.TARGET_SUBREDDITS if s not in ALREADY_SCRAPED]
-
 ensure_tables(config.DATABASE_URL)
 session = get_session(config.DATABASE_URL)
 
@@ -41,19 +40,16 @@ methodology = {}
 
 run = create_pipeline_run(session, config_dict={
     "target": "6000 posts",
-    "new_subreddits": NEW_SUBS,
+    "incremental": True,
     "all_subreddits": list(config.TARGET_SUBREDDITS),
     "max_posts_per_subreddit": config.MAX_POSTS_PER_SUBREDDIT,
 })
 logger.info(f"Pipeline run #{run.id} started — targeting 6000 posts")
-logger.info(f"New subreddits to scrape: {NEW_SUBS}")
 
 try:
-    # Step 1: Scrape only new subreddits
-    logger.info("=== SCRAPING NEW SUBREDDITS ===")
-    scrape_config = PipelineConfig()
-    scrape_config.TARGET_SUBREDDITS = NEW_SUBS
-    new_posts, scrape_metrics = run_scraper(scrape_config)
+    # Step 1: Scrape posts since each subreddit's watermark
+    logger.info("=== INCREMENTAL SCRAPE ===")
+    new_posts, scrape_metrics = run_scraper(config, incremental=True, pipeline_run_id=run.id)
     methodology["ingestion"] = scrape_metrics
 
     total_posts = session.execute(text("SELECT COUNT(*) FROM raw_posts")).scalar()
@@ -61,8 +57,16 @@ try:
 
     # Step 2: Preprocess
     logger.info("=== PREPROCESSING ===")
-    df, preprocess_metrics = load_and_preprocess(session)
+    df, preprocess_metrics = load_and_preprocess(
+        session,
+        workers=config.PREPROCESS_WORKERS,
+        near_dup_threshold=config.NEAR_DUP_THRESHOLD,
+        near_dup_num_perm=config.NEAR_DUP_NUM_PERM,
+        near_dup_shingle_size=config.NEAR_DUP_SHINGLE_SIZE,
+    )
     methodology["preprocessing"] = preprocess_metrics
+    if config.CORPUS_SNAPSHOT_DIR:
+        write_snapshot(df, preprocess_metrics, config.CORPUS_SNAPSHOT_DIR, None, run.id)
 
     # Step 3: Topic modeling
     logger.info("=== TOPIC MODELING ===")
@@ -99,6 +103,10 @@ try:
             })
     session.commit()
 
+    if config.TOPIC_MODEL_DIR:
+        model_path = save_topic_model(topic_model, results_df["post_id"], config.TOPIC_MODEL_DIR, None, run.id, config)
+        model_metrics["topic_model"] = str(model_path)
+
     total_elapsed = round(time.time() - pipeline_start, 1)
     methodology["total_pipeline_duration_seconds"] = total_elapsed
     methodology["pipeline_version"] = config.PIPELINE_VERSION